@@ -1,31 +1,65 @@
-from packet_sender import send_magic_packet, get_ip_address
+from packet_sender import SendPolicy, resolve_ip_addresses
+from scheduler import WakeScheduler
+from verifier import DEFAULT_PORTS, run_verification
+from wake_groups import (GroupError, GroupGraph, GroupTarget, GroupWake, assign_members, group_config_path,
+                         group_members, load_group_graph, pc_groups, tagged_groups)
+from dns_cache import DNSCache
+from discovery import SubnetScanner, find_mac, inventory_status
+from history import CANCELLED, FAILED, NO_RESPONSE, SENT, UP, WakeHistory, current_user, history_path
+from worker import BackgroundWorker
+from hosts import HostError
+from importer import import_rows
+from interfaces import list_interfaces
+from inventory import JSON_KEYS, FIELD_LABELS, OPTIONAL_KEYS, Inventory
+from search import column_sort_key
+from storage import DEFAULT_JSON_FILE, StorageError, open_storage
+import metrics
+import validators
 from abc import ABC, abstractmethod
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
-import os
-import json
-import re
+import sys
+import time
+
+# 변경 후 저장까지 기다리는 시간 (ms). 그 사이의 변경은 한 번에 저장
+SAVE_DELAY = 500
+# 다른 프로그램이 PC 목록 파일을 바꿨는지 확인하는 간격 (ms). 바뀐 PC만 합쳐서 표시
+WATCH_INTERVAL = 1000
+# 여러 PC를 깨울 때 초당 최대 패킷 수와 같은 /24 서브넷 안에서의 간격(초)
+WAKE_RATE = 100.0
+WAKE_STAGGER = 0.0
+# 전체 전송 정책 (재전송 횟수/간격, 포트, 서브넷 브로드캐스트). PC별 "send_policy"가 있으면 해당 값만 바꾼다
+SEND_POLICY = SendPolicy()
+# 깨운 뒤 응답을 확인할 TCP 포트와 최대 대기 시간(초). 포트가 비어 있으면 확인하지 않음
+VERIFY_PORTS = DEFAULT_PORTS
+VERIFY_DEADLINE = 300.0
+# PC 수가 이 값을 넘으면 테이블을 페이지 단위로 표시
+PAGE_SIZE = 1000
+# 지정하면 전송/DNS 조회/저장 지표를 http://127.0.0.1:<포트>/metrics 로 제공하고, 이벤트마다 JSON 한 줄을 파일에 기록
+METRICS_PORT = None
+METRICS_LOG = None
+# 전송 기록 창에 표시하는 최대 행 수
+HISTORY_ROWS = 500
 
 
 class WOLApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, json_file: str = DEFAULT_JSON_FILE):
         super().__init__()
-        self.json_file = "PCList.json"
+        # 확장자가 .db/.sqlite면 SQLite 저장소를 사용
+        self.json_file = json_file
+        self.storage = open_storage(json_file)
+        self.save_job = None
+        self.watch_job = None
+        self.start_metrics()
 
         self.title("Wake on LAN")
-        self.geometry("600x600")
+        self.geometry("700x600")
         self.build_layout()
 
         # pc_list와 json에 저장할 항목들
-        self.json_keys = ["name", "ip", "ddns", "mac", "port"]
-        self.field_labels = {
-            "name": "PC Name",
-            "ip": "IP Address",
-            "ddns": "DDNS Address",
-            "mac": "MAC Address",
-            "port": "Port Number"
-        }
+        self.json_keys = JSON_KEYS
+        self.field_labels = FIELD_LABELS
         # pc_table에 표시할 칼럼 (json_keys의 부분집합)
         self.table_columns = ["name", "ip", "ddns", "mac", "port"]
         self.table_widths = {
@@ -37,16 +71,46 @@ class WOLApp(tk.Tk):
         }
         # 유효성 검증 (부분집합인지 확인)
         self._validate_table_columns()
-
-        self.pc_list = []
+        # 마지막 칼럼에 표시하는 전송 상태 (json에는 저장하지 않음)
+        self.status_column = "status"
+        self.status_label = "Status"
+        self.status_width = 180
+
+        self.inventory = Inventory()
+        self.pc_status = {}  # pc id -> 상태 문자열
+        # 테이블에 표시 중인 행 (pc id -> 값). 변경된 행만 갱신하기 위해 사용
+        self.item_values = {}
+        self.page_size = PAGE_SIZE
+        self.page = 0
+        # 필터 문자열과 정렬 칼럼 (None이면 추가된 순서). view_count는 필터를 적용한 PC 수
+        self.filter_text = ""
+        self.filter_job = None
+        self.sort_column = None
+        self.sort_reverse = False
+        self.sorted_cache = None  # ((칼럼, 역순, inventory.version), 정렬된 id 목록)
+        self.view_count = 0
+        self.dns_cache = DNSCache()
+        # 네트워크 작업은 모두 백그라운드에서 실행
+        self.worker = BackgroundWorker(self)
+        self.scheduler = WakeScheduler(rate=WAKE_RATE, stagger=WAKE_STAGGER)
+        self.wake_jobs = []  # 진행 중인 (작업, pc id 목록)
+        self.wake_sent = {}  # 작업 -> 전송에 성공한 (pc id, ip, 전송 시각) 목록
+        self.group_wake = None  # 진행 중인 그룹 단위 깨우기
+        # 전송 기록 (PC 목록 파일 옆의 WakeHistory 폴더, 파일 쓰기는 기록 스레드에서)
+        self.history = WakeHistory(history_path(self.json_file))
+        self.user = current_user()
+        self.progress_job = None
         self.load_pc_list()
-        self.ddns_ip_synchronize()
         self.build_pc_table()
+        # 저장된 IP로 먼저 표시하고 DDNS는 백그라운드에서 동기화
+        self.ddns_ip_synchronize()
+        self.watch_job = self.after(WATCH_INTERVAL, self.check_external_changes)
 
         # 키 바인딩
         self.bind('<Control-n>', self.on_Ctrl_n)
         self.bind('<Control-e>', self.on_Ctrl_e)
         self.bind('<Delete>', self.on_delete_key)
+        self.bind('<Control-f>', self.on_Ctrl_f)
     
     def build_layout(self):
         # 툴바 프레임 생성
@@ -62,71 +126,197 @@ class WOLApp(tk.Tk):
         # delete
         self.button_delete = tk.Button(self.toolbar_frame, text="Delete", width=8, state=tk.DISABLED, command=self.delete_pc)
         self.button_delete.pack(side=tk.LEFT, padx=2)
+        # 서브넷에서 MAC 주소 찾기
+        self.button_discover = tk.Button(self.toolbar_frame, text="Discover...", width=9, command=self.discover)
+        self.button_discover.pack(side=tk.LEFT, padx=2)
         # 구분선
         separator = tk.Frame(self.toolbar_frame, width=2, bg='gray')
         separator.pack(side=tk.LEFT, fill=tk.Y, padx=5, pady=5)
         # wol
         self.button_wol = tk.Button(self.toolbar_frame, text="Wake Up", width=10, state=tk.DISABLED, command=self.wol)
         self.button_wol.pack(side=tk.LEFT, padx=2)
+        # wol all
+        self.button_wol_all = tk.Button(self.toolbar_frame, text="Wake All", width=10, command=self.wol_all)
+        self.button_wol_all.pack(side=tk.LEFT, padx=2)
+        # 그룹 단위 (선행 그룹부터)
+        self.button_wol_groups = tk.Button(self.toolbar_frame, text="Groups...", width=10, command=self.wol_groups)
+        self.button_wol_groups.pack(side=tk.LEFT, padx=2)
+        # 전송 기록
+        self.button_history = tk.Button(self.toolbar_frame, text="History", width=8, command=self.show_history)
+        self.button_history.pack(side=tk.LEFT, padx=2)
+        # 진행 상황, 취소
+        self.button_cancel = tk.Button(self.toolbar_frame, text="Cancel", width=8, state=tk.DISABLED, command=self.cancel_wake)
+        self.button_cancel.pack(side=tk.RIGHT, padx=4)
+        self.progress_label = tk.Label(self.toolbar_frame, bg='lightgray')
+        self.progress_label.pack(side=tk.RIGHT, padx=2)
+
+        # 필터 (name, IP, DDNS, MAC에 입력한 문자열이 포함된 PC만 표시)
+        self.filter_frame = tk.Frame(self)
+        self.filter_frame.pack(fill=tk.X, padx=10, pady=(0, 5))
+        tk.Label(self.filter_frame, text="Filter:").pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar()
+        self.filter_entry = tk.Entry(self.filter_frame, textvariable=self.filter_var)
+        self.filter_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.filter_count_label = tk.Label(self.filter_frame)
+        self.filter_count_label.pack(side=tk.RIGHT)
+        self.filter_var.trace_add("write", self.on_filter_change)
+        self.filter_entry.bind('<Escape>', self.on_filter_escape)
     
+    def start_metrics(self):
+        self.metrics_server = None
+        self.metrics_log = None
+        self.metrics_hook = None
+        try:
+            if METRICS_LOG:
+                self.metrics_log = open(METRICS_LOG, "a", encoding="utf-8")
+                self.metrics_hook = metrics.JsonLogHook(self.metrics_log)
+                metrics.add_hook(self.metrics_hook)
+            if METRICS_PORT is not None:
+                self.metrics_server = metrics.serve("127.0.0.1", METRICS_PORT)
+        except OSError as e:
+            # 지표 없이도 동작하므로 알리기만 한다
+            messagebox.showwarning("Metrics", f"Cannot start metrics: {e}")
+
     def load_pc_list(self):
-        if not os.path.exists(self.json_file):
-            self.pc_list = []
-            return
-        
         try:
-            with open(self.json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.pc_list = data.get("pc_list", [])
-        except json.JSONDecodeError as e:
+            self.inventory = self.storage.load()
+            # 저장된 IP를 DDNS 조회 실패 시의 대체값으로 사용
+            for pc in self.inventory:
+                self.dns_cache.prime(pc.get("ddns", ""), pc.get("ip", ""))
+        except StorageError as e:
             result = messagebox.askyesno(
                 "JSON File Error",
                 "The JSON file format is invalid.\nFile may be corrupted or damaged.\n\nDo you want to reset the file?",
                 icon='error'
             )
             if result:
-                self.pc_list = []
-                self.save_pc_list()
+                self.storage.reset()
+                self.inventory = self.storage.load()
             else:
                 self.destroy()
                 exit(1)
 
     def ddns_ip_synchronize(self):
-        """DDNS가 있는 PC들의 IP를 자동으로 동기화"""
-        for pc in self.pc_list:
-            ddns = pc.get("ddns", "")
-            if ddns:  # DDNS가 있는 경우
-                # DDNS에서 IP 추출
-                ip = get_ip_address(ddns)
-                if ip:
-                    pc["ip"] = ip
-                else:
-                    pc["ip"] = ""
-        self.save_pc_list()
-
-    def save_pc_list(self):
-        with open(self.json_file, 'w', encoding='utf-8') as f:
-            json.dump({"pc_list": self.pc_list}, f, indent=2, ensure_ascii=False)
+        """DDNS가 있는 PC들의 IP를 백그라운드에서 동시에 동기화"""
+        ddns_list = [pc["ddns"] for pc in self.inventory if pc.get("ddns", "")]
+        if not ddns_list:
+            return
+
+        self.ddns_resolved = {}
+        self.ddns_apply_scheduled = False
+        self.ddns_changed = False
+        self.worker.submit(self._resolve_ddns_worker, ddns_list, callback=self._on_ddns_sync_finished)
+
+    def _resolve_ddns_worker(self, ddns_list: list[str]):
+        # 작업 스레드에서 실행: 결과는 call_soon으로 메인 스레드에 넘긴다
+        # 만료된 캐시는 바로 다시 조회하되, 실패하면 마지막으로 성공한 IP를 유지
+        resolver = lambda ddns: self.dns_cache.resolve(ddns, allow_stale=False)
+        for ddns, ip in resolve_ip_addresses(ddns_list, resolver=resolver):
+            # 한 번도 조회에 성공하지 못한 경우에만 None이 오므로 기존 값을 그대로 둔다
+            if ip:
+                self.worker.call_soon(self._on_ddns_resolved, ddns, ip)
+
+    def _on_ddns_resolved(self, ddns: str, ip: str):
+        # 한 번에 도착한 결과들을 모아서 반영
+        self.ddns_resolved[ddns] = ip
+        if not self.ddns_apply_scheduled:
+            self.ddns_apply_scheduled = True
+            self.after_idle(self._apply_ddns_results)
+
+    def _apply_ddns_results(self):
+        self.ddns_apply_scheduled = False
+        resolved, self.ddns_resolved = self.ddns_resolved, {}
+        if not resolved:
+            return
+
+        # 조회가 끝난 PC의 행만 갱신
+        changed_ids = []
+        for ddns, ip in resolved.items():
+            for pc_id in self.inventory.find_by_ddns(ddns):
+                if self.inventory.get(pc_id)["ip"] != ip:
+                    self.inventory.set_field(pc_id, "ip", ip)
+                    changed_ids.append(pc_id)
+        if changed_ids:
+            self.ddns_changed = True
+            self.update_pc_rows(changed_ids)
+
+    def _on_ddns_sync_finished(self, result, error):
+        self._apply_ddns_results()
+        if self.ddns_changed:
+            self.save_pc_list()
+
+    def save_pc_list(self, immediate: bool = False):
+        """
+        변경 내용을 저장
+        - 기본은 SAVE_DELAY 뒤에 한 번 저장 (연속된 변경은 한 번의 쓰기로 합쳐진다)
+        - 바뀐 것이 없으면 파일을 쓰지 않는다
+        """
+        if immediate:
+            if self.save_job is not None:
+                self.after_cancel(self.save_job)
+                self.save_job = None
+            self.storage.save(self.inventory)
+        elif self.save_job is None:
+            self.save_job = self.after(SAVE_DELAY, self._flush_save)
+
+    def _flush_save(self):
+        self.save_job = None
+        self.storage.save(self.inventory)
+        # 저장 전에 합친 다른 프로그램의 변경을 바로 표시
+        self.check_external_changes(reschedule=False)
+
+    def check_external_changes(self, reschedule: bool = True):
+        """다른 인스턴스나 스크립트가 PC 목록 파일을 바꿨으면 바뀐 PC만 합치고 해당 행만 갱신"""
+        if reschedule:
+            self.watch_job = self.after(WATCH_INTERVAL, self.check_external_changes)
+        try:
+            changed_ids = self.storage.poll(self.inventory)
+        except (StorageError, OSError):
+            # 쓰는 중이거나 잘못된 파일은 다음 확인 때 다시 읽는다
+            return
+        if not changed_ids:
+            return
+        for pc_id in changed_ids:
+            if pc_id in self.inventory:
+                pc = self.inventory.get(pc_id)
+                self.dns_cache.prime(pc.get("ddns", ""), pc.get("ip", ""))
+            else:
+                self.pc_status.pop(pc_id, None)
+        self.refresh_pc_table()
 
     def build_pc_table(self):
         # Treeview 생성
-        self.tree = ttk.Treeview(self, columns=self.table_columns, show='headings', height=20, selectmode='browse')
+        columns = self.table_columns + [self.status_column]
+        self.tree = ttk.Treeview(self, columns=columns, show='headings', height=20, selectmode='extended')
         
         # 컬럼 헤더, 너비 설정
+        # 헤더를 누르면 그 칼럼으로 정렬
         for column in self.table_columns:
-            self.tree.heading(column, text=self.field_labels[column])
+            self.tree.heading(column, text=self.field_labels[column], command=lambda c=column: self.sort_by(c))
             self.tree.column(column, width=self.table_widths[column])
+        self.tree.heading(self.status_column, text=self.status_label,
+                          command=lambda: self.sort_by(self.status_column))
+        self.tree.column(self.status_column, width=self.status_width)
         
         # 스크롤바 생성
         self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self.tree.yview)
         self.tree.configure(yscrollcommand=self.scrollbar.set)
         
+        # 페이지 이동 바 (PC가 많을 때만 표시)
+        self.page_frame = tk.Frame(self)
+        self.button_prev_page = tk.Button(self.page_frame, text="<", width=3, command=lambda: self.move_page(-1))
+        self.button_prev_page.pack(side=tk.LEFT)
+        self.page_label = tk.Label(self.page_frame)
+        self.page_label.pack(side=tk.LEFT, padx=5)
+        self.button_next_page = tk.Button(self.page_frame, text=">", width=3, command=lambda: self.move_page(1))
+        self.button_next_page.pack(side=tk.LEFT)
+
         # 테이블과 스크롤바 배치
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, padx=(10, 0), pady=(0, 10), expand=True)
         self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y, pady=(0, 10))
 
         # 창 크기 조절
-        tree_width = sum(self.table_widths.values()) + 10
+        tree_width = sum(self.table_widths.values()) + self.status_width + 10
         self.geometry(f"{tree_width + 30}x600")
         self.minsize(f"{tree_width + 30}", 300)
 
@@ -141,14 +331,174 @@ class WOLApp(tk.Tk):
         self.tree.bind('<Return>', self.on_wake_up)
 
     def refresh_pc_table(self):
-        # 기존 데이터 삭제
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # PC 목록 데이터 추가
-        for pc in self.pc_list:
-            values = [pc.get(column, "") for column in self.table_columns]
-            self.tree.insert('', 'end', values=values)
+        """inventory와 비교해서 바뀐 행만 추가/수정/삭제"""
+        visible_ids = self.get_visible_ids()
+
+        # 목록에서 사라진 행 삭제
+        visible_id_set = set(visible_ids)
+        removed_ids = [pc_id for pc_id in self.item_values if pc_id not in visible_id_set]
+        if removed_ids:
+            self.tree.delete(*[self.get_item_id(pc_id) for pc_id in removed_ids])
+            for pc_id in removed_ids:
+                del self.item_values[pc_id]
+
+        # 새 행 추가, 값이 바뀐 행 수정
+        for index, pc_id in enumerate(visible_ids):
+            if pc_id in self.item_values:
+                self._update_row(pc_id)
+                continue
+            values = self.get_row_values(pc_id)
+            self.tree.insert('', index, iid=self.get_item_id(pc_id), values=values)
+            self.item_values[pc_id] = values
+
+        # 순서가 바뀐 경우에만 행 이동
+        new_items = [self.get_item_id(pc_id) for pc_id in visible_ids]
+        if list(self.tree.get_children()) != new_items:
+            for index, item in enumerate(new_items):
+                self.tree.move(item, '', index)
+
+        self.update_page_bar()
+
+    def get_item_id(self, pc_id: int) -> str:
+        # 테이블 행 id는 inventory의 pc id로 고정
+        return f"pc{pc_id}"
+
+    def get_pc_id(self, item: str) -> int:
+        return int(item[2:])
+
+    def get_visible_ids(self) -> list[int]:
+        if not self.filter_text and self.sort_column is None:
+            # 필터와 정렬이 없으면 전체 id 목록을 만들지 않고 현재 페이지만
+            self.view_count = len(self.inventory)
+            if self.view_count <= self.page_size:
+                self.page = 0
+                return self.inventory.ids()
+            last_page = (self.view_count - 1) // self.page_size
+            self.page = min(self.page, last_page)
+            start = self.page * self.page_size
+            return self.inventory.slice(start, start + self.page_size)
+
+        view_ids = self.get_view_ids()
+        self.view_count = len(view_ids)
+        last_page = max(self.view_count - 1, 0) // self.page_size
+        self.page = min(self.page, last_page)
+        start = self.page * self.page_size
+        return view_ids[start:start + self.page_size]
+
+    def get_view_ids(self) -> list[int]:
+        """필터와 정렬을 적용한 모든 PC의 id (페이지로 나누기 전)"""
+        matched = self.inventory.search(self.filter_text) if self.filter_text else None
+        if self.sort_column is None:
+            return matched if matched is not None else self.inventory.ids()
+        ordered = self.get_sorted_ids()
+        if matched is None:
+            return ordered
+        # 정렬된 전체 목록에서 일치하는 것만 골라서 키보드 입력마다 다시 정렬하지 않는다
+        matched = set(matched)
+        return [pc_id for pc_id in ordered if pc_id in matched]
+
+    def get_sorted_ids(self) -> list[int]:
+        """sort_column 순서의 모든 PC id. PC가 바뀌기 전까지 캐시 (상태 칼럼은 자주 바뀌므로 매번 정렬)"""
+        cache_key = (self.sort_column, self.sort_reverse, self.inventory.version)
+        if self.sort_column != self.status_column and self.sorted_cache and self.sorted_cache[0] == cache_key:
+            return self.sorted_cache[1]
+        if self.sort_column == self.status_column:
+            return sorted(self.inventory.ids(), key=lambda pc_id: self.pc_status.get(pc_id, ""),
+                          reverse=self.sort_reverse)
+        column = self.sort_column
+        value_key = column_sort_key(column)
+        items = sorted(self.inventory.items(), key=lambda item: value_key(item[1].get(column, "")),
+                       reverse=self.sort_reverse)
+        ids = [pc_id for pc_id, _ in items]
+        self.sorted_cache = (cache_key, ids)
+        return ids
+
+    def sort_by(self, column: str):
+        """같은 칼럼을 누를 때마다 오름차순 -> 내림차순 -> 원래 순서"""
+        if self.sort_column != column:
+            self.sort_column, self.sort_reverse = column, False
+        elif not self.sort_reverse:
+            self.sort_reverse = True
+        else:
+            self.sort_column, self.sort_reverse = None, False
+        for heading in self.table_columns + [self.status_column]:
+            label = self.status_label if heading == self.status_column else self.field_labels[heading]
+            if heading == self.sort_column:
+                label += " \u25bc" if self.sort_reverse else " \u25b2"
+            self.tree.heading(heading, text=label)
+        self.page = 0
+        self.refresh_pc_table()
+        self.tree.yview_moveto(0)
+
+    def on_filter_change(self, *args):
+        # 빠르게 입력하면 쌓인 입력을 한 번에 적용
+        if self.filter_job is None:
+            self.filter_job = self.after_idle(self.apply_filter)
+
+    def apply_filter(self):
+        self.filter_job = None
+        self.filter_text = self.filter_var.get().strip()
+        self.page = 0
+        self.refresh_pc_table()
+        self.tree.yview_moveto(0)
+
+    def on_filter_escape(self, event):
+        self.filter_var.set("")
+        self.tree.focus_set()
+        return "break"
+
+    def update_page_bar(self):
+        if self.filter_text:
+            self.filter_count_label.config(text=f"{self.view_count} of {len(self.inventory)}")
+        else:
+            self.filter_count_label.config(text="")
+        if self.view_count <= self.page_size:
+            self.page_frame.pack_forget()
+            return
+
+        last_page = (self.view_count - 1) // self.page_size
+        start = self.page * self.page_size
+        end = min(start + self.page_size, self.view_count)
+        self.page_label.config(text=f"{start + 1}-{end} of {self.view_count}")
+        self.button_prev_page.config(state=tk.NORMAL if self.page > 0 else tk.DISABLED)
+        self.button_next_page.config(state=tk.NORMAL if self.page < last_page else tk.DISABLED)
+        if not self.page_frame.winfo_ismapped():
+            self.page_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=(0, 10), before=self.tree)
+
+    def move_page(self, delta: int):
+        self.page = max(self.page + delta, 0)
+        self.refresh_pc_table()
+        self.tree.yview_moveto(0)
+
+    def get_row_values(self, pc_id: int) -> list:
+        pc = self.inventory.get(pc_id)
+        values = [pc.get(column, "") for column in self.table_columns]
+        values.append(self.pc_status.get(pc_id, ""))
+        return values
+
+    def _update_row(self, pc_id: int):
+        values = self.get_row_values(pc_id)
+        if values != self.item_values[pc_id]:
+            self.tree.item(self.get_item_id(pc_id), values=values)
+            self.item_values[pc_id] = values
+
+    def update_pc_rows(self, pc_ids: list[int]):
+        """표시 중인 PC들의 행만 갱신 (다른 페이지에 있거나 삭제된 PC는 건너뛴다)"""
+        for pc_id in pc_ids:
+            if pc_id in self.item_values:
+                self._update_row(pc_id)
+
+    def get_selected_ids(self) -> list[int]:
+        return [self.get_pc_id(item) for item in self.tree.selection()]
+
+    def set_pc_status(self, pc_ids: list[int], status: str | list[str]):
+        """PC들의 상태를 바꾸고 해당 행만 갱신 (status가 목록이면 PC별 상태)"""
+        statuses = status if isinstance(status, list) else [status] * len(pc_ids)
+        for pc_id, pc_status in zip(pc_ids, statuses):
+            # 작업 중에 삭제된 PC는 무시
+            if pc_id in self.inventory:
+                self.pc_status[pc_id] = pc_status
+        self.update_pc_rows(pc_ids)
     
     def new_pc(self):
         new_window = NewPCWindow(self)
@@ -157,11 +507,10 @@ class WOLApp(tk.Tk):
         new_window = EditPCWindow(self)
 
     def delete_pc(self):
-        selected_pc = self.tree.selection()
-        pc_index = self.tree.index(selected_pc[0])
+        pc_id = self.get_selected_ids()[0]
 
         # 삭제 확인 다이얼로그
-        pc_name = self.pc_list[pc_index]['name']
+        pc_name = self.inventory.get(pc_id)['name']
         result = messagebox.askyesno(
             "Delete Confirmation",
             f"Are you sure you want to delete '{pc_name}'?\n\nThis action cannot be undone.",
@@ -169,68 +518,290 @@ class WOLApp(tk.Tk):
         )
 
         if result:
-            del self.pc_list[pc_index]
+            # 삭제 후 선택할 pc (다음 행, 없으면 이전 행)
+            item = self.get_item_id(pc_id)
+            next_item = self.tree.next(item) or self.tree.prev(item)
+
+            self.pc_status.pop(pc_id, None)
+            self.inventory.remove(pc_id)
             self.save_pc_list()
             self.refresh_pc_table()
 
-            # 삭제 후 다음 pc 선택
-            items = self.tree.get_children()
-            last_pc_index = len(items) - 1
-            if last_pc_index == -1:
-                return
-            if pc_index > last_pc_index:
-                self.tree.selection_set(items[last_pc_index])
-                self.tree.focus(items[last_pc_index])
-            else:
-                self.tree.selection_set(items[pc_index])
-                self.tree.focus(items[pc_index])
+            if next_item:
+                self.tree.selection_set(next_item)
+                self.tree.focus(next_item)
 
     def wol(self):
-        selected_pc = self.tree.selection()
+        self.wake_pcs(self.get_selected_ids())
+
+    def wol_all(self):
+        self.wake_pcs(self.inventory.ids())
 
-        # 선택된 PC 정보 가져오기
-        pc_index = self.tree.index(selected_pc[0])
-        pc_info = self.pc_list[pc_index]
-        pc_name = pc_info.get('name', 'Unknown PC')
+    def wake_pcs(self, pc_ids: list[int]):
+        if not pc_ids:
+            return
+        pcs = [self.inventory.get(pc_id) for pc_id in pc_ids]
 
         # Wake up 확인 다이얼로그
-        result = messagebox.askyesno(
-            "Wake on LAN",
-            f"Do you want to wake up '{pc_name}'?",
-            icon='question'
-        )
+        if len(pcs) == 1:
+            pc_name = pcs[0].get('name', 'Unknown PC')
+            question = f"Do you want to wake up '{pc_name}'?"
+        else:
+            question = f"Do you want to wake up {len(pcs)} PCs?"
+        result = messagebox.askyesno("Wake on LAN", question, icon='question')
+        if not result:
+            return
 
-        # ddns 검증
-        # 프로그램 시작 시 ddns에 문제가 있을 경우 ip는 공란이 된다
-        if pc_info["ip"] == "" and pc_info["ddns"] != "":
-            messagebox.showerror("Wake on LAN Error", f"Invalid {self.field_labels['ddns']}")
+        target_ids, targets, policies, packets = self.prepare_targets(pc_ids)
+        if not targets:
             return
 
-        if result:
-            # 데이터 검증
-            is_valid, key = self.validate_pc(pc_info)
-            if not is_valid:
-                messagebox.showerror("Wake on LAN Error", f"Invalid {self.field_labels[key]}")
-                return
-            # 매직 패킷 전송
+        # 매직 패킷 전송 (결과는 각 행의 상태로 표시)
+        self.set_pc_status(target_ids, "Pending")
+        # 스케줄러 스레드의 결과는 worker를 통해 메인 스레드로 전달
+        self.worker.hold()
+        requested = time.monotonic()
+        try:
+            job = self.scheduler.submit(
+                targets,
+                # job은 메인 스레드에서 호출될 때 읽는다 (submit이 끝나기 전에 완료될 수 있음)
+                on_result=lambda index, target, error: self.worker.call_soon(
+                    lambda sent_at=time.monotonic(): self._on_wake_result(
+                        job, target_ids[index], target[0], error, sent_at, sent_at - requested
+                    )
+                ),
+                on_done=lambda: self.worker.call_soon(lambda: self._on_wake_job_done(job, target_ids)),
+                policies=policies,
+                packets=packets
+            )
+        except OSError as e:
+            # 소켓 생성 자체가 실패한 경우
+            self.worker.release()
+            self.set_pc_status(target_ids, f"Failed: {e}")
+            for pc_id, target in zip(target_ids, targets):
+                self.record_wake(pc_id, FAILED, e, ip=target[0])
+            return
+        self.wake_jobs.append((job, target_ids))
+        self.update_wake_progress()
+
+    def prepare_targets(self, pc_ids: list[int]) -> tuple[list[int], list, list[SendPolicy], list[bytes]]:
+        """
+        보낼 수 있는 PC들의 (id, 대상, 정책, 매직 패킷) 목록
+        - PC마다 한 번 검증하고 매직 패킷까지 만들어 둔 레코드를 재사용, 보낼 수 없는 PC는 상태에 실패 표시
+        """
+        target_ids = []
+        targets = []
+        policies = []
+        packets = []
+        for pc_id in pc_ids:
+            pc_info = self.inventory.get(pc_id)
             try:
-                send_magic_packet(pc_info["ip"], pc_info["mac"], pc_info["port"])
-                messagebox.showinfo(
-                    "Wake on LAN", 
-                    f"Wake up signal sent to '{pc_name}' successfully"
-                )
-            except Exception as e:
-                messagebox.showerror(
-                    "Wake on LAN Error", 
-                    f"Failed to send wake up signal to '{pc_name}'.\n\nError: {str(e)}"
-                )           
+                host = self.inventory.host(pc_id)
+            except HostError as e:
+                self.set_pc_status([pc_id], f"Failed: Invalid {self.field_labels[e.key]}")
+                self.record_wake(pc_id, FAILED, f"Invalid {self.field_labels[e.key]}")
+                continue
+            # 프로그램 시작 시 ddns 조회에 한 번도 성공하지 못했으면 ip는 공란이다
+            if host.ip is None:
+                self.set_pc_status([pc_id], f"Failed: Invalid {self.field_labels['ddns']}")
+                self.record_wake(pc_id, FAILED, f"Invalid {self.field_labels['ddns']}")
+                continue
+            try:
+                policy = SEND_POLICY.for_pc(pc_info)
+            except ValueError as e:
+                self.set_pc_status([pc_id], f"Failed: {e}")
+                self.record_wake(pc_id, FAILED, e)
+                continue
+            target_ids.append(pc_id)
+            targets.append((pc_info["ip"], pc_info["mac"], host.port))
+            policies.append(policy)
+            packets.append(host.packet)
+        return target_ids, targets, policies, packets
+
+    def record_wake(self, pc_id: int, result: str, error=None, latency: float | None = None, ip: str | None = None):
+        """
+        전송 기록에 추가 (메모리에 추가만 하고 파일 쓰기는 기록 스레드에서)
+        - ip: 보낸 주소 (없으면 PC 목록의 IP)
+        """
+        # 전송 중에 삭제된 PC는 기록하지 않는다
+        if pc_id not in self.inventory:
+            return
+        pc_info = self.inventory.get(pc_id)
+        self.history.record(pc_info.get("name", ""), pc_info.get("mac", ""), pc_info.get("ip", "") if ip is None else ip,
+                            result, error, latency, "gui", self.user)
+
+    def _on_wake_result(self, job, pc_id: int, ip: str, error: Exception | None, sent_at: float, latency: float):
+        if error is not None:
+            self.set_pc_status([pc_id], f"Failed: {error}")
+            self.record_wake(pc_id, FAILED, error, latency, ip)
+            return
+        self.set_pc_status([pc_id], "Sent")
+        self.record_wake(pc_id, SENT, latency=latency, ip=ip)
+        self.wake_sent.setdefault(job, []).append((pc_id, ip, sent_at))
+
+    def _on_wake_job_done(self, job, pc_ids: list[int]):
+        self.worker.release()
+        self.wake_jobs = [(other, ids) for other, ids in self.wake_jobs if other is not job]
+        if job.cancelled:
+            # 보내지 못한 PC만 취소로 표시
+            pending_ids = [pc_id for pc_id in pc_ids if self.pc_status.get(pc_id) == "Pending"]
+            self.set_pc_status(pending_ids, "Cancelled")
+            for pc_id in pending_ids:
+                self.record_wake(pc_id, CANCELLED)
+        self.update_wake_progress()
+        self.verify_pcs(self.wake_sent.pop(job, []))
+
+    def verify_pcs(self, sent: list[tuple[int, str, float]]):
+        """깨운 PC들이 응답하는지 백그라운드에서 동시에 확인 (PC마다 스레드를 만들지 않음)"""
+        if not sent or not VERIFY_PORTS:
+            return
+        pc_ids = [pc_id for pc_id, _, _ in sent]
+        self.worker.submit(
+            run_verification, [(ip, sent_at) for _, ip, sent_at in sent],
+            on_result=lambda index, result: self.worker.call_soon(self._on_verified, pc_ids[index], result),
+            ports=VERIFY_PORTS, deadline=VERIFY_DEADLINE
+        )
+
+    def _on_verified(self, pc_id: int, result):
+        if result.reachable:
+            self.record_wake(pc_id, UP, latency=result.time_to_wake, ip=result.ip)
+        else:
+            self.record_wake(pc_id, NO_RESPONSE, ip=result.ip)
+        # 확인하는 동안 다시 깨우거나 편집한 PC는 건드리지 않음
+        if self.pc_status.get(pc_id) != "Sent":
+            return
+        if result.reachable:
+            self.set_pc_status([pc_id], f"Up ({result.time_to_wake:.1f}s)")
+        else:
+            self.set_pc_status([pc_id], "No response")
+
+    def wol_groups(self):
+        """그룹 선택 창을 연다 (PC의 Groups 항목과 WakeGroups.json의 의존 관계)"""
+        try:
+            graph = load_group_graph(group_config_path(self.json_file), VERIFY_DEADLINE)
+        except GroupError as e:
+            messagebox.showerror("Wake Groups", str(e))
+            return
+        groups = list(dict.fromkeys(tagged_groups(self.inventory) + graph.names()))
+        if not groups:
+            messagebox.showinfo("Wake Groups", "No groups defined.\nAdd group names to PCs in the Groups field.")
+            return
+        WakeGroupWindow(self, graph, groups)
+
+    def discover(self):
+        """서브넷 탐색 창 (찾은 장비를 PC 목록에 추가하거나 IP를 갱신)"""
+        DiscoverWindow(self)
+
+    def show_history(self):
+        """전송 기록 창 (PC 하나만 선택돼 있으면 그 PC의 기록)"""
+        selected_ids = self.get_selected_ids()
+        host = self.inventory.get(selected_ids[0]).get("name", "") if len(selected_ids) == 1 else ""
+        HistoryWindow(self, host)
+
+    def wake_groups(self, graph: GroupGraph, groups: list[str]) -> bool:
+        """
+        groups와 선행 그룹들을 의존 관계 순서대로 깨운다 (시작했으면 True)
+        - 선행 그룹의 PC가 모두 응답하거나 그룹의 timeout이 지나면 다음 그룹을 깨운다
+        """
+        if self.group_wake is not None:
+            messagebox.showinfo("Wake Groups", "A group wake is already running.")
+            return False
+        try:
+            waves = graph.waves(groups)
+        except GroupError as e:
+            messagebox.showerror("Wake Groups", str(e))
+            return False
+        members = assign_members(waves, group_members(self.inventory.items(), graph.closure(groups)))
+        total = sum(len(pc_ids) for pc_ids in members.values())
+        if not total:
+            messagebox.showinfo("Wake Groups", "There are no PCs in the selected groups.")
+            return False
+        order = "\n".join(f"{number}. {', '.join(wave)}" for number, wave in enumerate(waves, 1))
+        question = f"Do you want to wake up {total} PCs in this order?\n\n{order}"
+        if not messagebox.askyesno("Wake on LAN", question, icon='question'):
+            return False
+
+        group_targets = {}
+        for wave in waves:
+            for group in wave:
+                target_ids, targets, policies, packets = self.prepare_targets(members[group])
+                group_targets[group] = [GroupTarget(*target) for target in zip(target_ids, targets, policies, packets)]
+                # 선행 그룹이 있으면 준비될 때까지 대기
+                self.set_pc_status(target_ids, "Waiting" if graph.prerequisites(group) else "Pending")
+
+        # 그룹 실행은 작업 스레드에서, 결과는 worker를 통해 메인 스레드로 전달
+        self.group_wake = GroupWake(
+            self.scheduler, graph, waves, group_targets, VERIFY_PORTS,
+            on_group=lambda group, state: self.worker.call_soon(self._on_group_state, group, state),
+            on_result=lambda pc_id, error: self.worker.call_soon(self._on_group_sent, pc_id, error),
+            on_verified=lambda pc_id, result: self.worker.call_soon(self._on_verified, pc_id, result)
+        )
+        self.worker.submit(self.group_wake.run, callback=self._on_group_wake_done)
+        self.update_wake_progress()
+        return True
+
+    def _on_group_state(self, group: str, state: str):
+        if self.group_wake is None:
+            return
+        pc_ids = [target.key for target in self.group_wake.members.get(group, ())]
+        if state == GroupWake.WAKING:
+            self.set_pc_status([pc_id for pc_id in pc_ids if self.pc_status.get(pc_id) == "Waiting"], "Pending")
+        elif state == GroupWake.CANCELLED:
+            # 보내지 못한 PC만 취소로 표시
+            pending_ids = [pc_id for pc_id in pc_ids if self.pc_status.get(pc_id) in ("Waiting", "Pending")]
+            self.set_pc_status(pending_ids, "Cancelled")
+            for pc_id in pending_ids:
+                self.record_wake(pc_id, CANCELLED)
+        self.update_wake_progress()
+
+    def _on_group_sent(self, pc_id: int, error: Exception | None):
+        self.set_pc_status([pc_id], "Sent" if error is None else f"Failed: {error}")
+        self.record_wake(pc_id, SENT if error is None else FAILED, error)
+
+    def _on_group_wake_done(self, result, error):
+        self.group_wake = None
+        self.update_wake_progress()
+        if error is not None:
+            messagebox.showerror("Wake Groups", f"Group wake failed: {error}")
+
+    def update_wake_progress(self):
+        """진행 중인 전송이 있는 동안 진행 상황과 남은 시간을 표시"""
+        if self.progress_job is not None:
+            self.after_cancel(self.progress_job)
+            self.progress_job = None
+        if not self.wake_jobs and self.group_wake is None:
+            self.progress_label.config(text="")
+            self.button_cancel.config(state=tk.DISABLED)
+            return
+
+        progress = []
+        if self.wake_jobs:
+            completed = sum(job.completed for job, _ in self.wake_jobs)
+            total = sum(job.total for job, _ in self.wake_jobs)
+            eta = max(job.eta() for job, _ in self.wake_jobs)
+            progress.append(f"Waking {completed}/{total} (ETA {eta:.0f}s)")
+        if self.group_wake is not None:
+            states = list(self.group_wake.states.values())
+            finished = sum(state in GroupWake.FINISHED for state in states)
+            progress.append(f"Groups {finished}/{len(states)}")
+        self.progress_label.config(text="  ".join(progress))
+        self.button_cancel.config(state=tk.NORMAL)
+        self.progress_job = self.after(200, self.update_wake_progress)
+
+    def cancel_wake(self):
+        for job, _ in self.wake_jobs:
+            job.cancel()
+        if self.group_wake is not None:
+            self.group_wake.cancel()
 
     def on_tree_select(self, event):
         selected_items = self.tree.selection()
         
         if selected_items:
-            self.button_edit.config(state=tk.NORMAL)
-            self.button_delete.config(state=tk.NORMAL)
+            # 편집/삭제는 하나만 선택된 경우에만 가능
+            single_state = tk.NORMAL if len(selected_items) == 1 else tk.DISABLED
+            self.button_edit.config(state=single_state)
+            self.button_delete.config(state=single_state)
             self.button_wol.config(state=tk.NORMAL)
         else:
             self.button_edit.config(state=tk.DISABLED)
@@ -238,6 +809,9 @@ class WOLApp(tk.Tk):
             self.button_wol.config(state=tk.DISABLED)
 
     def on_tree_click(self, event):
+        # 헤더 클릭은 정렬
+        if self.tree.identify_region(event.x, event.y) == "heading":
+            return
         # 클릭한 위치의 아이템 확인
         item = self.tree.identify_row(event.y)
         
@@ -257,51 +831,35 @@ class WOLApp(tk.Tk):
 
     def on_Ctrl_e(self, event):
         selected_items = self.tree.selection()
-        if selected_items:
+        if len(selected_items) == 1:
             self.edit_pc()
         return "break"
 
+    def on_Ctrl_f(self, event):
+        self.filter_entry.focus_set()
+        self.filter_entry.select_range(0, tk.END)
+        return "break"
+
     def on_delete_key(self, event):
+        # 필터 입력 중에는 글자 삭제
+        if event.widget is self.filter_entry:
+            return
         selected_items = self.tree.selection()
-        if selected_items:
+        if len(selected_items) == 1:
             self.delete_pc()
         return "break"
 
     def validate_ip_address(self, ip: str) -> bool:
-        parts = ip.split('.')
-        if len(parts) != 4:
-            return False
-        for part in parts:
-            try:
-                num = int(part)
-            except ValueError:
-                return False
-            if not 0 <= num <= 255:
-                return False
-        return True
+        return validators.validate_ip_address(ip)
     
     def validate_ddns_address(self, ddns: str) -> bool:
-        # 호스트명.서브도메인.최상위도메인
-        pattern = r'^(?=.{1,253}$)(?!\-)([a-zA-Z0-9\-]{1,63}\.)+[a-zA-Z]{2,}$'
-        return bool(re.match(pattern, ddns))
+        return validators.validate_ddns_address(ddns)
 
     def validate_mac_address(self, mac: str) -> bool:
-        # XX:XX:XX:XX:XX:XX 또는 XX-XX-XX-XX-XX-XX 형식
-        pattern = r'^([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})$'
-        return bool(re.match(pattern, mac))
+        return validators.validate_mac_address(mac)
 
     def validate_port_number(self, num: int) -> bool:
-        # 정수인지 확인
-        try:
-            num = int(num)
-        except ValueError:
-            return False
-        
-        # 1-65535 범위 내인지 확인
-        if 1 <= num <= 65535:
-            return True
-        else:
-            return False
+        return validators.validate_port_number(num)
     
     def validate_pc(self, pc: dict) -> tuple[bool, str]:
         """
@@ -309,17 +867,27 @@ class WOLApp(tk.Tk):
         - (True, ""): 모든 데이터가 유효함
         - (False, key): 유효하지 않은 데이터와 필드의 키
         """
-        # ip
-        if not self.validate_ip_address(pc["ip"]):
-            return False, "ip"
-        # mac
-        if not self.validate_mac_address(pc["mac"]):
-            return False, "mac"
-        # port
-        if not self.validate_port_number(pc["port"]):
-            return False, "port"
-        
-        return True, ""
+        return validators.validate_pc(pc)
+
+    def destroy(self):
+        if self.watch_job is not None:
+            self.after_cancel(self.watch_job)
+            self.watch_job = None
+        # 아직 저장되지 않은 변경 내용을 기록하고 종료
+        self.save_pc_list(immediate=True)
+        self.storage.close()
+        if self.group_wake is not None:
+            self.group_wake.cancel()
+        self.scheduler.close()
+        self.worker.shutdown()
+        self.history.close()
+        if self.metrics_server is not None:
+            self.metrics_server.shutdown()
+        if self.metrics_hook is not None:
+            metrics.remove_hook(self.metrics_hook)
+        if self.metrics_log is not None:
+            self.metrics_log.close()
+        super().destroy()
 
     def _validate_table_columns(self):
         """table_columns가 json_keys의 부분집합인지 검증"""
@@ -330,10 +898,14 @@ class WOLApp(tk.Tk):
     
 
 class PCWindowBase(tk.Toplevel):
+    # 편집 중인 pc id (새 PC는 None, 중복 검사에서 자기 자신을 제외하기 위해 사용)
+    editing_id = None
+
     def __init__(self, master=None):
         super().__init__(master)
         self.master = master
         self.title(self.set_window_title())
+        self.resolving = False
         self.geometry("450x180")
         self.resizable(False, False)
         self.build_layout()
@@ -409,6 +981,10 @@ class PCWindowBase(tk.Toplevel):
 
     def apply_changes(self):
         """템플릿 메서드 - 공통 저장 로직"""
+        # DDNS 조회 중에는 무시
+        if self.resolving:
+            return
+
         # 필드 검사
         if not self.check_required_fields():
             return
@@ -416,10 +992,14 @@ class PCWindowBase(tk.Toplevel):
         # 데이터 가져오기
         pc = self.get_entry_data()
 
-        # ddns 처리
-        if not self.process_ddns_to_ip(pc):
+        # ddns 처리 (조회는 백그라운드에서 진행하고 끝나면 저장을 이어간다)
+        if pc["ddns"] != "":
+            self.process_ddns_to_ip(pc)
             return
 
+        self.commit_changes(pc)
+
+    def commit_changes(self, pc: dict):
         # 유효성 검사
         is_valid, key = self.master.validate_pc(pc)
         if not is_valid:
@@ -429,6 +1009,15 @@ class PCWindowBase(tk.Toplevel):
             self.entries[field_index].focus()
             return
 
+        # 중복 검사 (name, MAC)
+        conflict_key = self.master.inventory.find_conflict(pc, ignore_id=self.editing_id)
+        if conflict_key:
+            messagebox.showerror("Input Error", f"{self.master.field_labels[conflict_key]} already exists")
+            # 포커스 이동
+            field_index = self.master.json_keys.index(conflict_key)
+            self.entries[field_index].focus()
+            return
+
         # pc_list 변경 (자식 클래스에서 구현)
         self.update_pc_list(pc)
         
@@ -438,11 +1027,9 @@ class PCWindowBase(tk.Toplevel):
 
         self.destroy()
 
-    def process_ddns_to_ip(self, pc: dict) -> bool:
+    def process_ddns_to_ip(self, pc: dict):
         ddns = pc["ddns"]
-        if ddns == "":
-            return True
-        
+
         # ddns 유효성 검사
         is_ddns_valid = self.master.validate_ddns_address(ddns)
         if not is_ddns_valid:
@@ -450,20 +1037,33 @@ class PCWindowBase(tk.Toplevel):
             # 포커스 이동
             field_index = self.master.json_keys.index("ddns")
             self.entries[field_index].focus()
-            return False
+            return
         
-        # ddns에서 ip 추출
-        ip = get_ip_address(ddns)
+        # ddns에서 ip 추출 (캐시 사용, 백그라운드 조회)
+        self.resolving = True
+        self.button_OK.config(state=tk.DISABLED)
+        self.master.worker.submit(
+            self.master.dns_cache.resolve, ddns,
+            callback=lambda ip, error: self.on_ddns_resolved(pc, ip)
+        )
+
+    def on_ddns_resolved(self, pc: dict, ip: str | None):
+        # 조회 중에 창이 닫혔으면 아무것도 하지 않음
+        if not self.winfo_exists():
+            return
+        self.resolving = False
+        self.button_OK.config(state=tk.NORMAL)
+
         if not ip:
             messagebox.showerror("DDNS Error", "Failed to resolve IP address")
             # 포커스 이동
             field_index = self.master.json_keys.index("ddns")
             self.entries[field_index].focus()
-            return False
+            return
         
         # ip 저장
         pc["ip"] = ip
-        return True
+        self.commit_changes(pc)
 
     @abstractmethod
     def update_pc_list(self, pc: dict):
@@ -528,8 +1128,8 @@ class PCWindowBase(tk.Toplevel):
         for i, key in enumerate(self.master.json_keys):
             entry = self.entries[i]
 
-            # 비활성화된 엔트리는 검사 건너뛰기
-            if entry['state'] == 'disabled':
+            # 비활성화된 엔트리와 선택 항목은 검사 건너뛰기
+            if entry['state'] == 'disabled' or key in OPTIONAL_KEYS:
                 continue
 
             if not entry.get():
@@ -547,6 +1147,11 @@ class PCWindowBase(tk.Toplevel):
             # port는 정수로 변환
             if key == "port":
                 value = int(value)
+            elif key == "groups":
+                # 쉼표로 구분한 그룹 이름
+                value = list(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+            elif key in OPTIONAL_KEYS:
+                value = value.strip()
             data[key] = value
         return data
 
@@ -595,15 +1200,39 @@ class NewPCWindow(PCWindowBase):
         # port 기본값 9로 설정
         port_index = self.master.json_keys.index("port")
         self.entries[port_index].insert(0, "9")
+        # 입력한 IP에 ARP로 물어서 MAC 주소 채우기 (같은 서브넷의 켜진 PC만)
+        self.mac_entry = self.entries[self.master.json_keys.index("mac")]
+        self.button_find_mac = tk.Button(self, text="Find MAC", width=8, command=self.find_mac)
+        self.button_find_mac.place(x=30, y=self.button_OK.place_info()["y"])
+
+    def find_mac(self):
+        ip = self.ip_entry.get().strip()
+        if not self.master.validate_ip_address(ip):
+            messagebox.showerror("Find MAC", "Enter the IP address of a PC on the local network first.", parent=self)
+            return
+        self.button_find_mac.config(state=tk.DISABLED, text="Finding...")
+        self.master.worker.submit(find_mac, ip, callback=lambda mac, error: self._on_mac_found(ip, mac, error))
+
+    def _on_mac_found(self, ip: str, mac: str | None, error):
+        if not self.winfo_exists():
+            return
+        self.button_find_mac.config(state=tk.NORMAL, text="Find MAC")
+        if error is not None or mac is None:
+            message = str(error) if isinstance(error, ValueError) else f"{ip} did not reply. Is the PC turned on?"
+            messagebox.showerror("Find MAC", message, parent=self)
+            return
+        self.mac_entry.delete(0, tk.END)
+        self.mac_entry.insert(0, mac)
 
     def update_pc_list(self, pc):
         # pc_list에 추가
-        self.master.pc_list.append(pc)
+        self.master.inventory.add(pc)
 
 
 class EditPCWindow(PCWindowBase):
     def __init__(self, master=None):
-        self.selected_pc = master.tree.selection()
+        self.editing_id = master.get_selected_ids()[0]
+        self.selected_pc = master.inventory.get(self.editing_id)
         super().__init__(master)
 
     def set_window_title(self):
@@ -611,9 +1240,13 @@ class EditPCWindow(PCWindowBase):
 
     def add_layout(self):
         # 엔트리에 현재 pc 정보 입력
-        pc_index = self.master.tree.index(self.selected_pc[0])
         for i in range(len(self.entries)):
-            self.entries[i].insert(0, f"{self.master.pc_list[pc_index][self.master.json_keys[i]]}")
+            key = self.master.json_keys[i]
+            if key == "groups":
+                value = ", ".join(pc_groups(self.selected_pc))
+            else:
+                value = self.selected_pc.get(key, '')
+            self.entries[i].insert(0, f"{value}")
         
         self.set_initial_state()
 
@@ -629,9 +1262,14 @@ class EditPCWindow(PCWindowBase):
             self.ddns_entry.config(state='disabled')
 
     def update_pc_list(self, pc):
-        # pc_list 수정
-        pc_index = self.master.tree.index(self.selected_pc[0])
-        self.master.pc_list[pc_index] = pc
+        # pc_list 수정 (pc id가 유지되므로 테이블의 해당 행만 갱신된다)
+        self.master.pc_status.pop(self.editing_id, None)
+        # 입력 칸이 없는 값(send_policy 등)은 유지
+        if self.editing_id not in self.master.inventory:
+            # 편집하는 동안 다른 프로그램이 삭제했으면 편집한 내용으로 다시 추가
+            self.master.inventory.add({**self.selected_pc, **pc})
+            return
+        self.master.inventory.update(self.editing_id, {**self.selected_pc, **pc})
 
     def on_ddns_change(self, event=None):
         super().on_ddns_change(event)
@@ -640,5 +1278,266 @@ class EditPCWindow(PCWindowBase):
             self.ip_entry.delete(0, tk.END)
 
 
-app = WOLApp()
-app.mainloop()
\ No newline at end of file
+class WakeGroupWindow(tk.Toplevel):
+    """깨울 그룹을 고르는 창 (선택한 그룹의 선행 그룹도 함께 깨운다)"""
+
+    def __init__(self, master, graph: GroupGraph, groups: list[str]):
+        super().__init__(master)
+        self.master = master
+        self.graph = graph
+        self.groups = groups
+        self.title("Wake Groups")
+        self.resizable(False, False)
+        self.build_layout()
+
+        self.bind('<Return>', lambda event: self.apply())
+        self.bind('<Escape>', lambda event: self.destroy())
+
+        # 창을 모달로 설정
+        self.transient(master)
+        self.grab_set()
+
+    def build_layout(self):
+        tk.Label(self, text="Select groups to wake. Groups they depend on are woken first.").pack(
+            anchor=tk.W, padx=10, pady=(10, 5)
+        )
+        self.listbox = tk.Listbox(self, selectmode=tk.EXTENDED, width=60, height=min(max(len(self.groups), 3), 15))
+        self.listbox.pack(fill=tk.BOTH, expand=True, padx=10)
+        members = group_members(self.master.inventory.items(), self.groups)
+        for group in self.groups:
+            prerequisites = self.graph.prerequisites(group)
+            description = f"{group}  ({len(members[group])} PCs"
+            if prerequisites:
+                description += f", after {', '.join(prerequisites)}"
+            self.listbox.insert(tk.END, description + ")")
+        self.listbox.selection_set(0)
+        self.listbox.focus_set()
+        self.listbox.bind('<Double-Button-1>', lambda event: self.apply())
+
+        button_frame = tk.Frame(self)
+        button_frame.pack(fill=tk.X, padx=10, pady=10)
+        tk.Button(button_frame, text="Cancel", width=8, command=self.destroy).pack(side=tk.RIGHT)
+        tk.Button(button_frame, text="Wake", width=8, command=self.apply).pack(side=tk.RIGHT, padx=5)
+
+    def apply(self):
+        selected = [self.groups[index] for index in self.listbox.curselection()]
+        if not selected:
+            return
+        # 확인 다이얼로그가 이 창에 가려지지 않도록 먼저 닫는다
+        self.destroy()
+        self.master.wake_groups(self.graph, selected)
+
+
+class DiscoverWindow(tk.Toplevel):
+    """
+    서브넷 탐색 창
+    - 찾는 대로 표시하고, 끝나면 역방향 DNS 이름과 PC 목록 비교 결과로 바꾼다
+    - 선택한 장비 중 새 MAC은 추가하고 이미 있는 MAC은 IP를 갱신한다
+    """
+
+    columns = ["ip", "mac", "name", "status", "pc"]
+    labels = {"ip": "IP", "mac": "MAC Address", "name": "DNS Name", "status": "Status", "pc": "PC Name"}
+    widths = {"ip": 110, "mac": 140, "name": 150, "status": 70, "pc": 150}
+
+    def __init__(self, master):
+        super().__init__(master)
+        self.master = master
+        self.title("Discover")
+        self.geometry("680x450")
+        self.scanner = None
+        self.hosts = {}  # 행 id(IP) -> DiscoveredHost
+        self.build_layout()
+        self.bind('<Escape>', lambda event: self.destroy())
+
+    def build_layout(self):
+        scan_frame = tk.Frame(self)
+        scan_frame.pack(fill=tk.X, padx=10, pady=(10, 5))
+        tk.Label(scan_frame, text="Subnet (CIDR):").pack(side=tk.LEFT)
+        self.cidr_entry = tk.Entry(scan_frame, width=20)
+        # 처음에는 첫 번째 인터페이스의 서브넷
+        networks = [interface.network for interface in list_interfaces()
+                    if not interface.loopback and interface.network is not None]
+        if networks:
+            self.cidr_entry.insert(0, str(networks[0]))
+        self.cidr_entry.pack(side=tk.LEFT, padx=5)
+        self.cidr_entry.bind('<Return>', lambda event: self.scan())
+        self.reverse_dns = tk.BooleanVar(value=True)
+        tk.Checkbutton(scan_frame, text="Reverse DNS names", variable=self.reverse_dns).pack(side=tk.LEFT, padx=5)
+        self.button_scan = tk.Button(scan_frame, text="Scan", width=8, command=self.scan)
+        self.button_scan.pack(side=tk.RIGHT)
+
+        table_frame = tk.Frame(self)
+        table_frame.pack(fill=tk.BOTH, expand=True, padx=10)
+        self.tree = ttk.Treeview(table_frame, columns=self.columns, show="headings", selectmode="extended")
+        for column in self.columns:
+            self.tree.heading(column, text=self.labels[column])
+            self.tree.column(column, width=self.widths[column], anchor=tk.W)
+        scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        button_frame = tk.Frame(self)
+        button_frame.pack(fill=tk.X, padx=10, pady=10)
+        self.count_label = tk.Label(button_frame)
+        self.count_label.pack(side=tk.LEFT)
+        tk.Button(button_frame, text="Close", width=8, command=self.destroy).pack(side=tk.RIGHT)
+        tk.Button(button_frame, text="Add Selected", width=12, command=self.add_selected).pack(side=tk.RIGHT, padx=5)
+
+    def scan(self):
+        # 탐색 중이면 멈춘다 (지금까지 찾은 장비로 끝난다)
+        if self.scanner is not None:
+            self.scanner.stop()
+            return
+        try:
+            self.scanner = SubnetScanner(self.cidr_entry.get().strip(), resolve_names=self.reverse_dns.get())
+        except ValueError as e:
+            messagebox.showerror("Discover", str(e), parent=self)
+            return
+        self.tree.delete(*self.tree.get_children())
+        self.hosts = {}
+        self.button_scan.config(text="Stop")
+        self.count_label.config(text=f"Scanning {self.scanner.address_count:,} addresses...")
+        worker = self.master.worker
+        worker.submit(
+            self.scanner.run, on_found=lambda host: worker.call_soon(self._on_found, host),
+            callback=self._on_scan_done
+        )
+
+    def _on_found(self, host):
+        if self.winfo_exists():
+            self.show(host)
+
+    def _on_scan_done(self, result, error):
+        self.scanner = None
+        if not self.winfo_exists():
+            return
+        self.button_scan.config(text="Scan")
+        if error is not None:
+            self.count_label.config(text=f"Failed: {error}")
+            return
+        for index, host in enumerate(result.hosts):
+            self.show(host)
+            self.tree.move(host.ip, "", index)
+        self.count_label.config(text=f"{len(result.hosts)} devices in {result.elapsed:.1f}s ({result.mode})")
+
+    def show(self, host):
+        """행 추가 또는 갱신 (찾은 순서로 추가하고, 탐색이 끝나면 IP 순서로 맞춘다)"""
+        status, pc_id = inventory_status(self.master.inventory, host)
+        pc_name = "" if pc_id is None else self.master.inventory.get(pc_id).get("name", "")
+        values = (host.ip, host.mac, host.name, status, pc_name)
+        if host.ip in self.hosts:
+            self.tree.item(host.ip, values=values)
+        else:
+            self.tree.insert("", tk.END, iid=host.ip, values=values)
+        self.hosts[host.ip] = host
+
+    def add_selected(self):
+        hosts = [self.hosts[item] for item in self.tree.selection()]
+        if not hosts:
+            return
+        rows = [(index, host.to_row()) for index, host in enumerate(hosts, 1)]
+        result = import_rows(self.master.inventory, rows, update_existing=True)
+        self.master.save_pc_list()
+        self.master.refresh_pc_table()
+        for host in hosts:
+            self.show(host)
+        self.count_label.config(text=f"{result.added} added, {result.updated} updated, {result.rejected} rejected")
+        if result.rejected_rows:
+            messagebox.showerror("Discover", "\n".join(
+                f"{row['ip']} {row['mac']}: {reason}" for _, reason, row in result.rejected_rows[:20]
+            ), parent=self)
+
+    def destroy(self):
+        if self.scanner is not None:
+            self.scanner.stop()
+        super().destroy()
+
+
+class HistoryWindow(tk.Toplevel):
+    """
+    전송 기록 창 (최신순)
+    - 먼저 메모리의 최근 기록을 표시하고, 파일의 기록은 백그라운드에서 조회해서 바꾼다
+    """
+
+    columns = ["time", "name", "ip", "result", "latency", "source", "user", "error"]
+    labels = {"time": "Time", "name": "Name", "ip": "IP", "result": "Result", "latency": "Latency",
+              "source": "Source", "user": "User", "error": "Error"}
+    widths = {"time": 140, "name": 120, "ip": 110, "result": 90, "latency": 70, "source": 60, "user": 80,
+              "error": 200}
+
+    def __init__(self, master, host: str = ""):
+        super().__init__(master)
+        self.master = master
+        self.title("Wake History")
+        self.geometry("800x400")
+        self.query_id = 0  # 늦게 끝난 이전 조회 결과는 버린다
+        self.build_layout(host)
+        self.bind('<Escape>', lambda event: self.destroy())
+        self.refresh()
+
+    def build_layout(self, host: str):
+        filter_frame = tk.Frame(self)
+        filter_frame.pack(fill=tk.X, padx=10, pady=(10, 5))
+        tk.Label(filter_frame, text="PC (name or MAC):").pack(side=tk.LEFT)
+        self.host_entry = tk.Entry(filter_frame, width=24)
+        self.host_entry.insert(0, host)
+        self.host_entry.pack(side=tk.LEFT, padx=5)
+        self.host_entry.bind('<Return>', lambda event: self.refresh())
+        self.failed_only = tk.BooleanVar(value=False)
+        tk.Checkbutton(filter_frame, text="Failures only", variable=self.failed_only, command=self.refresh).pack(
+            side=tk.LEFT, padx=5
+        )
+        tk.Button(filter_frame, text="Refresh", width=8, command=self.refresh).pack(side=tk.RIGHT)
+        self.count_label = tk.Label(filter_frame)
+        self.count_label.pack(side=tk.RIGHT, padx=5)
+
+        table_frame = tk.Frame(self)
+        table_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        self.tree = ttk.Treeview(table_frame, columns=self.columns, show="headings")
+        for column in self.columns:
+            self.tree.heading(column, text=self.labels[column])
+            self.tree.column(column, width=self.widths[column], anchor=tk.W)
+        scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+    def refresh(self):
+        host = self.host_entry.get().strip()
+        failed = self.failed_only.get()
+        history = self.master.history
+        # 조건이 없으면 메모리의 최근 기록부터 바로 표시
+        if not host and not failed:
+            self.show(history.recent(HISTORY_ROWS))
+        self.query_id += 1
+        query_id = self.query_id
+        self.master.worker.submit(
+            history.query, host=host or None, failed=failed, limit=HISTORY_ROWS,
+            callback=lambda records, error: self._on_query_done(query_id, records, error)
+        )
+
+    def _on_query_done(self, query_id: int, records, error):
+        if query_id != self.query_id or not self.winfo_exists():
+            return
+        if error is not None:
+            self.count_label.config(text=f"Failed: {error}")
+            return
+        self.show(records)
+
+    def show(self, records):
+        self.tree.delete(*self.tree.get_children())
+        for record in records:
+            self.tree.insert("", tk.END, values=(
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.time)),
+                record.name, record.ip, record.result,
+                "" if record.latency is None else f"{record.latency:.2f}s",
+                record.source, record.user, record.error or ""
+            ))
+        self.count_label.config(text=f"{len(records)} records")
+
+
+if __name__ == "__main__":
+    # python WOL.py [PC 목록 파일]
+    app = WOLApp(*sys.argv[1:2])
+    app.mainloop()
@@ -0,0 +1,508 @@
+"""
+여러 서브넷의 PC를 깨우기 위한 에이전트와 코디네이터
+
+라우터는 대부분 directed broadcast를 막으므로 한 곳에서 보낸 매직 패킷은 다른 VLAN의 잠든 PC에 닿지 않는다.
+서브넷마다 에이전트(wol agent)를 띄우면 에이전트가 코디네이터(wol serve --agent-port)에 연결을 유지하고,
+코디네이터는 PC 목록의 IP로 에이전트를 골라서 전송을 맡긴다.
+
+- 프로토콜: TCP 위의 JSON 한 줄 메시지. 에이전트가 연결하므로 에이전트 쪽에는 열어 둘 포트가 없다
+    에이전트 -> {"type": "hello", "name", "subnets": [CIDR], "priority", "token"}
+    코디네이터 -> {"type": "welcome", "heartbeat": 초} 또는 {"type": "error", "error"} 후 종료
+    코디네이터 -> {"type": "wake", "id", "policies": [정책], "targets": [[ip, mac, port, 정책 번호], ...]}
+    에이전트 -> {"type": "result", "id", "errors": [null 또는 오류, ...]} (대상마다 첫 전송 후)
+    양쪽 -> {"type": "heartbeat"} heartbeat초마다. HEARTBEAT_MISSES번의 간격 동안 아무 메시지도 없으면 연결을 끊는다
+- 같은 이벤트 루프 반복 안에 들어온 전송 요청은 에이전트마다 메시지 하나로 묶는다
+- 대상 IP를 포함하는 서브넷의 연결된 에이전트 중 prefix가 가장 길고 priority가 가장 낮은 에이전트를 쓴다.
+  에이전트가 끊기거나 응답이 없거나 (메시지마다 RESULT_TIMEOUT초) 전송에 실패하면,
+  결과를 받지 못한 대상은 같은 서브넷의 다음 에이전트로 다시 보낸다
+  (매직 패킷은 여러 번 받아도 같으므로 중복 전송은 문제가 되지 않는다)
+"""
+from typing import Any, Callable, Iterable
+import asyncio
+import hmac
+import ipaddress
+import itertools
+import json
+import time
+
+from packet_sender import DEFAULT_POLICY, SendPolicy, Target
+from scheduler import WakeScheduler
+
+DEFAULT_AGENT_PORT = 8010
+# 하트비트 간격(초)과 연결을 끊기 전까지 기다리는 간격 수
+HEARTBEAT_INTERVAL = 5.0
+HEARTBEAT_MISSES = 3
+# wake 메시지의 결과를 기다리는 시간(초). 지나면 하트비트가 오더라도 다음 에이전트로 다시 보낸다
+RESULT_TIMEOUT = 10.0
+# 에이전트가 다시 연결하기 전에 기다리는 시간(초). 실패할 때마다 두 배, 최대 MAX_RECONNECT_DELAY
+RECONNECT_DELAY = 1.0
+MAX_RECONNECT_DELAY = 30.0
+# 메시지 한 줄의 최대 크기 (bytes)
+MAX_MESSAGE = 16 << 20
+
+
+class AgentError(Exception):
+    """코디네이터가 에이전트를 거부한 경우 (잘못된 토큰, 서브넷 등)"""
+
+
+def encode_message(message: dict) -> bytes:
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+async def read_message(reader: asyncio.StreamReader) -> dict | None:
+    """메시지 한 줄. 연결이 닫혔으면 None, 형식이 잘못되었으면 ValueError"""
+    line = await reader.readline()
+    if not line:
+        return None
+    message = json.loads(line)
+    if not isinstance(message, dict):
+        raise ValueError("Message must be a JSON object")
+    return message
+
+def policy_to_dict(policy: SendPolicy) -> dict[str, Any]:
+    return {key: list(value) if isinstance(value, tuple) else value
+            for key, value in ((key, getattr(policy, key)) for key in SendPolicy.KEYS)}
+
+def parse_subnets(subnets: Iterable[str]) -> list[ipaddress.IPv4Network | ipaddress.IPv6Network]:
+    """CIDR 목록 (호스트 비트가 있어도 된다). 잘못되었으면 ValueError"""
+    networks = [ipaddress.ip_network(str(subnet), strict=False) for subnet in subnets]
+    if not networks:
+        raise ValueError("At least one subnet is required")
+    return networks
+
+
+class _Pending:
+    """코디네이터가 에이전트의 결과를 기다리는 대상 하나"""
+
+    __slots__ = ("target", "policy", "future", "tried")
+
+    def __init__(self, target: Target, policy: SendPolicy, future: asyncio.Future):
+        self.target = target
+        self.policy = policy
+        self.future = future
+        self.tried: set[str] = set()  # 보낸 에이전트 이름 (같은 에이전트로 다시 보내지 않음)
+
+
+class AgentConnection:
+    """코디네이터에 연결된 에이전트 하나의 상태"""
+
+    def __init__(self, name: str, subnets: list, priority: int, address: str, writer: asyncio.StreamWriter):
+        self.name = name
+        self.subnets = subnets
+        self.priority = priority
+        self.address = address
+        self.writer = writer
+        self.connected = time.time()
+        self.last_seen = time.monotonic()
+        self.alive = True
+        self.outbox: list[_Pending] = []  # 다음 메시지로 보낼 대상
+        self.batches: dict[int, list[_Pending]] = {}  # 결과를 기다리는 메시지 id -> 대상
+        self.timers: dict[int, asyncio.TimerHandle] = {}  # 메시지 id -> 결과 제한 시간
+        self.sent = 0
+        self.failed = 0
+
+    def prefix_for(self, address) -> int:
+        """address를 포함하는 서브넷 중 가장 긴 prefix (없으면 -1)"""
+        return max((network.prefixlen for network in self.subnets if address in network), default=-1)
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "address": self.address,
+            "subnets": [str(network) for network in self.subnets],
+            "priority": self.priority,
+            "connected": self.connected,
+            "last_seen": round(time.monotonic() - self.last_seen, 3),
+            "in_flight": sum(len(entries) for entries in self.batches.values()) + len(self.outbox),
+            "sent": self.sent,
+            "failed": self.failed,
+        }
+
+
+class Coordinator:
+    """
+    에이전트 연결을 받고 대상 IP에 맞는 에이전트로 전송을 보낸다 (이벤트 루프 안에서만 사용)
+    - token이 있으면 hello의 token이 같은 에이전트만 받는다
+    - 같은 이름의 에이전트가 다시 연결하면 이전 연결을 끊고 새 연결을 쓴다
+    - result_timeout초 안에 결과가 없는 메시지의 대상은 다음 에이전트로 다시 보낸다 (늦게 온 결과는 무시)
+    """
+
+    def __init__(self, token: str | None = None, heartbeat: float = HEARTBEAT_INTERVAL,
+                 result_timeout: float = RESULT_TIMEOUT):
+        self.token = token
+        self.heartbeat = heartbeat
+        self.result_timeout = result_timeout
+        self.agents: dict[str, AgentConnection] = {}
+        self._batch_ids = itertools.count(1)
+
+    def route(self, ip: str, exclude: Iterable[str] = ()) -> AgentConnection | None:
+        """ip를 맡을 연결된 에이전트 (prefix가 긴 것, priority가 낮은 것, 먼저 연결된 것 순서)"""
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return None
+        best = None
+        best_key = None
+        for agent in self.agents.values():
+            if agent.name in exclude:
+                continue
+            prefix = agent.prefix_for(address)
+            if prefix < 0:
+                continue
+            key = (-prefix, agent.priority, agent.connected)
+            if best_key is None or key < best_key:
+                best, best_key = agent, key
+        return best
+
+    async def wake(self, targets: list[Target], policies: list[SendPolicy]) -> list[tuple[str | None, str | None]]:
+        """
+        대상마다 (보낸 에이전트 이름, 오류 또는 None) 반환
+        - 맡을 에이전트가 없으면 (None, 오류)
+        """
+        loop = asyncio.get_running_loop()
+        futures = []
+        for target, policy in zip(targets, policies):
+            entry = _Pending(target, policy, loop.create_future())
+            if not self._dispatch(entry):
+                entry.future.set_result((None, f"No agent for {target[0]}"))
+            futures.append(entry.future)
+        return list(await asyncio.gather(*futures))
+
+    def status(self) -> list[dict[str, Any]]:
+        return [agent.status() for agent in self.agents.values()]
+
+    async def start(self, host: str, port: int) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle_connection, host, port, limit=MAX_MESSAGE)
+
+    # 전송
+
+    def _dispatch(self, entry: _Pending) -> bool:
+        """아직 보내지 않은 에이전트 중 하나의 outbox에 넣는다 (맡을 에이전트가 없으면 False)"""
+        agent = self.route(entry.target[0], entry.tried)
+        if agent is None:
+            return False
+        entry.tried.add(agent.name)
+        agent.outbox.append(entry)
+        if len(agent.outbox) == 1:
+            # 이번 루프 반복에 들어오는 대상을 모아서 한 메시지로 보낸다
+            asyncio.get_running_loop().call_soon(self._flush, agent)
+        return True
+
+    def _flush(self, agent: AgentConnection):
+        entries, agent.outbox = agent.outbox, []
+        if not entries or not agent.alive:
+            return
+        policies: dict[str, int] = {}  # 정책 JSON -> 번호 (같은 정책은 한 번만 보낸다)
+        rows = []
+        for entry in entries:
+            key = json.dumps(policy_to_dict(entry.policy), sort_keys=True)
+            index = policies.setdefault(key, len(policies))
+            ip, mac, port = entry.target
+            rows.append([ip, mac, port, index])
+        batch_id = next(self._batch_ids)
+        agent.batches[batch_id] = entries
+        agent.timers[batch_id] = asyncio.get_running_loop().call_later(
+            self.result_timeout, self._expire, agent, batch_id)
+        agent.writer.write(encode_message({
+            "type": "wake", "id": batch_id, "policies": [json.loads(key) for key in policies], "targets": rows
+        }))
+
+    def _on_result(self, agent: AgentConnection, message: dict):
+        entries = agent.batches.pop(message.get("id"), None)
+        if entries is None:
+            return
+        agent.timers.pop(message.get("id")).cancel()
+        errors = message.get("errors")
+        if not isinstance(errors, list) or len(errors) != len(entries):
+            errors = ["Malformed result from agent"] * len(entries)
+        for entry, error in zip(entries, errors):
+            if error is None:
+                agent.sent += 1
+            else:
+                agent.failed += 1
+            if entry.future.done():
+                continue
+            # 전송에 실패했으면 같은 서브넷의 다른 에이전트로
+            if error is not None and self._dispatch(entry):
+                continue
+            entry.future.set_result((agent.name, None if error is None else str(error)))
+
+    def _expire(self, agent: AgentConnection, batch_id: int):
+        """결과가 오지 않은 메시지의 대상을 다른 에이전트로 다시 보낸다 (연결은 유지)"""
+        agent.timers.pop(batch_id, None)
+        entries = agent.batches.pop(batch_id, None)
+        if entries is None:
+            return
+        agent.failed += len(entries)
+        for entry in entries:
+            if not entry.future.done() and not self._dispatch(entry):
+                entry.future.set_result((agent.name, f"No result from agent {agent.name} "
+                                                     f"within {self.result_timeout:g}s"))
+
+    def _drop(self, agent: AgentConnection, reason: str):
+        """연결이 끊긴 에이전트를 빼고, 결과를 받지 못한 대상은 다른 에이전트로 다시 보낸다"""
+        if not agent.alive:
+            return
+        agent.alive = False
+        if self.agents.get(agent.name) is agent:
+            del self.agents[agent.name]
+        entries = agent.outbox + [entry for batch in agent.batches.values() for entry in batch]
+        agent.outbox = []
+        agent.batches.clear()
+        for timer in agent.timers.values():
+            timer.cancel()
+        agent.timers.clear()
+        for entry in entries:
+            if not entry.future.done() and not self._dispatch(entry):
+                entry.future.set_result((agent.name, f"Agent {agent.name} lost ({reason})"))
+
+    # 연결
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info("peername")
+        address = f"{peer[0]}:{peer[1]}" if isinstance(peer, tuple) else ""
+        timeout = self.heartbeat * HEARTBEAT_MISSES
+        try:
+            hello = await asyncio.wait_for(read_message(reader), timeout)
+            agent = self._accept(hello, address, writer)
+        except AgentError as e:
+            writer.write(encode_message({"type": "error", "error": str(e)}))
+            writer.close()
+            return
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError,
+                ValueError):
+            writer.close()
+            return
+
+        writer.write(encode_message({"type": "welcome", "heartbeat": self.heartbeat}))
+        heartbeats = asyncio.create_task(self._send_heartbeats(agent))
+        reason = "connection closed"
+        try:
+            while True:
+                message = await asyncio.wait_for(read_message(reader), timeout)
+                if message is None:
+                    break
+                agent.last_seen = time.monotonic()
+                if message.get("type") == "result":
+                    self._on_result(agent, message)
+        except asyncio.TimeoutError:
+            reason = f"no heartbeat for {timeout:.0f}s"
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError) as e:
+            reason = str(e) or type(e).__name__
+        finally:
+            heartbeats.cancel()
+            self._drop(agent, reason)
+            writer.close()
+
+    def _accept(self, hello: dict | None, address: str, writer: asyncio.StreamWriter) -> AgentConnection:
+        if hello is None or hello.get("type") != "hello":
+            raise AgentError("Expected hello")
+        if self.token is not None and not hmac.compare_digest(str(hello.get("token") or ""), self.token):
+            raise AgentError("Missing or invalid token")
+        name = hello.get("name")
+        if not isinstance(name, str) or not name:
+            raise AgentError("Agent name is required")
+        try:
+            subnets = parse_subnets(hello.get("subnets") or [])
+            priority = int(hello.get("priority", 0))
+        except (TypeError, ValueError) as e:
+            raise AgentError(f"Invalid hello: {e}")
+        previous = self.agents.get(name)
+        if previous is not None:
+            self._drop(previous, "replaced by a new connection")
+            previous.writer.close()
+        agent = AgentConnection(name, subnets, priority, address, writer)
+        self.agents[name] = agent
+        return agent
+
+    async def _send_heartbeats(self, agent: AgentConnection):
+        try:
+            while agent.alive:
+                await asyncio.sleep(self.heartbeat)
+                agent.writer.write(encode_message({"type": "heartbeat"}))
+                await agent.writer.drain()
+        except ConnectionError:
+            pass
+
+
+class Agent:
+    """
+    서브넷 하나 이상을 맡아서 코디네이터가 보낸 대상에 매직 패킷을 보낸다
+    - 연결이 끊기면 RECONNECT_DELAY부터 두 배씩 (최대 MAX_RECONNECT_DELAY) 기다렸다가 다시 연결
+    - policy: 이 에이전트의 인터페이스와 브로드캐스트 설정. 반복 횟수/간격/포트는 코디네이터가 보낸 PC별 정책을 쓴다
+    - 코디네이터가 거부하면 (잘못된 토큰 등) run()이 AgentError
+    """
+
+    def __init__(self, host: str, port: int, name: str, subnets: Iterable[str], priority: int = 0,
+                 token: str | None = None, policy: SendPolicy | None = None,
+                 scheduler: WakeScheduler | None = None, log: Callable[[str], None] | None = None):
+        self.host = host
+        self.port = port
+        self.name = name
+        self.subnets = parse_subnets(subnets)
+        self.priority = priority
+        self.token = token
+        # 같은 서브넷의 잠든 PC는 ARP 응답이 없으므로 기본으로 서브넷 브로드캐스트 주소로도 보낸다
+        self.policy = policy or SendPolicy(directed_broadcast=True)
+        self.scheduler = scheduler or WakeScheduler()
+        self.log = log or (lambda text: None)
+        self.connected = False
+        self.batches = 0
+        self.sent = 0
+        self.failed = 0
+        self._stop: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def stop(self):
+        """다른 스레드에서도 호출할 수 있다"""
+        if self._loop is not None and self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        delay = RECONNECT_DELAY
+        while not self._stop.is_set():
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port, limit=MAX_MESSAGE)
+            except OSError as e:
+                self.log(f"Cannot connect to {self.host}:{self.port}: {e}, retrying in {delay:.0f}s")
+            else:
+                try:
+                    reason = await self._until_stopped(self._session(reader, writer))
+                    delay = RECONNECT_DELAY
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError,
+                        ValueError) as e:
+                    reason = str(e) or type(e).__name__
+                finally:
+                    self.connected = False
+                    writer.close()
+                if self._stop.is_set():
+                    break
+                self.log(f"Disconnected from coordinator ({reason}), reconnecting in {delay:.0f}s")
+            try:
+                await asyncio.wait_for(self._stop.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    async def _until_stopped(self, session) -> str:
+        task = asyncio.ensure_future(session)
+        stopper = asyncio.ensure_future(self._stop.wait())
+        await asyncio.wait({task, stopper}, return_when=asyncio.FIRST_COMPLETED)
+        if not task.done():
+            task.cancel()
+            await asyncio.wait({task})
+            return "stopped"
+        stopper.cancel()
+        return task.result()
+
+    async def _session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> str:
+        writer.write(encode_message({
+            "type": "hello", "name": self.name, "subnets": [str(network) for network in self.subnets],
+            "priority": self.priority, "token": self.token
+        }))
+        await writer.drain()
+        welcome = await asyncio.wait_for(read_message(reader), HEARTBEAT_INTERVAL * HEARTBEAT_MISSES)
+        if welcome is None:
+            return "connection closed"
+        if welcome.get("type") == "error":
+            raise AgentError(welcome.get("error") or "Rejected by coordinator")
+        heartbeat = float(welcome.get("heartbeat", HEARTBEAT_INTERVAL))
+        self.connected = True
+        self.log(f"Connected to coordinator {self.host}:{self.port} for "
+                 f"{', '.join(str(network) for network in self.subnets)}")
+        heartbeats = asyncio.create_task(self._send_heartbeats(writer, heartbeat))
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(read_message(reader), heartbeat * HEARTBEAT_MISSES)
+                except asyncio.TimeoutError:
+                    return f"no heartbeat for {heartbeat * HEARTBEAT_MISSES:.0f}s"
+                if message is None:
+                    return "connection closed"
+                if message.get("type") == "wake":
+                    self._wake(message, writer)
+        finally:
+            heartbeats.cancel()
+
+    async def _send_heartbeats(self, writer: asyncio.StreamWriter, interval: float):
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                writer.write(encode_message({"type": "heartbeat"}))
+                await writer.drain()
+        except ConnectionError:
+            pass
+
+    def _policy_for(self, data: dict, ip: str) -> SendPolicy:
+        """코디네이터가 보낸 PC별 정책에 이 에이전트의 인터페이스와 서브넷 브로드캐스트 설정을 반영"""
+        received = DEFAULT_POLICY.override({key: data[key] for key in ("repeat", "interval", "ports", "subnet",
+                                                                       "transport") if key in data})
+        address = ipaddress.ip_address(ip)
+        prefix = max((network.prefixlen for network in self.subnets if address in network),
+                     default=self.policy.prefix_length)
+        return received.override({
+            "interface": self.policy.interface,
+            "directed_broadcast": self.policy.directed_broadcast or bool(data.get("directed_broadcast")),
+            "prefix_length": prefix,
+        })
+
+    def _wake(self, message: dict, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+        batch_id = message.get("id")
+        rows = message.get("targets") or []
+        errors: list[str | None] = [None] * len(rows)
+        targets = []
+        policies = []
+        positions = []  # 스케줄러 대상 번호 -> 메시지의 대상 번호
+        try:
+            received = message.get("policies") or [{}]
+            for index, (ip, mac, port, policy_index) in enumerate(rows):
+                try:
+                    policies.append(self._policy_for(received[policy_index], ip))
+                except (ValueError, IndexError, TypeError) as e:
+                    errors[index] = f"Invalid send policy: {e}"
+                    continue
+                targets.append((ip, mac, int(port)))
+                positions.append(index)
+        except (TypeError, ValueError) as e:
+            writer.write(encode_message({"type": "result", "id": batch_id,
+                                         "errors": [f"Malformed wake message: {e}"] * len(rows)}))
+            return
+        self.batches += 1
+        remaining = len(targets)
+
+        def reply():
+            self.sent += sum(1 for error in errors if error is None)
+            self.failed += sum(1 for error in errors if error is not None)
+            if not writer.is_closing():
+                writer.write(encode_message({"type": "result", "id": batch_id, "errors": errors}))
+
+        def done_one(index, error):
+            nonlocal remaining
+            errors[positions[index]] = None if error is None else str(error)
+            remaining -= 1
+            if remaining == 0:
+                reply()
+
+        if not targets:
+            reply()
+            return
+        try:
+            self.scheduler.submit(
+                targets, policies=policies,
+                # 스케줄러 스레드에서 호출되므로 이벤트 루프로 넘긴다
+                on_result=lambda index, target, error: loop.call_soon_threadsafe(done_one, index, error)
+            )
+        except OSError as e:
+            for position in positions:
+                errors[position] = str(e)
+            reply()
+
+
+def run_agent(agent: Agent):
+    """Ctrl+C나 stop()까지 실행 (코디네이터가 거부하면 AgentError)"""
+    try:
+        asyncio.run(agent.run())
+    finally:
+        agent.scheduler.close()
@@ -0,0 +1,128 @@
+"""
+에이전트 부하/장애 조치 테스트: 한 머신에서 코디네이터와 서브넷마다 에이전트 여러 개를 프로세스로 띄운다
+
+127.0.<n>.0/24를 서로 다른 서브넷으로 보고 서브넷마다 PC를 나눠 두고, 서브넷마다 priority가 다른 에이전트를
+agents-per-subnet개 띄운다. POST /wake를 계속 보내서 초당 요청 수, 지연 시간, 받은 패킷 수를 재고,
+첫 서브넷의 기본 에이전트를 멈추거나(stop: 하트비트로 감지) 죽인 뒤(kill: 연결 끊김으로 감지)
+그 서브넷의 PC가 예비 에이전트로 깨워지기까지의 시간을 잰다.
+
+사용법: python benchmarks/bench_agents.py [--subnets N] [--agents-per-subnet K] [--hosts N] [--duration S]
+                                          [--batch K] [--failover stop|kill|none] [--heartbeat S]
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from bench_relay import load, percentile
+from common import ROOT, UDPSink, make_pc_list
+
+
+def start_coordinator(pc_file: str, heartbeat: float) -> tuple[subprocess.Popen, int, int]:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "wol_cli", "-f", pc_file, "serve", "--port", "0", "--agent-port", "0",
+         "--heartbeat", str(heartbeat)],
+        cwd=ROOT, stderr=subprocess.PIPE, text=True
+    )
+    # "Waiting for agents on 127.0.0.1:<port>"과 "Listening on http://127.0.0.1:<port>" 줄에서 실제 포트를 읽는다
+    agent_port = None
+    for line in process.stderr:
+        if line.startswith("Waiting for agents"):
+            agent_port = int(line.rsplit(":", 1)[1])
+        elif line.startswith("Listening on"):
+            return process, int(line.rsplit(":", 1)[1]), agent_port
+    raise RuntimeError("coordinator did not start")
+
+def start_agent(agent_port: int, subnet: str, name: str, priority: int) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "wol_cli", "agent", "--coordinator", f"127.0.0.1:{agent_port}", "--subnet", subnet,
+         "--name", name, "--priority", str(priority), "--no-broadcast"],
+        cwd=ROOT, stderr=subprocess.DEVNULL
+    )
+
+def request(port: int, path: str, body: dict | None = None) -> dict:
+    data = None if body is None else json.dumps(body).encode()
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", data=data, timeout=60) as response:
+        return json.load(response)
+
+def wait_for_agents(port: int, count: int, timeout: float = 10.0) -> list[dict]:
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        agents = request(port, "/agents")["agents"]
+        if len(agents) >= count:
+            return agents
+        time.sleep(0.1)
+    raise RuntimeError(f"only {len(agents)} of {count} agents connected")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subnets", type=int, default=4)
+    parser.add_argument("--agents-per-subnet", type=int, default=2)
+    parser.add_argument("--hosts", type=int, default=1000)
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--batch", type=int, default=10, help="PCs per request")
+    parser.add_argument("--failover", choices=("stop", "kill", "none"), default="stop")
+    parser.add_argument("--heartbeat", type=float, default=1.0, help="agent heartbeat interval in seconds")
+    args = parser.parse_args()
+
+    # 127.0.0.0/8은 모두 lo로 전달되므로 모든 주소에서 받는다
+    with UDPSink("0.0.0.0") as sink, tempfile.TemporaryDirectory() as tmp:
+        pc_list = make_pc_list(args.hosts, port=sink.port)
+        for i, pc in enumerate(pc_list):
+            pc["ip"] = f"127.0.{i % args.subnets + 1}.{i // args.subnets % 250 + 1}"
+        pc_file = os.path.join(tmp, "PCList.json")
+        with open(pc_file, "w", encoding="utf-8") as f:
+            json.dump({"pc_list": pc_list}, f)
+
+        coordinator, port, agent_port = start_coordinator(pc_file, args.heartbeat)
+        agents = {}
+        try:
+            for subnet in range(args.subnets):
+                for priority in range(args.agents_per_subnet):
+                    name = f"subnet{subnet + 1}-{priority}"
+                    agents[name] = start_agent(agent_port, f"127.0.{subnet + 1}.0/24", name, priority)
+            wait_for_agents(port, len(agents))
+
+            names = [pc["name"] for pc in pc_list]
+            latencies, errors = asyncio.run(load(port, names, args.connections, args.duration, args.batch))
+            received = sink.wait_for(len(latencies) * args.batch)
+            per_agent = {agent["name"]: agent["sent"] for agent in request(port, "/agents")["agents"]}
+
+            print(f"hosts: {args.hosts}, subnets: {args.subnets}, agents: {len(agents)}, "
+                  f"connections: {args.connections}, batch: {args.batch}, duration: {args.duration}s")
+            print(f"requests      : {len(latencies):,} ({errors} errors)")
+            print(f"requests/sec  : {len(latencies) / args.duration:,.0f}")
+            print(f"latency p50   : {percentile(latencies, 0.50) * 1000:.2f} ms")
+            print(f"latency p99   : {percentile(latencies, 0.99) * 1000:.2f} ms")
+            print(f"packets recv  : {received:,} / {len(latencies) * args.batch:,} sent")
+            print("sent by agent : " + ", ".join(f"{name} {sent:,}" for name, sent in sorted(per_agent.items())))
+
+            if args.failover != "none" and args.agents_per_subnet > 1:
+                primary = agents["subnet1-0"]
+                primary.send_signal(signal.SIGSTOP if args.failover == "stop" else signal.SIGKILL)
+                subnet_names = [pc["name"] for pc in pc_list if pc["ip"].startswith("127.0.1.")]
+                start = time.perf_counter()
+                response = request(port, "/wake", {"names": subnet_names})
+                seconds = time.perf_counter() - start
+                used = sorted({result.get("agent", "local") for result in response["results"]})
+                print(f"failover      : {args.failover} subnet1-0, {response['sent']}/{len(subnet_names)} sent "
+                      f"by {', '.join(used)} in {seconds * 1000:.0f} ms")
+        finally:
+            for process in agents.values():
+                if process.poll() is None:
+                    process.send_signal(signal.SIGCONT)
+                    process.terminate()
+                process.wait()
+            coordinator.terminate()
+            coordinator.wait()
+
+
+if __name__ == "__main__":
+    main()
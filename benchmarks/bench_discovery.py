@@ -0,0 +1,77 @@
+"""
+서브넷 탐색 속도 측정: network namespace와 veth 쌍으로 장비 N개가 응답하는 /16 서브넷을 만들고 훑는다
+
+namespace 쪽 veth에 주소 N개를 붙이면 커널이 주소마다 ARP에 응답한다 (MAC은 모두 같다).
+ip 명령과 root 권한(Linux)이 필요하고, 끝나면 namespace와 veth를 지운다.
+
+사용법: python benchmarks/bench_discovery.py [--prefix 16] [--hosts N] [--mode arp|udp] [--concurrency N]
+"""
+import argparse
+import ipaddress
+import subprocess
+
+import common  # noqa: F401 (저장소 루트를 sys.path에 추가)
+from discovery import SubnetScanner
+from interfaces import list_interfaces
+
+NAMESPACE = "wol-bench"
+LOCAL_LINK = "wolbench0"
+PEER_LINK = "wolbench1"
+
+
+def ip_command(*args: str, batch: str | None = None):
+    subprocess.run(["ip", *args], input=batch, text=True, check=True, capture_output=True)
+
+def create_subnet(network: ipaddress.IPv4Network, hosts: int) -> list[str]:
+    """namespace에 응답할 주소 hosts개를 만들고 그 목록 반환 (첫 주소는 이쪽 veth)"""
+    addresses = list(network.hosts())
+    local, step = addresses[0], max(1, (len(addresses) - 1) // hosts)
+    responders = [str(address) for address in addresses[1::step][:hosts]]
+    ip_command("netns", "add", NAMESPACE)
+    ip_command("link", "add", LOCAL_LINK, "type", "veth", "peer", "name", PEER_LINK)
+    ip_command("link", "set", PEER_LINK, "netns", NAMESPACE)
+    ip_command("addr", "add", f"{local}/{network.prefixlen}", "dev", LOCAL_LINK)
+    ip_command("link", "set", LOCAL_LINK, "up")
+    ip_command("-n", NAMESPACE, "link", "set", PEER_LINK, "up")
+    ip_command("-n", NAMESPACE, "-batch", "-", batch="".join(
+        f"addr add {address}/{network.prefixlen} dev {PEER_LINK}\n" for address in responders
+    ))
+    return responders
+
+def remove_subnet():
+    for args in (("link", "del", LOCAL_LINK), ("netns", "del", NAMESPACE)):
+        try:
+            ip_command(*args)
+        except subprocess.CalledProcessError:
+            pass
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--network", default="10.231.0.0", help="network address of the test subnet")
+    parser.add_argument("--prefix", type=int, default=16)
+    parser.add_argument("--hosts", type=int, default=500, help="addresses that reply")
+    parser.add_argument("--mode", choices=("arp", "udp"), default="arp")
+    parser.add_argument("--concurrency", type=int)
+    parser.add_argument("--timeout", type=float)
+    args = parser.parse_args()
+
+    network = ipaddress.IPv4Network(f"{args.network}/{args.prefix}")
+    remove_subnet()
+    try:
+        responders = create_subnet(network, args.hosts)
+        list_interfaces(refresh=True)
+        scanner = SubnetScanner(str(network), LOCAL_LINK, args.mode, args.concurrency, args.timeout)
+        result = scanner.run()
+    finally:
+        remove_subnet()
+
+    found = {host.ip for host in result.hosts}
+    print(f"subnet: {network} ({scanner.address_count:,} addresses), responders: {len(responders)}, mode: {result.mode}")
+    print(f"probes       : {result.probed:,}")
+    print(f"elapsed      : {result.elapsed:.2f}s")
+    print(f"probes/sec   : {result.probes_per_second:,.0f}")
+    print(f"found        : {len(found & set(responders))} / {len(responders)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+HTTP 릴레이 부하 테스트: 초당 요청 수와 지연 시간(p50, p99)
+
+로컬에 PC 목록을 만들고 `wol serve`를 별도 프로세스로 띄운 뒤, keep-alive 연결 여러 개로
+POST /wake를 계속 보낸다. 매직 패킷은 로컬 UDP 싱크로 보내서 실제로 받은 수도 센다.
+
+사용법: python benchmarks/bench_relay.py [--hosts N] [--connections C] [--duration S] [--batch K]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import ROOT, UDPSink, make_pc_list
+
+
+def start_server(pc_file: str) -> tuple[subprocess.Popen, int]:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "wol_cli", "-f", pc_file, "serve", "--port", "0"],
+        cwd=ROOT, stderr=subprocess.PIPE, text=True
+    )
+    # "Listening on http://127.0.0.1:<port>" 줄에서 실제 포트를 읽는다
+    for line in process.stderr:
+        if line.startswith("Listening on"):
+            return process, int(line.rsplit(":", 1)[1])
+    raise RuntimeError("relay did not start")
+
+async def client(port: int, names: list[str], batch: int, end: float, latencies: list[float], errors: list[int]):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while time.perf_counter() < end:
+            body = json.dumps({"names": random.sample(names, batch)}).encode()
+            request = (f"POST /wake HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                       f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+            start = time.perf_counter()
+            writer.write(request)
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = int(head.lower().split(b"content-length:")[1].split(b"\r\n")[0])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if not head.startswith(b"HTTP/1.1 200"):
+                errors[0] += 1
+    finally:
+        writer.close()
+
+async def load(port: int, names: list[str], connections: int, duration: float, batch: int):
+    latencies: list[float] = []
+    errors = [0]
+    end = time.perf_counter() + duration
+    await asyncio.gather(*(client(port, names, batch, end, latencies, errors) for _ in range(connections)))
+    return latencies, errors[0]
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hosts", type=int, default=1000)
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--batch", type=int, default=1, help="PCs per request")
+    args = parser.parse_args()
+
+    with UDPSink() as sink, tempfile.TemporaryDirectory() as tmp:
+        pc_list = make_pc_list(args.hosts, "127.0.0.1", sink.port)
+        pc_file = os.path.join(tmp, "PCList.json")
+        with open(pc_file, "w", encoding="utf-8") as f:
+            json.dump({"pc_list": pc_list}, f)
+
+        process, port = start_server(pc_file)
+        try:
+            names = [pc["name"] for pc in pc_list]
+            latencies, errors = asyncio.run(load(port, names, args.connections, args.duration, args.batch))
+        finally:
+            process.terminate()
+            process.wait()
+        received = sink.wait_for(len(latencies) * args.batch)
+
+    print(f"hosts: {args.hosts}, connections: {args.connections}, batch: {args.batch}, duration: {args.duration}s")
+    print(f"requests      : {len(latencies):,} ({errors} errors)")
+    print(f"requests/sec  : {len(latencies) / args.duration:,.0f}")
+    print(f"latency p50   : {percentile(latencies, 0.50) * 1000:.2f} ms")
+    print(f"latency p99   : {percentile(latencies, 0.99) * 1000:.2f} ms")
+    print(f"packets recv  : {received:,} / {len(latencies) * args.batch:,} sent")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+send_magic_packet(호출마다 소켓 생성)과 send_magic_packets(소켓 재사용)의 초당 전송량 비교
+
+사용법: python benchmarks/bench_send.py [패킷 수]
+"""
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from packet_sender import send_magic_packet, send_magic_packets
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    # 로컬 UDP 싱크 (수신하지 않아도 전송 비용은 동일하게 측정된다)
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sink:
+        sink.bind(("127.0.0.1", 0))
+        port = sink.getsockname()[1]
+        targets = [("127.0.0.1", f"00:11:22:33:{i >> 8 & 0xff:02X}:{i & 0xff:02X}", port) for i in range(count)]
+
+        start = time.perf_counter()
+        for ip, mac, target_port in targets:
+            send_magic_packet(ip, mac, target_port)
+        per_call = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = send_magic_packets(targets)
+        bulk = time.perf_counter() - start
+
+    errors = sum(1 for _, error in results if error is not None)
+    print(f"packets: {count}")
+    print(f"send_magic_packet  : {count / per_call:12,.0f} packets/sec")
+    print(f"send_magic_packets : {count / bulk:12,.0f} packets/sec ({errors} errors)")
+    print(f"speedup            : {per_call / bulk:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
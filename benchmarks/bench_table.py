@@ -0,0 +1,72 @@
+"""
+PC 테이블 갱신 시간 측정: 전체 다시 그리기 vs 변경된 행만 갱신
+
+사용법: python benchmarks/bench_table.py [PC 수]
+디스플레이가 없으면 (예: xvfb-run 없이 SSH에서 실행) 건너뛴다
+"""
+import json
+import os
+import sys
+import tempfile
+import tkinter as tk
+
+from common import make_pc_list, measure
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    try:
+        tk.Tk().destroy()
+    except tk.TclError as e:
+        print(f"skipped: no display ({e})")
+        return
+
+    from WOL import WOLApp
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        with open("PCList.json", "w", encoding="utf-8") as f:
+            json.dump({"pc_list": make_pc_list(count)}, f)
+
+        app = WOLApp()
+        app.page_size = count  # 페이지 나눔 없이 전체 행으로 측정
+        app.refresh_pc_table()
+        app.update()
+
+        pc_ids = app.inventory.ids()
+
+        def full_rebuild():
+            # 이전 방식: 모든 행을 지우고 다시 추가
+            app.tree.delete(*app.tree.get_children())
+            for pc_id in pc_ids:
+                app.tree.insert('', 'end', values=app.get_row_values(pc_id))
+            app.update_idletasks()
+
+        def edit_one():
+            pc_id = pc_ids[count // 2]
+            port = app.inventory.get(pc_id)["port"]
+            app.inventory.set_field(pc_id, "port", 7 if port == 9 else 9)
+            app.refresh_pc_table()
+            app.update_idletasks()
+
+        rebuild_time = measure(full_rebuild)
+        # full_rebuild로 만든 행을 정리하고 diff 갱신 상태로 되돌린다
+        app.tree.delete(*app.tree.get_children())
+        app.item_values.clear()
+        app.refresh_pc_table()
+        diff_time = measure(edit_one)
+
+        app.page_size = 1000
+        app.refresh_pc_table()
+        page_time = measure(edit_one)
+        app.destroy()
+
+    print(f"rows: {count}")
+    print(f"full rebuild        : {rebuild_time * 1000:8.1f} ms")
+    print(f"diff refresh (1 row): {diff_time * 1000:8.1f} ms")
+    print(f"paged refresh (1000): {page_time * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
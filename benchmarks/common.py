@@ -0,0 +1,110 @@
+"""
+벤치마크 공용 도구: 가상 PC 목록, 스텁 DNS 조회, 받은 패킷을 세는 UDP 싱크, 가상 디스플레이
+"""
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def make_pc_list(count: int, ip: str | None = None, port: int = 9) -> list[dict]:
+    """count개의 가상 PC. ip를 주면 모든 PC가 그 주소를 쓴다 (로컬 싱크로 보낼 때)"""
+    return [
+        {
+            "name": f"PC-{i:05d}",
+            "ip": ip or f"10.{i >> 16 & 0xff}.{i >> 8 & 0xff}.{i & 0xff}",
+            "ddns": "",
+            "mac": f"00:11:22:{i >> 16 & 0xff:02X}:{i >> 8 & 0xff:02X}:{i & 0xff:02X}",
+            "port": port
+        }
+        for i in range(count)
+    ]
+
+def measure(fn, repeat: int = 5) -> float:
+    """fn을 repeat번 실행해서 가장 빠른 시간(초)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def stub_resolver(latency: float = 0.0):
+    """네트워크 없이 latency초 뒤에 이름에서 만든 IP를 돌려주는 DNS 조회 함수"""
+    def resolve(ddns: str) -> str | None:
+        if latency:
+            time.sleep(latency)
+        value = hash(ddns) & 0xffffff
+        return f"10.{value >> 16}.{value >> 8 & 0xff}.{value & 0xff}"
+    return resolve
+
+
+class UDPSink:
+    """host(기본 127.0.0.1)의 빈 포트에서 받은 UDP 패킷 수를 세는 스레드"""
+
+    def __init__(self, host: str = "127.0.0.1"):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, 0))
+        # 한꺼번에 보내도 커널 버퍼에서 버려지지 않도록
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 16 << 20)
+        self.sock.settimeout(0.05)
+        self.port = self.sock.getsockname()[1]
+        self.received = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sock.recv(2048)
+                self.received += 1
+            except socket.timeout:
+                continue
+
+    def wait_for(self, count: int, timeout: float = 2.0) -> int:
+        """count개를 받거나 timeout초가 지날 때까지 기다리고 받은 수 반환"""
+        end = time.monotonic() + timeout
+        while self.received < count and time.monotonic() < end:
+            time.sleep(0.01)
+        return self.received
+
+    def reset(self):
+        """아직 도착 중인 이전 패킷을 기다린 뒤 수를 0으로"""
+        previous = -1
+        while previous != self.received:
+            previous = self.received
+            time.sleep(0.05)
+        self.received = 0
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def start_virtual_display() -> subprocess.Popen | None:
+    """DISPLAY가 없고 Xvfb가 있으면 가상 디스플레이를 띄운다 (없으면 None)"""
+    if os.environ.get("DISPLAY") or not shutil.which("Xvfb"):
+        return None
+    display = ":97"
+    process = subprocess.Popen(["Xvfb", display, "-screen", "0", "1280x1024x24"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(0.5)
+    if process.poll() is not None:
+        return None
+    os.environ["DISPLAY"] = display
+    return process
@@ -0,0 +1,418 @@
+"""
+전송, DNS 조회, 저장/불러오기, 테이블 갱신 경로의 벤치마크 모음
+
+가상 PC 목록(100 ~ 100k개), 스텁 DNS 조회, 받은 패킷을 세는 로컬 UDP 싱크를 사용하므로
+네트워크 상태와 상관없이 같은 결과가 나온다. 결과는 JSON으로 저장해서 커밋끼리 비교할 수 있다.
+Tk 벤치마크는 디스플레이가 없으면 Xvfb를 띄우고, Xvfb도 없으면 건너뛴다.
+
+사용법:
+    python benchmarks/suite.py [--sizes 100,1000,10000,100000] [--only send,storage] [--output result.json]
+    python benchmarks/suite.py --compare baseline.json [--threshold 0.1]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from common import ROOT, UDPSink, make_pc_list, measure, start_virtual_display, stub_resolver
+
+from dns_cache import DNSCache
+from history import FAILED, SENT, WakeHistory
+from inventory import Inventory
+import metrics
+from packet_sender import (SendPolicy, create_magic_packet, get_ip_address, resolve_ip_addresses,
+                           send_magic_packet, send_magic_packets)
+from receiver import PacketReceiver, find_magic_packet
+from scheduler import WakeScheduler
+from storage import SQLiteStorage, load_pc_list, save_pc_list
+
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+
+
+class Context:
+    """벤치마크들이 함께 쓰는 자원 (UDP 싱크, 임시 폴더, 옵션)"""
+
+    def __init__(self, args, tmp_dir: str):
+        self.args = args
+        self.tmp_dir = tmp_dir
+        self.sink = UDPSink()
+        self.repeat = args.repeat
+        self.tk_skip_reason = None
+        self.display = None
+
+    def close(self):
+        self.sink.close()
+        if self.display is not None:
+            self.display.terminate()
+
+
+# 각 벤치마크는 (size, ctx)를 받아서 {"seconds": 시간, "operations": 처리 수, ...}을 반환한다
+# 건너뛰면 {"skipped": 사유}
+
+def bench_create_packet(size, ctx):
+    macs = [pc["mac"] for pc in make_pc_list(size)]
+    seconds = measure(lambda: [create_magic_packet(mac) for mac in macs], ctx.repeat)
+    return {"seconds": seconds, "operations": size}
+
+def _measure_send(ctx, run, size):
+    # 모든 실행에서 보낸 수와 싱크가 받은 수 (UDP라서 커널 버퍼가 넘치면 받은 수가 줄어든다)
+    ctx.sink.reset()
+    seconds = measure(run, ctx.repeat)
+    sent = size * ctx.repeat
+    return {"seconds": seconds, "operations": size, "sent": sent, "received": ctx.sink.wait_for(sent)}
+
+def bench_send_per_call(size, ctx):
+    targets = [(pc["ip"], pc["mac"], pc["port"]) for pc in make_pc_list(size, "127.0.0.1", ctx.sink.port)]
+
+    def run():
+        for ip, mac, port in targets:
+            send_magic_packet(ip, mac, port)
+    return _measure_send(ctx, run, size)
+
+def bench_send_bulk(size, ctx):
+    targets = [(pc["ip"], pc["mac"], pc["port"]) for pc in make_pc_list(size, "127.0.0.1", ctx.sink.port)]
+    return _measure_send(ctx, lambda: send_magic_packets(targets), size)
+
+def bench_receive_decode(size, ctx):
+    buffers = [bytearray(create_magic_packet(pc["mac"])) for pc in make_pc_list(size)]
+    seconds = measure(lambda: [find_magic_packet(buffer, 0, len(buffer)) for buffer in buffers], ctx.repeat)
+    return {"seconds": seconds, "operations": size}
+
+def bench_receive_loopback(size, ctx):
+    # 한 번에 보낸 패킷을 PacketReceiver가 모두 받을 때까지의 시간 (보내는 시간 포함)
+    receiver = PacketReceiver([0], "127.0.0.1")
+    port = receiver.addresses[0][1]
+    targets = [(pc["ip"], pc["mac"], pc["port"]) for pc in make_pc_list(size, "127.0.0.1", port)]
+    best = float("inf")
+    try:
+        for _ in range(ctx.repeat):
+            receiver.received = 0
+            thread = threading.Thread(target=receiver.run, kwargs={"duration": 10.0, "count": size})
+            thread.start()
+            start = time.perf_counter()
+            send_magic_packets(targets)
+            thread.join()
+            best = min(best, time.perf_counter() - start)
+    finally:
+        receiver.close()
+    return {"seconds": best, "operations": size, "sent": size, "received": receiver.received}
+
+def bench_send_scheduler(size, ctx):
+    targets = [(pc["ip"], pc["mac"], pc["port"]) for pc in make_pc_list(size, "127.0.0.1", ctx.sink.port)]
+    scheduler = WakeScheduler()
+    try:
+        return _measure_send(ctx, lambda: scheduler.submit(targets, policies=SendPolicy()).wait(), size)
+    finally:
+        scheduler.close()
+
+def bench_send_scheduler_hosts(size, ctx):
+    # send.scheduler와 같지만 Inventory.host의 미리 만든 매직 패킷을 사용
+    inventory = Inventory(make_pc_list(size, "127.0.0.1", ctx.sink.port))
+    hosts = [inventory.host(pc_id) for pc_id in inventory.ids()]
+    targets = [(host.ip_address, pc["mac"], host.port) for host, pc in zip(hosts, inventory)]
+    packets = [host.packet for host in hosts]
+    scheduler = WakeScheduler()
+    try:
+        return _measure_send(ctx, lambda: scheduler.submit(targets, policies=SendPolicy(), packets=packets).wait(),
+                             size)
+    finally:
+        scheduler.close()
+
+def bench_send_scheduler_metrics(size, ctx):
+    # send.scheduler와 같지만 지표 수집을 켠 상태 (두 결과의 차이가 수집 비용)
+    metrics.enable()
+    try:
+        return bench_send_scheduler(size, ctx)
+    finally:
+        metrics.disable()
+        metrics.reset()
+
+def bench_get_ip_address(size, ctx):
+    # 실제 조회 함수 (/etc/hosts의 localhost라서 네트워크를 쓰지 않는다)
+    seconds = measure(lambda: [get_ip_address("localhost") for _ in range(size)], ctx.repeat)
+    return {"seconds": seconds, "operations": size}
+
+def bench_resolve_parallel(size, ctx):
+    names = [f"pc{i}.example.com" for i in range(size)]
+    resolver = stub_resolver(ctx.args.resolver_latency)
+    seconds = measure(lambda: list(resolve_ip_addresses(names, resolver=resolver)), 1)
+    return {"seconds": seconds, "operations": size, "resolver_latency": ctx.args.resolver_latency}
+
+def bench_dns_cache_hit(size, ctx):
+    names = [f"pc{i}.example.com" for i in range(size)]
+    cache = DNSCache(max_size=size, resolver=stub_resolver())
+    for name in names:
+        cache.resolve(name)
+    seconds = measure(lambda: [cache.resolve(name) for name in names], ctx.repeat)
+    return {"seconds": seconds, "operations": size}
+
+def bench_inventory_build(size, ctx):
+    pc_list = make_pc_list(size)
+    seconds = measure(lambda: Inventory(pc_list), ctx.repeat)
+    return {"seconds": seconds, "operations": size}
+
+def bench_host_build(size, ctx):
+    # PC마다 한 번 하는 검증과 매직 패킷 생성 (캐시를 비우려고 매번 새 Inventory)
+    pc_list = make_pc_list(size)
+    inventories = [Inventory(pc_list) for _ in range(ctx.repeat)]
+
+    def run():
+        inventory = inventories.pop()
+        for pc_id in inventory.ids():
+            inventory.host(pc_id)
+    seconds = measure(run, ctx.repeat)
+    return {"seconds": seconds, "operations": size}
+
+def bench_inventory_search(size, ctx):
+    # 필터 상자에 한 글자씩 입력할 때의 검색 (색인은 첫 검색에서 만든다)
+    inventory = Inventory(make_pc_list(size))
+    inventory.search("")
+    queries = ["p", "pc", "pc-", "pc-0", "pc-00", "pc-001", "00:11", "zzz"]
+
+    def run():
+        # 같은 검색어의 캐시를 쓰지 않도록 매번 바뀐 것으로 표시
+        inventory.set_field(1, "port", 9)
+        for query in queries:
+            inventory.search(query)
+    seconds = measure(run, ctx.repeat)
+    return {"seconds": seconds, "operations": len(queries)}
+
+def bench_json_save(size, ctx):
+    path = os.path.join(ctx.tmp_dir, f"save-{size}.json")
+    pc_list = make_pc_list(size)
+    seconds = measure(lambda: save_pc_list(pc_list, path), ctx.repeat)
+    return {"seconds": seconds, "operations": size, "bytes": os.path.getsize(path)}
+
+def bench_json_load(size, ctx):
+    path = os.path.join(ctx.tmp_dir, f"load-{size}.json")
+    save_pc_list(make_pc_list(size), path)
+    seconds = measure(lambda: load_pc_list(path), ctx.repeat)
+    return {"seconds": seconds, "operations": size}
+
+def bench_sqlite_save_one(size, ctx):
+    # 큰 목록에서 한 PC만 바꿨을 때 저장 시간
+    path = os.path.join(ctx.tmp_dir, f"one-{size}.db")
+    storage = SQLiteStorage(path)
+    try:
+        inventory = storage.load()
+        for pc in make_pc_list(size):
+            inventory.add(pc)
+        storage.save(inventory)
+        pc_id = inventory.ids()[size // 2]
+
+        def run():
+            port = inventory.get(pc_id)["port"]
+            inventory.set_field(pc_id, "port", 7 if port == 9 else 9)
+            storage.save(inventory)
+        seconds = measure(run, ctx.repeat)
+    finally:
+        storage.close()
+    return {"seconds": seconds, "operations": 1}
+
+def _history_records(size):
+    # PC 1000개를 돌아가며 깨운 기록 (100개에 하나는 실패)
+    pcs = make_pc_list(min(size, 1000))
+    return [(pcs[i % len(pcs)], FAILED if i % 100 == 0 else SENT) for i in range(size)]
+
+def bench_history_record(size, ctx):
+    # 전송 결과마다 호출하는 경로 (파일 쓰기는 기록 스레드에서 하므로 포함하지 않음)
+    records = _history_records(size)
+    histories = [WakeHistory(os.path.join(ctx.tmp_dir, f"history-record-{size}-{i}")) for i in range(ctx.repeat)]
+
+    def run():
+        history = histories.pop()
+        for pc, result in records:
+            history.record(pc["name"], pc["mac"], pc["ip"], result, latency=0.001, source="bench")
+        return history
+    written = []
+    seconds = measure(lambda: written.append(run()), ctx.repeat)
+    for history in written:
+        history.close()
+    return {"seconds": seconds, "operations": size}
+
+def _filled_history(size, ctx) -> WakeHistory:
+    path = os.path.join(ctx.tmp_dir, f"history-query-{size}")
+    history = WakeHistory(path)
+    for pc, result in _history_records(size):
+        history.record(pc["name"], pc["mac"], pc["ip"], result, latency=0.001, source="bench")
+    history.close()
+    # 다른 프로그램이 쓴 기록을 처음 조회하는 경우 (색인을 파일에서 읽는다)
+    return WakeHistory(path)
+
+def bench_history_query_host(size, ctx):
+    # PC 하나의 최근 기록 50개
+    history = _filled_history(size, ctx)
+    name = make_pc_list(1)[0]["name"]
+    seconds = measure(lambda: history.query(host=name, limit=50), ctx.repeat)
+    return {"seconds": seconds, "operations": 1}
+
+def bench_history_query_failures(size, ctx):
+    # 최근 1시간의 실패
+    history = _filled_history(size, ctx)
+    seconds = measure(lambda: history.query(since=time.time() - 3600, failed=True, limit=None), ctx.repeat)
+    return {"seconds": seconds, "operations": 1}
+
+def bench_table_refresh(size, ctx):
+    if ctx.tk_skip_reason is None:
+        ctx.display = start_virtual_display()
+        import tkinter as tk
+        try:
+            tk.Tk().destroy()
+            ctx.tk_skip_reason = ""
+        except tk.TclError as e:
+            ctx.tk_skip_reason = f"no display ({e})"
+    if ctx.tk_skip_reason:
+        return {"skipped": ctx.tk_skip_reason}
+
+    from WOL import WOLApp
+
+    path = os.path.join(ctx.tmp_dir, f"table-{size}.json")
+    save_pc_list(make_pc_list(size), path)
+    app = WOLApp(path)
+    try:
+        app.page_size = size  # 페이지 나눔 없이 전체 행으로 측정
+        app.update()
+
+        def full():
+            app.tree.delete(*app.tree.get_children())
+            app.item_values.clear()
+            app.refresh_pc_table()
+            app.update_idletasks()
+
+        pc_ids = app.inventory.ids()
+
+        def one_row():
+            pc_id = pc_ids[size // 2]
+            port = app.inventory.get(pc_id)["port"]
+            app.inventory.set_field(pc_id, "port", 7 if port == 9 else 9)
+            app.refresh_pc_table()
+            app.update_idletasks()
+
+        full_seconds = measure(full, ctx.repeat)
+        seconds = measure(one_row, ctx.repeat)
+    finally:
+        app.destroy()
+    return {"seconds": seconds, "operations": 1, "full_refresh_seconds": full_seconds}
+
+# (이름, 함수, 최대 크기). 최대 크기보다 큰 크기는 건너뛴다 (너무 오래 걸리는 경우)
+BENCHMARKS = [
+    ("packet.create", bench_create_packet, None),
+    ("send.per_call", bench_send_per_call, None),
+    ("send.bulk", bench_send_bulk, None),
+    ("receive.decode", bench_receive_decode, None),
+    ("receive.loopback", bench_receive_loopback, None),
+    ("send.scheduler", bench_send_scheduler, None),
+    ("send.scheduler_hosts", bench_send_scheduler_hosts, None),
+    ("send.scheduler_metrics", bench_send_scheduler_metrics, None),
+    ("resolve.get_ip_address", bench_get_ip_address, 10000),
+    ("resolve.parallel_stub", bench_resolve_parallel, 10000),
+    ("resolve.cache_hit", bench_dns_cache_hit, None),
+    ("inventory.build", bench_inventory_build, None),
+    ("inventory.host_build", bench_host_build, None),
+    ("inventory.search", bench_inventory_search, None),
+    ("storage.json_save", bench_json_save, None),
+    ("storage.json_load", bench_json_load, None),
+    ("storage.sqlite_save_one", bench_sqlite_save_one, None),
+    ("history.record", bench_history_record, None),
+    ("history.query_host", bench_history_query_host, None),
+    ("history.query_failures", bench_history_query_failures, None),
+    ("table.refresh_one_row", bench_table_refresh, 10000),
+]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+def run_benchmarks(args) -> dict:
+    only = set(args.only.split(",")) if args.only else None
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        ctx = Context(args, tmp_dir)
+        try:
+            for name, fn, max_size in BENCHMARKS:
+                if only and name not in only and name.split(".")[0] not in only:
+                    continue
+                for size in args.sizes:
+                    if max_size is not None and size > max_size:
+                        continue
+                    result = {"name": name, "size": size, **fn(size, ctx)}
+                    if "seconds" in result:
+                        result["per_second"] = result["operations"] / result["seconds"] if result["seconds"] else 0.0
+                    results.append(result)
+                    print_result(result)
+        finally:
+            ctx.close()
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+def print_result(result: dict):
+    label = f"{result['name']:<26} {result['size']:>7}"
+    if "skipped" in result:
+        print(f"{label}  skipped: {result['skipped']}", file=sys.stderr)
+        return
+    extra = f"  received {result['received']}/{result['sent']}" if "received" in result else ""
+    print(f"{label}  {result['seconds'] * 1000:10.2f} ms  {result['per_second']:14,.0f} /s{extra}", file=sys.stderr)
+
+def compare(current: dict, baseline: dict, threshold: float) -> int:
+    """baseline보다 threshold 비율 이상 느려진 항목 수 반환"""
+    previous = {(r["name"], r["size"]): r for r in baseline["results"] if "seconds" in r}
+    regressions = 0
+    print(f"comparing {current.get('commit') or 'current'} with {baseline.get('commit') or 'baseline'}")
+    for result in current["results"]:
+        old = previous.get((result["name"], result["size"]))
+        if old is None or "seconds" not in result or not old["seconds"]:
+            continue
+        change = result["seconds"] / old["seconds"] - 1.0
+        mark = ""
+        if change > threshold:
+            mark = "  SLOWER"
+            regressions += 1
+        elif change < -threshold:
+            mark = "  faster"
+        print(f"{result['name']:<26} {result['size']:>7}  {old['seconds'] * 1000:10.2f} -> "
+              f"{result['seconds'] * 1000:10.2f} ms  {change:+7.1%}{mark}")
+    return regressions
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=lambda value: [int(size) for size in value.split(",")],
+                        default=list(DEFAULT_SIZES), help="numbers of synthetic PCs (default: 100,1000,10000,100000)")
+    parser.add_argument("--only", help="comma separated benchmark names or groups (e.g. send,storage.json_load)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark, the fastest is kept")
+    parser.add_argument("--resolver-latency", type=float, default=0.001, help="stub DNS latency in seconds")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare with a previous JSON result")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    result = run_benchmarks(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    elif not args.compare:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        return 1 if compare(result, baseline, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,431 @@
+"""
+서브넷 탐색: CIDR 범위를 훑어서 켜진 장비의 IP와 MAC 주소를 모은다 (PC 목록에 추가/갱신할 후보)
+
+MAC은 직접 연결된 서브넷에서만 알 수 있으므로 (다른 서브넷은 라우터의 MAC만 보인다)
+범위 중 인터페이스의 서브넷과 겹치는 부분만 그 인터페이스로 훑는다.
+- 먼저 커널 neighbour 테이블(/proc/net/arp, 없으면 ip neigh)에 이미 있는 항목을 모으고 그 주소는 건너뛴다
+- arp 방식 (Linux, root 또는 CAP_NET_RAW): AF_PACKET 소켓으로 ARP 요청을 직접 보내고 응답을 같은 소켓으로 받는다.
+  neighbour 테이블을 거치지 않으므로 동시에 수천 개를 보낼 수 있다 (/16이 수 초)
+- udp 방식 (권한 불필요): 주소마다 빈 UDP 패킷을 보내서 커널이 ARP를 하게 하고 neighbour 테이블에서 결과를 읽는다.
+  응답이 없던 주소도 테이블에 남으므로 테이블이 차면 커널이 지울 때까지 기다린다 (/24는 수 초, /16은 수십 분)
+- 두 방식 모두 응답을 기다리는 주소는 concurrency개까지, timeout초 안에 응답이 없으면 다음 주소로 넘어간다
+- resolve_names=True면 찾은 주소의 역방향 DNS 이름을 여러 스레드로 조회한다
+"""
+from collections import deque
+from typing import Callable, Iterator, NamedTuple
+import errno
+import ipaddress
+import select
+import socket
+import subprocess
+import threading
+import time
+
+from ethernet import BROADCAST_MAC
+from interfaces import Interface, find_interface, list_interfaces
+from inventory import Inventory
+from packet_sender import resolve_ip_addresses
+
+MODES = ("auto", "arp", "udp")
+ETH_P_ARP = 0x0806
+NEIGHBOUR_TABLE = "/proc/net/arp"
+GC_THRESH3 = "/proc/sys/net/ipv4/neigh/default/gc_thresh3"
+# 방식별 동시에 응답을 기다리는 주소 수와 주소마다 기다리는 시간(초)
+ARP_CONCURRENCY = 4096
+ARP_TIMEOUT = 0.5
+UDP_CONCURRENCY = 768
+# 커널은 응답이 없는 주소에 ARP 요청을 1초 간격으로 3번 보낸 뒤 포기한다
+UDP_TIMEOUT = 3.0
+# 빈 UDP 패킷을 보낼 포트 (discard)와 나눠서 보낼 소켓 수
+PROBE_PORT = 9
+UDP_SOCKETS = 8
+# 응답을 확인하는 최대 간격(초). udp 방식은 이 간격으로 neighbour 테이블을 읽는다
+POLL_INTERVAL = 0.05
+# ARP 응답이 몰려도 커널에서 버려지지 않도록 늘리는 수신 버퍼 크기
+RECEIVE_BUFFER = 4 << 20
+# 역방향 DNS 조회 스레드 수와 주소마다 기다리는 시간(초)
+RESOLVE_WORKERS = 32
+RESOLVE_TIMEOUT = 2.0
+# 찾은 장비와 PC 목록 비교 결과: 없는 MAC, 같은 IP로 있는 MAC, IP가 바뀐 MAC
+NEW = "new"
+KNOWN = "known"
+CHANGED = "changed"
+# 송신 큐가 가득 찼다는 뜻이므로 응답을 받은 뒤 다시 보낸다
+_RETRY_ERRNOS = (errno.ENOBUFS, errno.EAGAIN)
+
+
+class DiscoveredHost(NamedTuple):
+    ip: str
+    mac: str  # AA:BB:CC:DD:EE:FF
+    interface: str
+    name: str = ""
+
+    def to_row(self) -> dict:
+        """importer.import_rows에 넘기는 행 (이름이 없으면 IP를 이름으로 사용)"""
+        row = {"ip": self.ip, "mac": self.mac}
+        if self.name:
+            row["name"] = self.name
+        return row
+
+
+class DiscoveryResult:
+    def __init__(self, mode: str):
+        self.mode = mode  # 실제로 사용한 방식 (arp, udp)
+        self.hosts: list[DiscoveredHost] = []
+        self.probed = 0
+        self.cached = 0  # 이미 neighbour 테이블에 있던 항목 수
+        self.elapsed = 0.0
+
+    @property
+    def probes_per_second(self) -> float:
+        return self.probed / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def inventory_status(inventory: Inventory, host: DiscoveredHost) -> tuple[str, int | None]:
+    """(NEW/KNOWN/CHANGED, 같은 MAC인 PC의 id)"""
+    pc_id = inventory.find_by_mac(host.mac)
+    if pc_id is None:
+        return NEW, None
+    return (KNOWN if inventory.get(pc_id).get("ip") == host.ip else CHANGED), pc_id
+
+def read_neighbours(path: str = NEIGHBOUR_TABLE) -> dict[str, tuple[str, str]]:
+    """커널 neighbour 테이블의 IPv4 항목: ip -> (MAC, 인터페이스). 응답이 없는(MAC이 없는) 항목은 제외"""
+    neighbours = {}
+    try:
+        with open(path, encoding="ascii") as f:
+            next(f, None)  # IP address, HW type, Flags, HW address, Mask, Device
+            for line in f:
+                parts = line.split()
+                if len(parts) < 6 or parts[2] == "0x0" or parts[3] == "00:00:00:00:00:00":
+                    continue
+                neighbours[parts[0]] = (parts[3].upper(), parts[5])
+        return neighbours
+    except FileNotFoundError:
+        return _read_ip_neigh()
+
+def _read_ip_neigh() -> dict[str, tuple[str, str]]:
+    """ip -4 neigh: <ip> dev <인터페이스> lladdr <MAC> <상태>. ip 명령이 없으면 빈 dict"""
+    try:
+        output = subprocess.run(["ip", "-4", "neigh", "show"], capture_output=True, text=True, timeout=5).stdout
+    except (OSError, subprocess.SubprocessError):
+        return {}
+    neighbours = {}
+    for line in output.splitlines():
+        parts = line.split()
+        if "lladdr" not in parts or "dev" not in parts or parts[-1] == "FAILED":
+            continue
+        neighbours[parts[0]] = (parts[parts.index("lladdr") + 1].upper(), parts[parts.index("dev") + 1])
+    return neighbours
+
+def neighbour_table_size(path: str = NEIGHBOUR_TABLE) -> int | None:
+    """응답이 없는 항목을 포함한 neighbour 테이블의 항목 수 (알 수 없으면 None)"""
+    try:
+        with open(path, "rb") as f:
+            return f.read().count(b"\n") - 1
+    except OSError:
+        return None
+
+def neighbour_table_limit(path: str = GC_THRESH3) -> int | None:
+    try:
+        with open(path, encoding="ascii") as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return None
+
+def reverse_lookup(ip: str) -> str | None:
+    """역방향 DNS 이름의 첫 라벨 (pc-01.corp.local -> pc-01). 없으면 None"""
+    try:
+        name = socket.gethostbyaddr(ip)[0]
+    except (OSError, UnicodeError):
+        return None
+    # 이름이 없으면 주소를 그대로 돌려주는 resolver도 있다
+    if not name or name == ip:
+        return None
+    return name.split(".")[0]
+
+def sweep_ranges(network: ipaddress.IPv4Network, interface: str | None = None
+                 ) -> list[tuple[Interface, ipaddress.IPv4Network]]:
+    """
+    network 중 직접 연결된 부분과 그 인터페이스 목록 (루프백 제외)
+    - interface(이름 또는 주소)를 지정하면 그 인터페이스만
+    - 겹치는 인터페이스가 없으면 ValueError
+    """
+    if interface:
+        found = find_interface(interface)
+        if found is None:
+            raise ValueError(f"Unknown interface: {interface}")
+        candidates = [found]
+    else:
+        candidates = [item for item in list_interfaces() if not item.loopback]
+
+    ranges = []
+    for candidate in candidates:
+        subnet = candidate.network
+        if subnet is None or not subnet.overlaps(network):
+            continue
+        # CIDR 두 개가 겹치면 한쪽이 다른 쪽을 포함하므로 작은 쪽만 훑는다
+        sweep = network if network.subnet_of(subnet) else subnet
+        if all(sweep != existing for _, existing in ranges):
+            ranges.append((candidate, sweep))
+    if not ranges:
+        raise ValueError(f"{network} is not on a directly connected subnet "
+                         f"(MAC addresses can only be discovered on the local network)")
+    return ranges
+
+def _addresses(interface: Interface, sweep: ipaddress.IPv4Network, skip: dict) -> Iterator[str]:
+    """sweep 안에서 probe할 주소 (서브넷의 네트워크/브로드캐스트 주소, 자기 주소, 이미 찾은 주소 제외)"""
+    subnet = interface.network
+    excluded = {interface.address}
+    if subnet.prefixlen < 31:
+        excluded.update((str(subnet.network_address), str(subnet.broadcast_address)))
+    for number in range(int(sweep.network_address), int(sweep.broadcast_address) + 1):
+        ip = socket.inet_ntoa(number.to_bytes(4, "big"))
+        if ip not in excluded and ip not in skip:
+            yield ip
+
+
+class ArpProber:
+    """
+    interface에 묶인 AF_PACKET 소켓으로 ARP 요청을 보내고 응답을 받는다
+    - 프레임은 목적지 IP 4바이트만 다르므로 앞부분을 한 번만 만든다
+    - AF_PACKET을 지원하지 않는 OS나 권한이 없으면 OSError
+    """
+
+    def __init__(self, interface: Interface):
+        if not hasattr(socket, "AF_PACKET"):
+            raise OSError("ARP discovery is only supported on Linux")
+        self.interface = interface
+        self.sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ARP))
+        try:
+            self.sock.bind((interface.name, ETH_P_ARP))
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER)
+            source_mac = self.sock.getsockname()[4]
+        except OSError:
+            self.sock.close()
+            raise
+        # Ethernet 헤더 + ARP 요청 (htype 1, ptype IPv4, hlen 6, plen 4, oper 1, 출발지 MAC/IP, 목적지 MAC 0)
+        self._header = (BROADCAST_MAC + source_mac + ETH_P_ARP.to_bytes(2, "big")
+                        + b"\x00\x01\x08\x00\x06\x04\x00\x01" + source_mac + socket.inet_aton(interface.address)
+                        + b"\x00" * 6)
+
+    def close(self):
+        self.sock.close()
+
+    def send(self, ip: str):
+        self.sock.send(self._header + socket.inet_aton(ip))
+
+    def poll(self, timeout: float) -> list[tuple[str, str]]:
+        """timeout초까지 기다렸다가 도착한 ARP 응답의 (IP, MAC) 목록"""
+        replies = []
+        if not select.select([self.sock], [], [], timeout)[0]:
+            return replies
+        recv = self.sock.recv
+        while True:
+            try:
+                frame = recv(64, socket.MSG_DONTWAIT)
+            except BlockingIOError:
+                return replies
+            # oper 2 (reply). 보낸 요청도 같은 소켓으로 돌아오지만 oper 1이라 건너뛴다
+            if len(frame) >= 42 and frame[12:14] == b"\x08\x06" and frame[20:22] == b"\x00\x02":
+                replies.append((socket.inet_ntoa(frame[28:32]), frame[22:28].hex(":").upper()))
+
+
+class NeighbourProber:
+    """
+    빈 UDP 패킷으로 커널이 ARP를 하게 하고 neighbour 테이블에서 응답한 주소를 읽는다 (권한 불필요)
+    - MAC을 모르는 주소로 보낸 패킷은 ARP가 끝날 때까지(최대 3초) 소켓의 송신 버퍼를 차지하므로
+      소켓 여러 개에 나눠서 보낸다
+    - 응답이 없던 주소도 커널이 지울 때까지 테이블에 남는다. 테이블이 가득 차면 커널이 응답한 항목까지
+      지우므로, 마지막으로 읽은 항목 수와 그 뒤에 보낸 수가 gc_thresh3의 3/4를 넘으면 보내지 않는다
+    """
+
+    def __init__(self, interface: Interface, sockets: int = UDP_SOCKETS):
+        self.interface = interface
+        limit = neighbour_table_limit()
+        self.table_limit = None if limit is None else limit * 3 // 4
+        self.table_size = neighbour_table_size() or 0
+        self.socks = []
+        for _ in range(sockets):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setblocking(False)
+            self.socks.append(sock)
+        self._next = 0
+
+    def close(self):
+        for sock in self.socks:
+            sock.close()
+
+    def send(self, ip: str):
+        """neighbour 테이블에 여유가 없거나 모든 소켓의 송신 버퍼가 가득 차면 BlockingIOError"""
+        if self.table_limit is not None and self.table_size >= self.table_limit:
+            raise BlockingIOError(errno.EAGAIN, "Neighbour table is full")
+        self.table_size += 1
+        for _ in range(len(self.socks)):
+            sock = self.socks[self._next]
+            self._next = (self._next + 1) % len(self.socks)
+            try:
+                sock.sendto(b"", (ip, PROBE_PORT))
+                return
+            except BlockingIOError:
+                continue
+            except ConnectionRefusedError:
+                # 이전 probe에 대한 ICMP port unreachable. 그 장비는 이미 neighbour 테이블에 있다
+                return
+        raise BlockingIOError(errno.EAGAIN, "All probe sockets are busy")
+
+    def poll(self, timeout: float) -> list[tuple[str, str]]:
+        time.sleep(timeout)
+        self.table_size = neighbour_table_size() or 0
+        name = self.interface.name
+        return [(ip, mac) for ip, (mac, device) in read_neighbours().items() if device == name]
+
+
+class SubnetScanner:
+    """
+    CIDR 범위의 직접 연결된 부분을 훑어서 IP와 MAC 주소를 모은다
+    - mode: auto(arp를 쓸 수 있으면 arp, 아니면 udp), arp, udp
+    - retries: 응답이 없던 주소를 다시 probe하는 횟수
+    - 범위가 직접 연결된 서브넷이 아니거나 인터페이스가 없으면 ValueError, arp 방식을 열 수 없으면 OSError
+    """
+
+    def __init__(self, cidr: str, interface: str | None = None, mode: str = "auto", concurrency: int | None = None,
+                 timeout: float | None = None, retries: int = 0, resolve_names: bool = False):
+        if mode not in MODES:
+            raise ValueError(f"Unknown discovery mode: {mode}")
+        self.network = ipaddress.IPv4Network(cidr, strict=False)
+        self.ranges = sweep_ranges(self.network, interface)
+        self.mode = mode
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.resolve_names = resolve_names
+        self._stop = threading.Event()
+
+    @property
+    def address_count(self) -> int:
+        return sum(sweep.num_addresses for _, sweep in self.ranges)
+
+    def stop(self):
+        """다른 스레드에서 호출하면 run()이 지금까지 찾은 결과로 끝난다"""
+        self._stop.set()
+
+    def _open(self, interface: Interface) -> ArpProber | NeighbourProber:
+        if self.mode == "udp":
+            return NeighbourProber(interface)
+        try:
+            return ArpProber(interface)
+        except OSError:
+            if self.mode == "arp":
+                raise
+            return NeighbourProber(interface)
+
+    def _limits(self, prober) -> tuple[int, float]:
+        if isinstance(prober, ArpProber):
+            return self.concurrency or ARP_CONCURRENCY, self.timeout or ARP_TIMEOUT
+        return self.concurrency or UDP_CONCURRENCY, self.timeout or UDP_TIMEOUT
+
+    def run(self, on_found: Callable[[DiscoveredHost], None] | None = None) -> DiscoveryResult:
+        """
+        범위를 훑어서 찾은 장비 목록(IP 순)을 반환
+        - on_found: 장비를 찾을 때마다 run을 호출한 스레드에서 호출 (역방향 DNS 조회 전이라 name은 비어 있다)
+        """
+        start = time.perf_counter()
+        found: dict[str, DiscoveredHost] = {}
+
+        def add(ip: str, mac: str, interface: str):
+            if ip not in found:
+                found[ip] = DiscoveredHost(ip, mac, interface)
+                if on_found is not None:
+                    on_found(found[ip])
+
+        # neighbour 테이블에 이미 있는 항목 (꺼진 장비의 MAC도 남아 있을 수 있다)
+        names = {interface.name: sweep for interface, sweep in self.ranges}
+        for ip, (mac, device) in read_neighbours().items():
+            if device in names and ipaddress.IPv4Address(ip) in names[device]:
+                add(ip, mac, device)
+        cached = len(found)
+
+        modes = []
+        probed = 0
+        for interface, sweep in self.ranges:
+            if self._stop.is_set():
+                break
+            prober = self._open(interface)
+            try:
+                modes.append("arp" if isinstance(prober, ArpProber) else "udp")
+                concurrency, timeout = self._limits(prober)
+                addresses = _addresses(interface, sweep, found)
+                for _ in range(self.retries + 1):
+                    unanswered = []
+                    probed += self._sweep(prober, sweep, addresses, concurrency, timeout, add, unanswered)
+                    addresses = iter(unanswered)
+            finally:
+                prober.close()
+
+        if self.resolve_names and found and not self._stop.is_set():
+            for ip, name in resolve_ip_addresses(list(found), max_workers=RESOLVE_WORKERS, timeout=RESOLVE_TIMEOUT,
+                                                 resolver=reverse_lookup):
+                if name:
+                    found[ip] = found[ip]._replace(name=name)
+
+        result = DiscoveryResult("/".join(dict.fromkeys(modes)) or self.mode)
+        result.hosts = sorted(found.values(), key=lambda host: socket.inet_aton(host.ip))
+        result.probed = probed
+        result.cached = cached
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    def _sweep(self, prober, sweep: ipaddress.IPv4Network, addresses: Iterator[str], concurrency: int,
+               timeout: float, add: Callable[[str, str, str], None], unanswered: list[str]) -> int:
+        """
+        응답을 기다리는 주소를 concurrency개까지 유지하면서 addresses를 probe하고 보낸 수를 반환
+        - 응답은 sweep 안의 주소면 모두 받는다 (timeout이 지난 뒤 늦게 온 응답 포함)
+        - timeout초 안에 응답이 없던 주소는 unanswered에 추가
+        """
+        first, last = int(sweep.network_address), int(sweep.broadcast_address)
+        device = prober.interface.name
+        in_flight: dict[str, float] = {}
+        deadlines = deque()  # (기한, ip). 보낸 순서이므로 기한도 순서대로
+        retry = None  # 송신 큐가 가득 차서 다시 보낼 주소
+        exhausted = False
+        sent = 0
+        while not self._stop.is_set():
+            now = time.monotonic()
+            while not exhausted and len(in_flight) < concurrency:
+                ip = retry or next(addresses, None)
+                retry = None
+                if ip is None:
+                    exhausted = True
+                    break
+                try:
+                    prober.send(ip)
+                except OSError as e:
+                    if e.errno not in _RETRY_ERRNOS:
+                        raise
+                    retry = ip
+                    break
+                in_flight[ip] = now + timeout
+                deadlines.append((now + timeout, ip))
+                sent += 1
+            if exhausted and not in_flight:
+                break
+
+            wait = POLL_INTERVAL
+            if deadlines:
+                wait = min(wait, max(0.0, deadlines[0][0] - now))
+            for ip, mac in prober.poll(wait):
+                if in_flight.pop(ip, None) is not None or first <= int(ipaddress.IPv4Address(ip)) <= last:
+                    add(ip, mac, device)
+
+            now = time.monotonic()
+            while deadlines and deadlines[0][0] <= now:
+                _, ip = deadlines.popleft()
+                if in_flight.pop(ip, None) is not None:
+                    unanswered.append(ip)
+        return sent
+
+
+def find_mac(ip: str, mode: str = "auto") -> str | None:
+    """직접 연결된 서브넷의 ip 하나에 probe해서 MAC 주소 반환 (응답이 없으면 None, 다른 서브넷이면 ValueError)"""
+    result = SubnetScanner(f"{ip}/32", mode=mode).run()
+    return result.hosts[0].mac if result.hosts else None
@@ -0,0 +1,100 @@
+from collections import OrderedDict
+from typing import Callable
+import threading
+import time
+
+from packet_sender import get_ip_address
+
+
+class _CacheEntry:
+    __slots__ = ("ip", "expires", "failed")
+
+    def __init__(self, ip: str | None, expires: float, failed: bool):
+        self.ip = ip            # 마지막으로 성공한 조회 결과 (없으면 None)
+        self.expires = expires  # time.monotonic() 기준 만료 시각
+        self.failed = failed    # 마지막 조회가 실패했는지 (negative cache)
+
+
+class DNSCache:
+    """
+    DDNS 조회 결과 캐시
+    - 성공한 결과는 ttl초, 실패한 결과는 negative_ttl초 동안 재조회하지 않는다
+    - 조회가 실패해도 마지막으로 성공한 IP를 계속 돌려준다 (last-known-good)
+    - 만료된 항목은 기존 IP를 바로 돌려주고 백그라운드에서 갱신한다 (stale-while-revalidate)
+    - max_size를 넘으면 가장 오래 사용하지 않은 항목부터 제거 (LRU)
+    """
+
+    def __init__(self, ttl: float = 300.0, negative_ttl: float = 30.0, max_size: int = 1024,
+                 resolver: Callable[[str], str | None] = get_ip_address):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self.resolver = resolver
+        self._entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._refreshing: set[str] = set()
+        self._lock = threading.Lock()
+
+    def prime(self, ddns: str, ip: str):
+        """저장된 IP를 last-known-good으로 등록 (만료 상태라 다음 조회 시 갱신된다)"""
+        if not ddns or not ip:
+            return
+        with self._lock:
+            if ddns not in self._entries:
+                self._store(ddns, _CacheEntry(ip, 0.0, False))
+
+    def resolve(self, ddns: str, allow_stale: bool = True) -> str | None:
+        """
+        캐시를 거쳐 DDNS의 IP를 조회
+        - allow_stale=True: 만료된 항목은 기존 IP를 즉시 반환하고 백그라운드에서 갱신
+        - allow_stale=False: 만료된 항목은 바로 다시 조회 (실패하면 기존 IP 반환)
+        """
+        with self._lock:
+            entry = self._entries.get(ddns)
+            if entry is not None:
+                self._entries.move_to_end(ddns)
+                if time.monotonic() < entry.expires:
+                    return entry.ip
+                if allow_stale and entry.ip is not None:
+                    if ddns not in self._refreshing:
+                        self._refreshing.add(ddns)
+                        threading.Thread(target=self._background_refresh, args=(ddns,), daemon=True).start()
+                    return entry.ip
+        return self.refresh(ddns)
+
+    def refresh(self, ddns: str) -> str | None:
+        """캐시를 무시하고 다시 조회. 실패하면 마지막으로 성공한 IP 반환"""
+        ip = self.resolver(ddns)
+        now = time.monotonic()
+        with self._lock:
+            previous = self._entries.get(ddns)
+            if ip:
+                self._store(ddns, _CacheEntry(ip, now + self.ttl, False))
+                return ip
+            last_good = previous.ip if previous is not None else None
+            self._store(ddns, _CacheEntry(last_good, now + self.negative_ttl, True))
+            return last_good
+
+    def invalidate(self, ddns: str | None = None):
+        """특정 항목 또는 전체 캐시 삭제"""
+        with self._lock:
+            if ddns is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(ddns, None)
+
+    def _background_refresh(self, ddns: str):
+        try:
+            self.refresh(ddns)
+        finally:
+            with self._lock:
+                self._refreshing.discard(ddns)
+
+    def _store(self, ddns: str, entry: _CacheEntry):
+        # 호출하는 쪽에서 self._lock을 잡고 있어야 한다
+        self._entries[ddns] = entry
+        self._entries.move_to_end(ddns)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
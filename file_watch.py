@@ -0,0 +1,157 @@
+"""
+PC 목록 파일의 변경 감지와 쓰기 잠금
+
+- FileWatcher: 리눅스에서는 inotify로 디렉터리 이벤트가 있을 때만 stat하고,
+  그 외에는 확인할 때마다 (mtime, 크기, inode)를 비교한다. 파일은 rename으로 교체되므로 inode도 비교
+- locked(): 같은 디렉터리의 숨김 잠금 파일에 advisory lock (flock). 데이터 파일 자체는 rename으로
+  바뀌므로 잠금은 별도 파일에 건다. fcntl이 없는 플랫폼(Windows)에서는 잠그지 않는다
+"""
+from contextlib import contextmanager
+from typing import Iterator
+import os
+import struct
+import sys
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# inotify 이벤트 (linux/inotify.h)
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+Signature = tuple[int, int, int] | None  # (mtime_ns, 크기, inode). 파일이 없으면 None
+
+
+def file_signature(path: str) -> Signature:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class FileWatcher:
+    """
+    snapshot() 이후 path가 바뀌었는지 확인
+    - 자신이 쓴 뒤에는 snapshot()을 다시 호출해서 자신의 변경을 무시한다
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self._name = os.fsencode(os.path.basename(self.path))
+        self._signature: Signature = None
+        # inotify 이벤트를 받은 뒤 아직 stat으로 확인하지 않은 변경이 있을 수 있음
+        self._pending = True
+        self._fd = self._open_inotify()
+        self.snapshot()
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._fd is not None
+
+    def _open_inotify(self) -> int | None:
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            import ctypes
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd < 0:
+                return None
+            directory = os.fsencode(os.path.dirname(self.path))
+            if libc.inotify_add_watch(fd, directory, WATCH_MASK) < 0:
+                os.close(fd)
+                return None
+            return fd
+        except (OSError, AttributeError):
+            # inotify를 쓸 수 없으면 stat 비교만 사용
+            return None
+
+    def _read_events(self) -> bool:
+        """쌓인 이벤트를 모두 읽고 이 파일에 대한 이벤트가 있었으면 True"""
+        relevant = False
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                return relevant
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if mask & IN_Q_OVERFLOW or name == self._name:
+                    relevant = True
+
+    def snapshot(self):
+        """지금 파일 상태를 기준으로 (이전 이벤트는 버린다)"""
+        if self._fd is not None:
+            self._read_events()
+        self._signature = file_signature(self.path)
+        self._pending = False
+
+    def changed(self) -> bool:
+        """snapshot() 이후 다른 내용으로 바뀌었으면 True (다음 snapshot()까지 계속 True)"""
+        if self._fd is not None:
+            if self._read_events():
+                self._pending = True
+            if not self._pending:
+                return False
+        if file_signature(self.path) == self._signature:
+            # 자신이 쓴 파일의 이벤트 등 실제로는 바뀌지 않음
+            self._pending = False
+            return False
+        return True
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def lock_path(path: str) -> str:
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, f".{name}.lock")
+
+@contextmanager
+def locked(path: str, exclusive: bool = True) -> Iterator[None]:
+    """
+    path의 잠금 파일에 advisory lock을 걸고 실행 (쓰기는 exclusive, 읽기는 공유)
+    - 잠금을 따르지 않는 프로그램은 막지 못한다
+    - 잠금 파일은 쓸 때만 만든다. 읽기는 잠금 파일이 없거나 열 수 없으면 잠그지 않고 읽는다
+      (파일은 rename으로 교체되므로 잠그지 않고 읽어도 쓰다 만 내용은 보이지 않는다)
+    - 잠금 파일을 만들 수 없거나 fcntl이 없으면 잠그지 않고 실행
+    """
+    fd = None
+    if fcntl is not None:
+        try:
+            if exclusive:
+                fd = os.open(lock_path(path), os.O_RDWR | os.O_CREAT, 0o666)
+            else:
+                # 읽기 전용 명령이 사용자 폴더에 잠금 파일을 남기지 않도록 만들지 않는다
+                fd = os.open(lock_path(path), os.O_RDONLY)
+        except OSError:
+            # 읽기 전용 디렉터리, 잠금 파일 없음 등은 잠그지 않는다
+            pass
+    if fd is None:
+        yield
+        return
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+    finally:
+        # 닫으면 잠금도 풀린다
+        os.close(fd)
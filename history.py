@@ -0,0 +1,387 @@
+"""
+전송 기록 (누가, 어느 PC를, 언제, 결과, 지연 시간)
+
+- record()는 메모리의 최근 기록(링 버퍼, 창에 표시)과 쓰기 대기 목록에 추가만 하고 바로 돌아온다.
+  파일 쓰기는 기록 스레드가 FLUSH_INTERVAL초마다 또는 BLOCK_RECORDS개가 모이면 한 번에 한다 (전송 경로를 막지 않음)
+- 디스크 형식: 폴더의 history-<번호>.dat에 블록(JSON 줄들을 zlib으로 압축)을 이어 붙이기만 하고,
+  블록마다 history-<번호>.idx에 한 줄 (위치, 크기, 기록 수, 처음/마지막 시각, 실패 수, PC 목록)
+  .dat가 MAX_SEGMENT_BYTES를 넘으면 다음 번호로 넘어가고, MAX_SEGMENTS개보다 오래된 파일은 지운다
+- 조회는 색인(PC -> 블록, 블록별 시각과 실패 수)으로 필요한 블록만 풀어서 읽으므로 기록이 수백만 개여도 빠르다
+- 여러 프로그램(창, CLI, 릴레이)이 같은 폴더에 기록해도 잠금(file_watch.locked)을 잡고 블록 단위로 이어 붙이고,
+  조회할 때 다른 프로그램이 추가한 색인 줄도 읽는다
+"""
+from collections import deque
+from typing import Any, NamedTuple
+import getpass
+import json
+import os
+import re
+import threading
+import time
+import zlib
+
+from file_watch import locked
+from inventory import normalize_mac
+
+HISTORY_DIR = "WakeHistory"
+# 블록 하나의 최대 기록 수와 쓰기 대기 최대 시간(초)
+BLOCK_RECORDS = 1024
+FLUSH_INTERVAL = 1.0
+# 파일 하나의 최대 크기와 보관할 파일 수 (압축 후 기록 하나가 수십 바이트이므로 수백만 개)
+MAX_SEGMENT_BYTES = 16 << 20
+MAX_SEGMENTS = 32
+# 메모리에 두는 최근 기록 수
+RING_SIZE = 1000
+
+# 결과
+SENT = "sent"
+FAILED = "failed"
+CANCELLED = "cancelled"
+UP = "up"
+NO_RESPONSE = "no response"
+FAILURES = (FAILED, NO_RESPONSE)
+
+_SEGMENT_PATTERN = re.compile(r"^history-(\d+)\.dat$")
+# 블록의 줄을 JSON으로 풀기 전에 거르는 데 쓰는 형식 (to_dict의 키 순서, json.dumps 기본 구분자)
+_ENCODER = json.JSONEncoder(ensure_ascii=False)
+
+
+def current_user() -> str:
+    try:
+        return getpass.getuser()
+    except (KeyError, OSError):
+        # 컨테이너 등 사용자 이름이 없는 환경
+        return ""
+
+def format_mac(mac: str) -> str:
+    """기록에 남기는 MAC 형식 (AA:BB:CC:DD:EE:FF). 12자리가 아니면 구분자만 없앤 값"""
+    mac = normalize_mac(mac)
+    if len(mac) != 12:
+        return mac
+    return ":".join(mac[i:i + 2] for i in range(0, 12, 2))
+
+def history_path(pc_list_path: str) -> str:
+    """PC 목록 파일과 같은 폴더의 WakeHistory 폴더"""
+    return os.path.join(os.path.dirname(os.path.abspath(pc_list_path)), HISTORY_DIR)
+
+
+class WakeRecord:
+    """
+    전송 결과 하나
+    - result: sent, failed, cancelled (전송), up, no response (깨운 뒤 응답 확인)
+    - latency: 전송 결과는 요청부터 첫 전송까지, 응답 결과는 전송부터 첫 응답까지 걸린 시간(초)
+    - source: gui, cli, relay. user: 사용자 이름 또는 릴레이에 요청한 주소
+    """
+
+    __slots__ = ("time", "name", "mac", "ip", "result", "error", "latency", "source", "user")
+
+    def __init__(self, name: str, mac: str, ip: str, result: str, error: str | None = None,
+                 latency: float | None = None, source: str = "", user: str = "", when: float | None = None):
+        self.time = time.time() if when is None else when
+        self.name = name
+        self.mac = format_mac(mac)
+        self.ip = ip
+        self.result = result
+        self.error = error
+        self.latency = latency
+        self.source = source
+        self.user = user
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "WakeRecord":
+        return cls(data.get("name", ""), data.get("mac", ""), data.get("ip", ""), data.get("result", ""),
+                   data.get("error"), data.get("latency"), data.get("source", ""), data.get("user", ""),
+                   data.get("time", 0.0))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    @property
+    def failed(self) -> bool:
+        return self.result in FAILURES
+
+    def keys(self) -> tuple[str, str]:
+        """색인 키 (이름, MAC). 이름과 MAC이 섞이지 않도록 접두사를 붙인다"""
+        return f"name:{self.name}", f"mac:{normalize_mac(self.mac)}"
+
+    def to_json(self) -> str:
+        return _ENCODER.encode(self.to_dict())
+
+    def __repr__(self) -> str:
+        return f"WakeRecord(name={self.name!r}, result={self.result!r}, time={self.time})"
+
+
+def _filter_lines(data: bytes, filters: list[tuple[bytes, ...]]) -> list[bytes]:
+    """
+    data의 줄 중에서 필터마다 후보 하나 이상을 포함하는 줄 (원래 순서)
+    - 첫 필터는 줄마다 확인하지 않고 블록 전체에서 find로 찾은 위치의 줄만 꺼낸다
+    """
+    if not filters:
+        return data.splitlines()
+    ends = {}  # 줄 시작 -> 끝 (모든 줄은 \n으로 끝난다)
+    for candidate in filters[0]:
+        position = data.find(candidate)
+        while position != -1:
+            start = data.rfind(b"\n", 0, position) + 1
+            end = data.find(b"\n", position)
+            ends[start] = end
+            position = data.find(candidate, end)
+    lines = [data[start:ends[start]] for start in sorted(ends)]
+    for candidates in filters[1:]:
+        lines = [line for line in lines if any(candidate in line for candidate in candidates)]
+    return lines
+
+
+class _Block(NamedTuple):
+    offset: int
+    length: int
+    count: int
+    first: float
+    last: float
+    failures: int
+
+
+class _Segment:
+    """history-<번호>.dat 하나의 블록 목록과 PC -> 블록 번호 색인"""
+
+    __slots__ = ("number", "path", "index_path", "index_size", "blocks", "hosts")
+
+    def __init__(self, directory: str, number: int):
+        self.number = number
+        self.path = os.path.join(directory, f"history-{number:06d}.dat")
+        self.index_path = os.path.join(directory, f"history-{number:06d}.idx")
+        self.index_size = 0  # 읽은 색인 파일 크기 (다음에는 그 뒤만 읽는다)
+        self.blocks: list[_Block] = []
+        self.hosts: dict[str, list[int]] = {}
+
+
+class WakeHistory:
+    """
+    directory에 전송 기록을 남긴다 (폴더는 처음 기록할 때 만든다)
+    - record()와 recent()는 어느 스레드에서나 호출할 수 있고 디스크를 기다리지 않는다
+    - query()는 디스크의 기록과 아직 쓰지 않은 기록을 함께 찾는다
+    - 쓰기에 실패하면 그 블록은 버리고 error에 마지막 오류를 남긴다 (전송은 계속된다)
+    """
+
+    def __init__(self, directory: str, ring_size: int = RING_SIZE, flush_interval: float = FLUSH_INTERVAL,
+                 block_records: int = BLOCK_RECORDS, max_segment_bytes: int = MAX_SEGMENT_BYTES,
+                 max_segments: int = MAX_SEGMENTS):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.block_records = block_records
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segments = max_segments
+        self.error: OSError | None = None
+        self._recent: deque[WakeRecord] = deque(maxlen=ring_size)
+        self._pending: list[WakeRecord] = []
+        # record()는 _condition만, 쓰기와 조회는 _index_lock을 잡는다 (기록이 디스크 쓰기를 기다리지 않음)
+        self._condition = threading.Condition()
+        self._index_lock = threading.Lock()
+        self._segments: dict[int, _Segment] = {}
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+    def record(self, name: str, mac: str, ip: str, result: str, error: Any = None, latency: float | None = None,
+               source: str = "", user: str = "") -> WakeRecord:
+        entry = WakeRecord(name, mac, ip, result, None if error is None else str(error), latency, source, user)
+        with self._condition:
+            if self._closed:
+                raise ValueError("History is closed")
+            self._recent.append(entry)
+            self._pending.append(entry)
+            if len(self._pending) == 1 or len(self._pending) >= self.block_records:
+                self._condition.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="wol-history", daemon=True)
+                self._thread.start()
+        return entry
+
+    def recent(self, limit: int | None = None) -> list[WakeRecord]:
+        """메모리에 있는 최근 기록 (최신순)"""
+        with self._condition:
+            records = list(self._recent)
+        records.reverse()
+        return records if limit is None else records[:limit]
+
+    def query(self, host: str | None = None, since: float | None = None, until: float | None = None,
+              failed: bool = False, limit: int | None = 50) -> list[WakeRecord]:
+        """
+        조건에 맞는 기록 (최신순, 최대 limit개)
+        - host: PC 이름 또는 MAC (구분자 무관), since/until: time.time() 기준 시각, failed: 실패만
+        """
+        keys = None if not host else {f"name:{host}", f"mac:{normalize_mac(host)}"}
+        # 블록의 줄은 필터마다 후보 중 하나를 포함할 때만 JSON으로 푼다
+        filters = []
+        if host:
+            filters.append((f'"name": {_ENCODER.encode(host)}'.encode(), f'"mac": "{format_mac(host)}"'.encode()))
+        if failed:
+            filters.append(tuple(f'"result": "{result}"'.encode() for result in FAILURES))
+
+        def matches(record: WakeRecord) -> bool:
+            return ((keys is None or not keys.isdisjoint(record.keys()))
+                    and (since is None or record.time >= since)
+                    and (until is None or record.time <= until)
+                    and (not failed or record.failed))
+
+        results = []
+        with self._index_lock:
+            # 쓰는 중인 블록은 _index_lock을 잡고 있으므로 아직 쓰지 않은 기록과 겹치지 않는다
+            with self._condition:
+                unwritten = list(self._pending)
+            for record in reversed(unwritten):
+                if matches(record):
+                    results.append(record)
+                    if limit is not None and len(results) >= limit:
+                        return results
+            self._refresh()
+            for segment in sorted(self._segments.values(), key=lambda segment: -segment.number):
+                if keys is None:
+                    positions = range(len(segment.blocks) - 1, -1, -1)
+                else:
+                    positions = sorted({position for key in keys for position in segment.hosts.get(key, ())},
+                                       reverse=True)
+                for position in positions:
+                    block = segment.blocks[position]
+                    if ((since is not None and block.last < since) or (until is not None and block.first > until)
+                            or (failed and not block.failures)):
+                        continue
+                    for record in reversed(self._read_block(segment, block, filters)):
+                        if matches(record):
+                            results.append(record)
+                            if limit is not None and len(results) >= limit:
+                                return results
+        return results
+
+    def flush(self):
+        """아직 쓰지 않은 기록을 지금 쓴다"""
+        self._write_pending()
+
+    def close(self):
+        """남은 기록을 쓰고 기록 스레드를 끝낸다"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+        else:
+            self._write_pending()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # 쓰기 (기록 스레드)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                # 첫 기록 뒤 flush_interval 동안 더 모아서 한 블록으로
+                if not self._closed and len(self._pending) < self.block_records:
+                    self._condition.wait(self.flush_interval)
+                closed = self._closed
+            self._write_pending()
+            if closed:
+                return
+
+    def _write_pending(self):
+        with self._index_lock:
+            with self._condition:
+                batch, self._pending = self._pending, []
+            for start in range(0, len(batch), self.block_records):
+                try:
+                    self._write_block(batch[start:start + self.block_records])
+                except OSError as e:
+                    self.error = e
+
+    def _write_block(self, records: list[WakeRecord]):
+        # _index_lock을 잡은 상태에서 호출
+        lines = "".join(record.to_json() + "\n" for record in records)
+        data = zlib.compress(lines.encode("utf-8"))
+        times = [record.time for record in records]
+        entry = {
+            "length": len(data), "count": len(records), "first": min(times), "last": max(times),
+            "failures": sum(1 for record in records if record.failed),
+            "hosts": sorted({key for record in records for key in record.keys()}),
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        with locked(os.path.join(self.directory, "history")):
+            segment = _Segment(self.directory, self._writable_segment(len(data)))
+            with open(segment.path, "ab") as f:
+                entry["offset"] = f.tell()
+                f.write(data)
+            # 색인 줄은 데이터를 쓴 뒤에 추가 (중간에 종료되면 색인 없는 블록만 남는다)
+            with open(segment.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _writable_segment(self, size: int) -> int:
+        # 잠금을 잡은 상태에서 호출: 마지막 파일 번호 (가득 찼으면 새 번호) 반환하고 오래된 파일 삭제
+        numbers = self._segment_numbers()
+        if not numbers:
+            return 1
+        number = numbers[-1]
+        current = _Segment(self.directory, number).path
+        if os.path.getsize(current) and os.path.getsize(current) + size > self.max_segment_bytes:
+            number += 1
+            numbers.append(number)
+        for old in numbers[:-self.max_segments]:
+            segment = _Segment(self.directory, old)
+            for path in (segment.path, segment.index_path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        return number
+
+    def _segment_numbers(self) -> list[int]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(int(match.group(1)) for match in map(_SEGMENT_PATTERN.match, names) if match)
+
+    # 읽기 (_index_lock을 잡은 상태에서 호출)
+
+    def _refresh(self):
+        """지워진 파일은 색인에서 빼고, 색인 파일에 새로 추가된 줄만 읽는다"""
+        numbers = self._segment_numbers()
+        for number in set(self._segments) - set(numbers):
+            del self._segments[number]
+        for number in numbers:
+            segment = self._segments.get(number)
+            if segment is None:
+                segment = self._segments[number] = _Segment(self.directory, number)
+            try:
+                with open(segment.index_path, "rb") as f:
+                    f.seek(segment.index_size)
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+            # 쓰는 중인 마지막 줄은 다음에 읽는다
+            data = data[:data.rfind(b"\n") + 1]
+            segment.index_size += len(data)
+            for line in data.splitlines():
+                try:
+                    entry = json.loads(line)
+                    block = _Block(entry["offset"], entry["length"], entry["count"], entry["first"], entry["last"],
+                                   entry["failures"])
+                except (ValueError, KeyError, TypeError):
+                    continue
+                position = len(segment.blocks)
+                segment.blocks.append(block)
+                for key in entry.get("hosts", ()):
+                    segment.hosts.setdefault(key, []).append(position)
+
+    def _read_block(self, segment: _Segment, block: _Block, filters: list[tuple[bytes, ...]]) -> list[WakeRecord]:
+        try:
+            with open(segment.path, "rb") as f:
+                f.seek(block.offset)
+                data = zlib.decompress(f.read(block.length))
+            return [WakeRecord.from_dict(json.loads(line)) for line in _filter_lines(data, filters)]
+        except (OSError, zlib.error, ValueError):
+            # 지워졌거나 손상된 블록은 건너뛴다
+            return []
@@ -0,0 +1,71 @@
+"""
+검증을 마친 PC의 전송용 레코드
+
+PC 목록의 dict는 표시/저장용 자유 형식 문자열이라 전송할 때마다 정규식 검사와 MAC 파싱이 필요했다.
+Host는 dict에서 한 번만 만들어서 PC가 바뀔 때까지 재사용한다 (Inventory.host).
+MAC은 48비트 정수, IPv4는 4바이트로 저장하고 102바이트 매직 패킷을 미리 만들어 두므로
+전송 경로에서는 문자열 작업 없이 버퍼만 보낸다.
+"""
+from validators import validate_ip_address, validate_pc
+
+MAGIC_PACKET_SIZE = 102
+_SYNC_STREAM = b"\xff" * 6
+
+
+class HostError(ValueError):
+    """PC 정보가 유효하지 않음. key는 잘못된 필드의 키"""
+
+    def __init__(self, key: str):
+        super().__init__(f"Invalid {key}")
+        self.key = key
+
+
+def magic_packet(mac: int) -> bytes:
+    """48비트 정수 MAC의 매직 패킷 (FF x 6 + MAC x 16)"""
+    return _SYNC_STREAM + mac.to_bytes(6, "big") * 16
+
+def pack_ip(ip: str) -> bytes:
+    # validate_ip_address를 통과한 문자열 (앞의 0은 8진수가 아니라 10진수로 읽는다)
+    return bytes(int(part) for part in ip.split("."))
+
+
+class Host:
+    """
+    PC 하나의 전송 정보
+    - mac: 48비트 정수, ip: 4바이트 (DDNS만 있고 아직 조회하지 못했으면 None), port: 정수
+    - packet: 미리 만든 매직 패킷
+    """
+
+    __slots__ = ("mac", "ip", "port", "packet")
+
+    def __init__(self, mac: int, ip: bytes | None, port: int, packet: bytes | None = None):
+        self.mac = mac
+        self.ip = ip
+        self.port = port
+        self.packet = packet or magic_packet(mac)
+
+    @classmethod
+    def from_pc(cls, pc: dict) -> "Host":
+        """pc를 validate_pc로 한 번 검증하고 변환. 유효하지 않으면 HostError"""
+        ip = pc.get("ip", "")
+        # DDNS만 있는 PC는 IP 없이 만들고 전송할 때 with_ip로 조회한 IP를 넣는다
+        unresolved = ip == "" and pc.get("ddns", "") != ""
+        is_valid, key = validate_pc({**pc, "ip": "0.0.0.0"} if unresolved else pc)
+        if not is_valid:
+            raise HostError(key)
+        mac = int(pc["mac"].replace(":", "").replace("-", ""), 16)
+        return cls(mac, None if unresolved else pack_ip(ip), int(pc["port"]))
+
+    @property
+    def ip_address(self) -> str:
+        """점으로 구분한 IPv4 주소 (IP가 없으면 "")"""
+        return "" if self.ip is None else ".".join(map(str, self.ip))
+
+    def with_ip(self, ip: str) -> "Host":
+        """IP만 바꾼 레코드 (매직 패킷은 공유). DDNS로 조회한 IP가 잘못되었으면 HostError"""
+        if not validate_ip_address(ip):
+            raise HostError("ip")
+        return Host(self.mac, pack_ip(ip), self.port, self.packet)
+
+    def __repr__(self) -> str:
+        return f"Host(mac={self.mac:012X}, ip={self.ip_address!r}, port={self.port})"
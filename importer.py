@@ -0,0 +1,277 @@
+"""
+PC 목록 대량 가져오기 (CSV, JSON Lines, PCList.json, DHCP 임대 파일, ARP 캐시)
+
+파일은 한 줄씩 읽는 제너레이터로 처리해서 크기와 상관없이 메모리 사용량이 일정하다
+(dhcpd.leases는 같은 주소의 임대가 계속 덧붙는 기록이므로 주소마다 마지막 임대만 모아 둔다).
+파싱 -> 정규화 -> 행마다 검증/중복 검사 -> inventory 반영 순서로 진행하고,
+저장은 호출하는 쪽에서 한 번만 한다 (SQLite는 한 트랜잭션, json은 한 번의 원자적 쓰기).
+"""
+from typing import Iterable, Iterator, TextIO
+import csv
+import json
+import os
+import time
+
+from inventory import FIELD_LABELS, Inventory, normalize_mac
+from packet_sender import DEFAULT_POLICY
+from validators import validate_ddns_address, validate_pc
+
+FORMATS = ("csv", "jsonl", "json", "dhcpd", "dnsmasq", "arp")
+# 거부된 행은 이 개수까지만 자세히 기록 (개수는 모두 센다)
+MAX_REJECTED_DETAILS = 1000
+
+# CSV 헤더의 다른 이름
+COLUMN_ALIASES = {
+    "hostname": "name",
+    "host": "name",
+    "ip_address": "ip",
+    "address": "ip",
+    "mac_address": "mac",
+    "hwaddr": "mac",
+    "iface": "interface",
+    "netmask": "subnet",
+    "cidr": "subnet",
+}
+
+# (줄 번호, 원본 값)
+Row = tuple[int, dict]
+
+
+class ImportResult:
+    def __init__(self):
+        self.rows = 0
+        self.added = 0
+        self.updated = 0
+        self.rejected = 0
+        self.rejected_rows: list[tuple[int, str, dict]] = []  # (줄 번호, 사유, 원본 값)
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    def reject(self, line_no: int, reason: str, row: dict):
+        self.rejected += 1
+        if len(self.rejected_rows) < MAX_REJECTED_DETAILS:
+            self.rejected_rows.append((line_no, reason, row))
+
+
+def detect_format(path: str) -> str:
+    name = os.path.basename(path).lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if name.endswith(".json"):
+        return "json"
+    if "dhcpd" in name and name.endswith(".leases"):
+        return "dhcpd"
+    if name.endswith(".leases"):
+        return "dnsmasq"
+    if name == "arp":
+        return "arp"
+    raise ValueError(f"Cannot detect file format of '{path}'. Use one of: {', '.join(FORMATS)}")
+
+def parse_csv(f: TextIO) -> Iterator[Row]:
+    reader = csv.DictReader(f)
+    if reader.fieldnames:
+        reader.fieldnames = [
+            COLUMN_ALIASES.get(column.strip().lower(), column.strip().lower()) for column in reader.fieldnames
+        ]
+    for row in reader:
+        # 헤더가 1번 줄이므로 데이터는 2번 줄부터
+        yield reader.line_num, {key: value for key, value in row.items() if key is not None}
+
+def parse_jsonl(f: TextIO) -> Iterator[Row]:
+    for line_no, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, {"_error": f"Invalid JSON: {e.msg}"}
+            continue
+        yield line_no, row if isinstance(row, dict) else {"_error": "Not a JSON object"}
+
+def parse_json(f: TextIO) -> Iterator[Row]:
+    # PCList.json 형식은 한 번에 읽어야 한다 (스트리밍 아님)
+    data = json.load(f)
+    if not isinstance(data, dict) or not isinstance(data.get("pc_list", []), list):
+        raise ValueError('Not a PC list file (expected a JSON object with a "pc_list" list)')
+    for index, row in enumerate(data.get("pc_list", []), 1):
+        yield index, row if isinstance(row, dict) else {"_error": "Not a JSON object"}
+
+def parse_dhcpd_leases(f: TextIO) -> Iterator[Row]:
+    """
+    ISC dhcpd.leases: lease <ip> { binding state active; hardware ethernet <mac>; client-hostname "<name>"; }
+    - 임대가 바뀔 때마다 블록이 덧붙으므로 IP마다 마지막 블록, MAC마다 마지막 임대만 사용한다
+    - binding state가 active가 아닌(free, expired, released 등) 임대는 건너뛴다. 없으면 active로 본다 (오래된 형식)
+    """
+    leases = {}  # ip -> (줄 번호, 임대). 나중에 나온 블록이 뒤로 가도록 지우고 다시 넣는다
+    lease = None
+    lease_line = 0
+    for line_no, line in enumerate(f, 1):
+        line = line.strip()
+        if line.startswith("lease ") and line.endswith("{"):
+            lease = {"ip": line.split()[1]}
+            lease_line = line_no
+        elif lease is None:
+            continue
+        elif line.startswith("binding state "):
+            lease["_state"] = line[len("binding state "):].rstrip(";").strip()
+        elif line.startswith("hardware ethernet "):
+            lease["mac"] = line[len("hardware ethernet "):].rstrip(";").strip()
+        elif line.startswith("client-hostname "):
+            lease["name"] = line[len("client-hostname "):].rstrip(";").strip().strip('"')
+        elif line == "}":
+            leases.pop(lease["ip"], None)
+            leases[lease["ip"]] = (lease_line, lease)
+            lease = None
+
+    active = {}  # MAC -> (줄 번호, 임대)
+    for lease_line, lease in leases.values():
+        if lease.pop("_state", "active") != "active":
+            continue
+        key = normalize_mac(lease.get("mac", "")) or lease["ip"]
+        active.pop(key, None)
+        active[key] = (lease_line, lease)
+    yield from active.values()
+
+def parse_dnsmasq_leases(f: TextIO) -> Iterator[Row]:
+    """dnsmasq.leases: <만료 시각> <mac> <ip> <hostname|*> <client-id>"""
+    for line_no, line in enumerate(f, 1):
+        parts = line.split()
+        if len(parts) < 4:
+            continue
+        row = {"mac": parts[1], "ip": parts[2]}
+        if parts[3] != "*":
+            row["name"] = parts[3]
+        yield line_no, row
+
+def parse_arp_cache(f: TextIO) -> Iterator[Row]:
+    """/proc/net/arp: IP address, HW type, Flags, HW address, Mask, Device"""
+    for line_no, line in enumerate(f, 1):
+        parts = line.split()
+        if line_no == 1 or len(parts) < 4:
+            continue
+        # 응답이 없는 항목(Flags 0x0)은 MAC이 00:00:00:00:00:00
+        if parts[2] == "0x0" or parts[3] == "00:00:00:00:00:00":
+            continue
+        yield line_no, {"ip": parts[0], "mac": parts[3]}
+
+PARSERS = {
+    "csv": parse_csv,
+    "jsonl": parse_jsonl,
+    "json": parse_json,
+    "dhcpd": parse_dhcpd_leases,
+    "dnsmasq": parse_dnsmasq_leases,
+    "arp": parse_arp_cache,
+}
+
+def normalize_groups(value):
+    """그룹 이름 목록 (CSV는 쉼표로 구분한 문자열). 목록이나 문자열이 아니면 그대로 반환 (check_row가 거부)"""
+    if isinstance(value, str):
+        value = value.split(",")
+    elif not isinstance(value, list):
+        return value
+    return list(dict.fromkeys(str(name).strip() for name in value if str(name).strip()))
+
+def normalize_rows(rows: Iterable[Row]) -> Iterator[tuple[int, dict, dict]]:
+    """
+    원본 값을 PC 형식으로 변환해서 (줄 번호, pc, 원본 값) 반환. 이름이 없으면 IP(또는 DDNS)를 이름으로 사용
+    - groups와 send_policy는 값이 있을 때만 넣는다 (PCList.json을 다시 가져와도 유지)
+    """
+    for line_no, row in rows:
+        pc = {
+            "name": str(row.get("name") or "").strip(),
+            "ip": str(row.get("ip") or "").strip(),
+            "ddns": str(row.get("ddns") or "").strip(),
+            "mac": str(row.get("mac") or "").strip(),
+            "port": row.get("port") or 9,
+            "interface": str(row.get("interface") or "").strip(),
+            "subnet": str(row.get("subnet") or "").strip(),
+        }
+        if row.get("groups"):
+            pc["groups"] = normalize_groups(row["groups"])
+        if row.get("send_policy"):
+            pc["send_policy"] = row["send_policy"]
+        if not pc["name"]:
+            pc["name"] = pc["ip"] or pc["ddns"]
+        yield line_no, pc, row
+
+def check_row(pc: dict, row: dict) -> str:
+    """가져올 수 없는 행이면 거부 사유, 문제가 없으면 빈 문자열"""
+    if "_error" in row:
+        return row["_error"]
+    if not pc["name"]:
+        return f"{FIELD_LABELS['name']} is required"
+    # JSON 행은 목록/객체가 올 수 있다 (validate_port_number는 int()로 변환할 수 있는 값만 받는다)
+    if isinstance(pc["port"], bool) or not isinstance(pc["port"], (int, str)):
+        return f"Invalid {FIELD_LABELS['port']}"
+    if not isinstance(pc.get("groups", []), list):
+        return f"Invalid {FIELD_LABELS['groups']}"
+    if "send_policy" in pc:
+        if not isinstance(pc["send_policy"], dict):
+            return "Invalid send policy: must be an object"
+        try:
+            DEFAULT_POLICY.override(pc["send_policy"])
+        except ValueError as e:
+            return str(e)
+    if pc["ddns"]:
+        if not validate_ddns_address(pc["ddns"]):
+            return f"Invalid {FIELD_LABELS['ddns']}"
+        # ddns만 있는 PC는 ip 검증을 건너뛴다 (조회는 나중에)
+        is_valid, key = validate_pc({**pc, "ip": pc["ip"] or "0.0.0.0"})
+    else:
+        is_valid, key = validate_pc(pc)
+    if not is_valid:
+        return f"Invalid {FIELD_LABELS[key]}"
+    return ""
+
+def import_rows(inventory: Inventory, rows: Iterable[Row], update_existing: bool = False) -> ImportResult:
+    """
+    rows를 검증해서 inventory에 추가
+    - name 또는 MAC이 이미 있는 PC는 거부. update_existing=True면 같은 MAC의 PC를 갱신
+    - 저장은 하지 않는다 (호출하는 쪽에서 storage.save로 한 번에 기록)
+    """
+    result = ImportResult()
+    start = time.perf_counter()
+    for line_no, pc, row in normalize_rows(rows):
+        result.rows += 1
+        reason = check_row(pc, row)
+        if reason:
+            result.reject(line_no, reason, row)
+            continue
+        pc["port"] = int(pc["port"])
+
+        existing_id = inventory.find_by_mac(pc["mac"])
+        if existing_id is not None and update_existing:
+            # 파일에 값이 있는 필드만 갱신 (이름이 없던 행은 기존 이름 유지)
+            changes = {key: pc[key] for key in ("ip", "ddns", "interface", "subnet", "groups", "send_policy")
+                       if row.get(key)}
+            if row.get("port"):
+                changes["port"] = pc["port"]
+            if row.get("name") and not inventory.find_conflict({"name": pc["name"]}, ignore_id=existing_id):
+                changes["name"] = pc["name"]
+            record = inventory.get(existing_id)
+            if any(record.get(key) != value for key, value in changes.items()):
+                inventory.update(existing_id, {**record, **changes})
+                result.updated += 1
+            continue
+
+        conflict_key = inventory.find_conflict(pc)
+        if conflict_key:
+            result.reject(line_no, f"Duplicate {FIELD_LABELS[conflict_key]}", row)
+            continue
+        inventory.add(pc)
+        result.added += 1
+    result.elapsed = time.perf_counter() - start
+    return result
+
+def import_file(inventory: Inventory, path: str, file_format: str | None = None,
+                update_existing: bool = False) -> ImportResult:
+    file_format = file_format or detect_format(path)
+    parser = PARSERS[file_format]
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return import_rows(inventory, parser(f), update_existing=update_existing)
@@ -0,0 +1,141 @@
+"""
+네트워크 인터페이스 조회와 인터페이스별 전송 소켓
+
+여러 VLAN에 NIC가 하나씩 있는 서버에서 기본 경로가 아닌 인터페이스로 보내기 위해 사용한다.
+- Linux: ioctl로 인터페이스별 IPv4 주소/넷마스크를 읽고, SO_BINDTODEVICE로 소켓을 인터페이스에 묶는다
+- 그 외: 호스트 이름의 주소 목록만 사용하고 (넷마스크 없음), 출발지 주소로 bind한다
+"""
+import ipaddress
+import socket
+import struct
+import sys
+import time
+
+# 인터페이스 목록을 다시 읽기 전까지 재사용하는 시간(초)
+CACHE_TTL = 30.0
+# 모든 관련 인터페이스로 보내라는 뜻의 interface 값
+ALL_INTERFACES = "*"
+
+# linux/sockios.h
+SIOCGIFFLAGS = 0x8913
+SIOCGIFADDR = 0x8915
+SIOCGIFNETMASK = 0x891B
+IFF_UP = 0x1
+IFF_LOOPBACK = 0x8
+
+
+class Interface:
+    def __init__(self, name: str, address: str, prefix_length: int | None = None, loopback: bool = False):
+        self.name = name
+        self.address = address
+        self.prefix_length = prefix_length  # 알 수 없으면 None
+        self.loopback = loopback
+
+    @property
+    def network(self) -> ipaddress.IPv4Network | None:
+        if self.prefix_length is None:
+            return None
+        return ipaddress.IPv4Network(f"{self.address}/{self.prefix_length}", strict=False)
+
+    @property
+    def broadcast(self) -> str | None:
+        network = self.network
+        if network is None or network.prefixlen >= 31:
+            return None
+        return str(network.broadcast_address)
+
+    def __repr__(self) -> str:
+        prefix = f"/{self.prefix_length}" if self.prefix_length is not None else ""
+        return f"Interface({self.name!r}, {self.address}{prefix})"
+
+
+def _ioctl_address(sock: socket.socket, request: int, name: str) -> str:
+    import fcntl
+    result = fcntl.ioctl(sock.fileno(), request, struct.pack("256s", name.encode()[:15]))
+    return socket.inet_ntoa(result[20:24])
+
+def _list_linux_interfaces() -> list[Interface]:
+    import fcntl
+    interfaces = []
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        for _, name in socket.if_nameindex():
+            try:
+                flags = struct.unpack("H", fcntl.ioctl(sock.fileno(), SIOCGIFFLAGS,
+                                                       struct.pack("256s", name.encode()[:15]))[16:18])[0]
+                if not flags & IFF_UP:
+                    continue
+                address = _ioctl_address(sock, SIOCGIFADDR, name)
+                netmask = _ioctl_address(sock, SIOCGIFNETMASK, name)
+            except OSError:
+                # IPv4 주소가 없는 인터페이스
+                continue
+            prefix_length = ipaddress.IPv4Network(f"0.0.0.0/{netmask}").prefixlen
+            interfaces.append(Interface(name, address, prefix_length, bool(flags & IFF_LOOPBACK)))
+    return interfaces
+
+def _list_host_addresses() -> list[Interface]:
+    try:
+        infos = socket.getaddrinfo(socket.gethostname(), None, socket.AF_INET)
+    except OSError:
+        return []
+    addresses = dict.fromkeys(info[4][0] for info in infos)
+    return [Interface(address, address, None, address.startswith("127.")) for address in addresses]
+
+_cache: tuple[float, list[Interface]] | None = None
+
+def list_interfaces(refresh: bool = False) -> list[Interface]:
+    """IPv4 주소가 있는 켜진 인터페이스 목록 (CACHE_TTL초 동안 재사용)"""
+    global _cache
+    now = time.monotonic()
+    if refresh or _cache is None or now - _cache[0] > CACHE_TTL:
+        interfaces = _list_linux_interfaces() if sys.platform.startswith("linux") else _list_host_addresses()
+        _cache = (now, interfaces)
+    return _cache[1]
+
+def find_interface(value: str) -> Interface | None:
+    """이름(eth1) 또는 주소(192.168.10.2)로 인터페이스 찾기"""
+    for interface in list_interfaces():
+        if value in (interface.name, interface.address):
+            return interface
+    return None
+
+def interfaces_for(ip_address: str) -> list[Interface]:
+    """ip가 직접 연결된 서브넷에 있는 인터페이스 목록 (루프백 제외)"""
+    address = ipaddress.IPv4Address(ip_address)
+    return [
+        interface for interface in list_interfaces()
+        if not interface.loopback and interface.network is not None and address in interface.network
+    ]
+
+def open_interface_socket(interface: str = "") -> socket.socket:
+    """
+    interface(이름 또는 주소)로 나가는 브로드캐스트 UDP 소켓
+    - 빈 문자열이면 OS 기본 경로
+    - 이름은 SO_BINDTODEVICE로 묶는다. 권한이 없으면 그 인터페이스의 주소로 bind
+    - 찾을 수 없는 인터페이스면 OSError
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+    if not interface:
+        return sock
+    try:
+        try:
+            ipaddress.IPv4Address(interface)
+            address = interface
+        except ValueError:
+            found = find_interface(interface)
+            if found is None:
+                raise OSError(f"Unknown interface: {interface}")
+            address = found.address
+            if hasattr(socket, "SO_BINDTODEVICE"):
+                try:
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BINDTODEVICE, interface.encode())
+                    return sock
+                except PermissionError:
+                    # CAP_NET_RAW가 없으면 출발지 주소로만 지정
+                    pass
+        sock.bind((address, 0))
+        return sock
+    except OSError:
+        sock.close()
+        raise
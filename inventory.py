@@ -0,0 +1,236 @@
+from itertools import islice
+from typing import Iterable, Iterator
+
+from hosts import Host, HostError
+from search import SearchIndex
+
+# pc_list와 json에 저장할 항목들
+JSON_KEYS = ["name", "ip", "ddns", "mac", "port", "interface", "subnet", "groups"]
+FIELD_LABELS = {
+    "name": "PC Name",
+    "ip": "IP Address",
+    "ddns": "DDNS Address",
+    "mac": "MAC Address",
+    "port": "Port Number",
+    "interface": "Interface",
+    "subnet": "Subnet",
+    "groups": "Groups"
+}
+# 비워 둘 수 있는 항목 (이전 버전의 파일에는 없을 수 있으므로 pc.get으로 읽는다)
+# - interface: 보낼 인터페이스 이름 또는 주소, subnet: 넷마스크 또는 CIDR (서브넷 브로드캐스트 계산용)
+# - groups: 그룹 이름 목록 (그룹 단위 깨우기와 릴레이의 그룹 선택용, wake_groups 참고)
+OPTIONAL_KEYS = ("interface", "subnet", "groups")
+
+
+def normalize_mac(mac: str) -> str:
+    """구분자(:, -)를 없애고 대문자로 통일한 MAC 주소 (색인 키로 사용)"""
+    return str(mac).replace(":", "").replace("-", "").upper()
+
+
+class Inventory:
+    """
+    PC 목록을 id로 관리하는 메모리 모델
+    - 각 PC에는 추가될 때 고정 id가 부여된다 (json에는 저장하지 않음)
+    - name, MAC, IP, DDNS 색인으로 O(1) 조회와 중복 검사
+    - 기존 파일에 중복된 항목이 있어도 그대로 불러온다
+      (색인 값은 id 하나, 같은 값이 여러 개일 때만 id의 집합. PC마다 집합을 만들지 않아 메모리 절약)
+    - 마지막 저장 이후 바뀐/삭제된 id를 기록해서 바뀐 것이 있을 때만 저장한다
+    - host(pc_id)는 검증을 마친 전송용 레코드(Host)를 PC가 바뀔 때까지 캐시한다
+    - search(query)의 색인은 처음 검색할 때 만들고 이후에는 바뀐 PC만 갱신한다
+    - version은 PC가 추가/수정/삭제될 때마다 증가 (정렬 결과 등의 캐시 확인용)
+    """
+
+    INDEXED_KEYS = ("name", "mac", "ip", "ddns")
+
+    def __init__(self, pc_list: Iterable[dict] = ()):
+        self._records: dict[int, dict] = {}  # 삽입 순서 = 표시 순서
+        self._indexes: dict[str, dict[str, int | set[int]]] = {key: {} for key in self.INDEXED_KEYS}
+        self._hosts: dict[int, Host | HostError] = {}
+        self._search: SearchIndex | None = None
+        self.version = 0
+        self._next_id = 1
+        self._changed: set[int] = set()
+        self._removed: set[int] = set()
+        for pc in pc_list:
+            self.add(pc)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self._records.values())
+
+    def __contains__(self, pc_id: int) -> bool:
+        return pc_id in self._records
+
+    def ids(self) -> list[int]:
+        return list(self._records)
+
+    def items(self) -> Iterable[tuple[int, dict]]:
+        return self._records.items()
+
+    def get(self, pc_id: int) -> dict:
+        return self._records[pc_id]
+
+    def slice(self, start: int, stop: int) -> list[int]:
+        """표시 순서 기준 start ~ stop-1 번째 PC의 id"""
+        return list(islice(self._records, start, stop))
+
+    def to_list(self) -> list[dict]:
+        return list(self._records.values())
+
+    def host(self, pc_id: int) -> Host:
+        """
+        pc_id의 전송용 레코드. 처음 요청할 때 한 번 검증해서 만들고 PC가 바뀔 때까지 재사용
+        - 유효하지 않은 PC는 HostError (잘못된 필드의 키는 e.key)
+        """
+        host = self._hosts.get(pc_id)
+        if host is None:
+            try:
+                host = Host.from_pc(self._records[pc_id])
+            except HostError as e:
+                host = e
+            self._hosts[pc_id] = host
+        if isinstance(host, HostError):
+            raise host
+        return host
+
+    def search(self, query: str) -> list[int]:
+        """name, IP, DDNS, MAC에 query가 포함된 PC의 id 목록 (표시 순서, 대소문자 무시)"""
+        if self._search is None:
+            self._search = SearchIndex(self._records.items())
+        return self._search.search(query)
+
+    def add(self, pc: dict, pc_id: int | None = None) -> int:
+        """pc를 추가하고 id 반환 (저장소에서 불러올 때는 저장된 id를 지정)"""
+        if pc_id is None:
+            pc_id = self._next_id
+        elif pc_id in self._records:
+            raise ValueError(f"Duplicate pc id: {pc_id}")
+        self._next_id = max(self._next_id, pc_id + 1)
+        self._records[pc_id] = pc
+        self._index(pc_id, pc)
+        self._touch(pc_id)
+        self._removed.discard(pc_id)
+        return pc_id
+
+    def update(self, pc_id: int, pc: dict):
+        """pc_id의 내용을 pc로 교체 (같은 dict 객체를 수정하므로 참조가 유지된다)"""
+        record = self._records[pc_id]
+        self._unindex(pc_id, record)
+        record.clear()
+        record.update(pc)
+        self._index(pc_id, record)
+        self._touch(pc_id)
+
+    def set_field(self, pc_id: int, key: str, value):
+        record = self._records[pc_id]
+        self._unindex(pc_id, record)
+        record[key] = value
+        self._index(pc_id, record)
+        self._touch(pc_id)
+
+    def remove(self, pc_id: int) -> dict:
+        record = self._records.pop(pc_id)
+        self._unindex(pc_id, record)
+        self._hosts.pop(pc_id, None)
+        if self._search is not None:
+            self._search.remove(pc_id)
+        self.version += 1
+        self._changed.discard(pc_id)
+        self._removed.add(pc_id)
+        return record
+
+    def _touch(self, pc_id: int):
+        # 추가/수정된 PC의 캐시와 검색 색인 갱신
+        self._hosts.pop(pc_id, None)
+        if self._search is not None:
+            self._search.set(pc_id, self._records[pc_id])
+        self.version += 1
+        self._changed.add(pc_id)
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self._changed or self._removed)
+
+    def take_changes(self) -> tuple[set[int], set[int]]:
+        """마지막 호출 이후 (바뀐 id, 삭제된 id)를 반환하고 기록을 비운다"""
+        changes = (self._changed, self._removed)
+        self._changed, self._removed = set(), set()
+        return changes
+
+    def restore_changes(self, changed: set[int], removed: set[int]):
+        """저장에 실패했을 때 take_changes()로 가져간 기록을 되돌린다"""
+        self._changed |= {pc_id for pc_id in changed if pc_id in self._records}
+        self._removed |= {pc_id for pc_id in removed if pc_id not in self._records}
+
+    def find(self, key: str, value) -> list[int]:
+        """색인된 필드(name, mac, ip, ddns) 값이 같은 PC의 id 목록"""
+        return sorted(self._ids(key, self._index_key(key, value)))
+
+    def find_by_name(self, name: str) -> int | None:
+        ids = self.find("name", name)
+        return ids[0] if ids else None
+
+    def find_by_mac(self, mac: str) -> int | None:
+        ids = self.find("mac", mac)
+        return ids[0] if ids else None
+
+    def find_by_ip(self, ip: str) -> list[int]:
+        # 같은 공인 IP 뒤에 여러 PC가 있을 수 있으므로 목록으로 반환
+        return self.find("ip", ip)
+
+    def find_by_ddns(self, ddns: str) -> list[int]:
+        return self.find("ddns", ddns)
+
+    def find_conflict(self, pc: dict, ignore_id: int | None = None) -> str:
+        """
+        name 또는 MAC이 다른 PC와 겹치면 해당 필드의 키, 겹치지 않으면 ""
+        - ignore_id: 편집 중인 PC 자신은 제외
+        """
+        for key in ("name", "mac"):
+            ids = self._ids(key, self._index_key(key, pc.get(key, "")))
+            if any(pc_id != ignore_id for pc_id in ids):
+                return key
+        return ""
+
+    def _index_key(self, key: str, value) -> str:
+        return normalize_mac(value) if key == "mac" else str(value)
+
+    def _ids(self, key: str, index_key: str) -> Iterable[int]:
+        ids = self._indexes[key].get(index_key, ())
+        return (ids,) if isinstance(ids, int) else ids
+
+    def _index(self, pc_id: int, pc: dict):
+        for key in self.INDEXED_KEYS:
+            value = pc.get(key, "")
+            if value == "":
+                continue
+            index = self._indexes[key]
+            index_key = self._index_key(key, value)
+            ids = index.get(index_key)
+            if ids is None:
+                index[index_key] = pc_id
+            elif isinstance(ids, int):
+                if ids != pc_id:
+                    index[index_key] = {ids, pc_id}
+            else:
+                ids.add(pc_id)
+
+    def _unindex(self, pc_id: int, pc: dict):
+        for key in self.INDEXED_KEYS:
+            value = pc.get(key, "")
+            if value == "":
+                continue
+            index = self._indexes[key]
+            index_key = self._index_key(key, value)
+            ids = index.get(index_key)
+            if ids is None:
+                continue
+            if isinstance(ids, int):
+                if ids == pc_id:
+                    del index[index_key]
+                continue
+            ids.discard(pc_id)
+            if len(ids) == 1:
+                index[index_key] = ids.pop()
@@ -0,0 +1,183 @@
+"""
+전송, DNS 조회, 저장/불러오기의 카운터와 지연 시간 히스토그램
+
+- 이벤트: send(매직 패킷 전송), resolve(DNS 조회), save, load
+  이벤트마다 wol_<이벤트>_total, wol_<이벤트>_errors_total 카운터와 wol_<이벤트>_seconds 히스토그램
+- add_hook(callback)으로 이벤트마다 callback(event, fields)을 호출 (JsonLogHook은 JSON 한 줄씩 기록)
+- render_prometheus()는 Prometheus 텍스트 형식, serve()는 /metrics HTTP 엔드포인트
+- enable()하기 전에는 호출하는 쪽이 `if metrics.enabled:`만 확인하므로 비용이 거의 없다
+"""
+from typing import Any, Callable, TextIO
+import bisect
+import json
+import threading
+import time
+
+# 지연 시간 히스토그램의 구간 상한(초)
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+EVENTS = {
+    "send": "magic packet sends",
+    "resolve": "DNS lookups",
+    "save": "PC list saves",
+    "load": "PC list loads",
+}
+
+enabled = False
+
+Hook = Callable[[str, dict], None]
+_hooks: list[Hook] = []
+_lock = threading.Lock()
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter", f"{self.name} {self.value}"]
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 마지막은 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        # _lock을 잡은 상태에서 호출
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{self.name}_sum {self.sum}")
+        lines.append(f"{self.name}_count {self.count}")
+        return lines
+
+
+# 이벤트 -> (성공 카운터, 실패 카운터, 지연 시간)
+_metrics = {
+    event: (
+        Counter(f"wol_{event}_total", f"Number of {description}"),
+        Counter(f"wol_{event}_errors_total", f"Number of failed {description}"),
+        Histogram(f"wol_{event}_seconds", f"Latency of {description} in seconds"),
+    )
+    for event, description in EVENTS.items()
+}
+
+
+def enable():
+    global enabled
+    enabled = True
+
+def disable():
+    global enabled
+    enabled = False
+
+def reset():
+    """모든 값을 0으로 (벤치마크와 확인용)"""
+    with _lock:
+        for total, errors, latency in _metrics.values():
+            total.value = errors.value = 0
+            latency.counts = [0] * len(latency.counts)
+            latency.sum = 0.0
+            latency.count = 0
+
+def add_hook(hook: Hook):
+    """hook(event, fields)를 등록하고 수집을 켠다. fields에는 seconds, error와 이벤트별 값이 들어 있다"""
+    _hooks.append(hook)
+    enable()
+
+def remove_hook(hook: Hook):
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+def record(event: str, seconds: float, error: Any = None, **fields):
+    """
+    이벤트 하나를 기록 (enabled일 때만 호출한다)
+    - error: 실패하면 오류 (예외 또는 메시지), 성공하면 None
+    """
+    total, errors, latency = _metrics[event]
+    with _lock:
+        total.value += 1
+        if error is not None:
+            errors.value += 1
+        latency.observe(seconds)
+    if _hooks:
+        fields = {"seconds": seconds, "error": None if error is None else str(error), **fields}
+        for hook in list(_hooks):
+            try:
+                hook(event, fields)
+            except Exception:
+                # 훅의 오류가 전송이나 저장을 막지 않도록 무시
+                pass
+
+def snapshot() -> dict[str, dict]:
+    """이벤트별 {total, errors, seconds_sum, seconds_count}"""
+    with _lock:
+        return {
+            event: {"total": total.value, "errors": errors.value,
+                    "seconds_sum": latency.sum, "seconds_count": latency.count}
+            for event, (total, errors, latency) in _metrics.items()
+        }
+
+def render_prometheus() -> str:
+    lines = []
+    with _lock:
+        for total, errors, latency in _metrics.values():
+            lines += total.render() + errors.render() + latency.render()
+    return "\n".join(lines) + "\n"
+
+
+class JsonLogHook:
+    """이벤트를 JSON 한 줄씩 stream에 기록 ({"time", "event", "seconds", "error", ...})"""
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def __call__(self, event: str, fields: dict):
+        line = json.dumps({"time": time.time(), "event": event, **fields}, ensure_ascii=False, default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+def serve(host: str = "127.0.0.1", port: int = 9109):
+    """
+    GET /metrics에 Prometheus 텍스트를 응답하는 HTTP 서버를 데몬 스레드로 시작하고 반환 (shutdown()으로 종료)
+    - 수집도 함께 켠다. 포트를 열 수 없으면 OSError
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # 요청마다 stderr에 기록하지 않음
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="wol-metrics", daemon=True).start()
+    enable()
+    return server
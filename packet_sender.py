@@ -1,20 +1,263 @@
+from itertools import islice
+import ipaddress
 import socket
+import time
+from typing import Callable, Iterable, Iterator
+
+from interfaces import ALL_INTERFACES, interfaces_for, open_interface_socket
+import metrics
+
+# (ip, mac, port) 전송 대상
+Target = tuple[str, str, int]
+# udp: UDP/IP로 ip(와 브로드캐스트 주소)에 전송, ethernet: 인터페이스에 EtherType 0x0842 프레임을 브로드캐스트
+TRANSPORTS = ("udp", "ethernet")
+
 
 def create_magic_packet(mac_address: str) -> bytes:
     mac_address = mac_address.replace(":", "").replace("-", "")
     mac_bytes = bytes.fromhex(mac_address)
     return b'\xff' * 6 + mac_bytes * 16
 
-def send_magic_packet(ip_address: str, mac_address: str, port: int = 9):
-    packet = create_magic_packet(mac_address)
+def open_broadcast_socket() -> socket.socket:
+    # 기본 경로로 나가는 소켓
+    return open_interface_socket("")
+
+def send_magic_packet(ip_address: str, mac_address: str, port: int = 9, interface: str = ""):
+    start = time.perf_counter()
+    try:
+        packet = create_magic_packet(mac_address)
+
+        with open_interface_socket(interface) as sock:
+            sock.sendto(packet, (ip_address, port))
+    except Exception as e:
+        if metrics.enabled:
+            metrics.record("send", time.perf_counter() - start, e, ip=ip_address, mac=mac_address, port=port)
+        raise
+    if metrics.enabled:
+        metrics.record("send", time.perf_counter() - start, None, ip=ip_address, mac=mac_address, port=port)
+
+def send_magic_packets(targets: Iterable[Target]) -> list[tuple[Target, Exception | None]]:
+    """
+    여러 대상에게 하나의 소켓으로 매직 패킷 전송
+    - 반환값: 입력 순서대로 (대상, 오류) 목록. 성공한 대상의 오류는 None
+    """
+    results = []
+    with open_broadcast_socket() as sock:
+        for target in targets:
+            ip_address, mac_address, port = target
+            start = time.perf_counter()
+            error = None
+            try:
+                sock.sendto(create_magic_packet(mac_address), (ip_address, int(port)))
+            except (OSError, ValueError) as e:
+                # 한 대상의 실패가 나머지 전송을 막지 않도록 기록만 한다
+                error = e
+            results.append((target, error))
+            if metrics.enabled:
+                metrics.record("send", time.perf_counter() - start, error, ip=ip_address, mac=mac_address, port=port)
+    return results
+
+def directed_broadcast(ip_address: str, prefix_length: int = 24) -> str | None:
+    """ip가 속한 서브넷의 브로드캐스트 주소 (예: 192.168.0.10/24 -> 192.168.0.255). /31, /32는 None"""
+    network = ipaddress.IPv4Network(f"{ip_address}/{prefix_length}", strict=False)
+    if network.prefixlen >= 31:
+        return None
+    return str(network.broadcast_address)
+
+def subnet_network(ip_address: str, subnet: str) -> ipaddress.IPv4Network:
+    """
+    저장된 subnet 값으로 네트워크 계산. 잘못된 값이면 ValueError
+    - CIDR(192.168.10.0/24, 192.168.10.0/255.255.255.0): 그 네트워크 (ip가 공유기 주소여도 됨)
+    - 넷마스크(255.255.255.0)나 프리픽스 길이(24, /24): ip가 속한 네트워크
+    """
+    subnet = subnet.strip()
+    if "/" in subnet and not subnet.startswith("/"):
+        return ipaddress.IPv4Network(subnet, strict=False)
+    return ipaddress.IPv4Network(f"{ip_address}/{subnet.lstrip('/')}", strict=False)
+
+def subnet_broadcast(ip_address: str, subnet: str) -> str | None:
+    network = subnet_network(ip_address, subnet)
+    if network.prefixlen >= 31:
+        return None
+    return str(network.broadcast_address)
+
+
+class SendPolicy:
+    """
+    대상 하나에 매직 패킷을 어떻게 보낼지 (전체 기본값 또는 PC별 "send_policy")
+    - repeat: 보낼 횟수, interval: 반복 사이 간격(초)
+    - ports: 보낼 포트 목록 (비어 있으면 PC에 저장된 포트)
+    - directed_broadcast: ip 외에 ip의 서브넷 브로드캐스트 주소(prefix_length 기준)로도 보낸다
+    - subnet: 저장된 넷마스크/CIDR. 있으면 그 브로드캐스트 주소로 항상 함께 보낸다 (prefix_length보다 우선)
+    - interface: 보낼 인터페이스 이름 또는 주소. 비어 있으면 기본 경로, "*"이면 대상 서브넷에 연결된 모든 인터페이스
+    - transport: "udp" 또는 "ethernet" (raw 프레임. 인터페이스 이름이 필요하고 주소/포트는 쓰지 않음)
+    """
+
+    KEYS = ("repeat", "interval", "ports", "directed_broadcast", "prefix_length", "subnet", "interface", "transport")
+
+    def __init__(self, repeat: int = 1, interval: float = 0.0, ports: Iterable[int] = (),
+                 directed_broadcast: bool = False, prefix_length: int = 24, subnet: str = "", interface: str = "",
+                 transport: str = "udp"):
+        if repeat < 1:
+            raise ValueError("repeat must be at least 1")
+        if interval < 0:
+            raise ValueError("interval must not be negative")
+        if not 0 <= prefix_length <= 32:
+            raise ValueError("prefix_length must be between 0 and 32")
+        if transport not in TRANSPORTS:
+            raise ValueError(f"transport must be one of: {', '.join(TRANSPORTS)}")
+        if subnet:
+            # 형식만 확인 (ip 없이)
+            subnet_network("0.0.0.0", subnet)
+        self.repeat = int(repeat)
+        self.interval = float(interval)
+        self.ports = tuple(int(port) for port in ports)
+        self.directed_broadcast = bool(directed_broadcast)
+        self.prefix_length = int(prefix_length)
+        self.subnet = str(subnet)
+        self.interface = str(interface)
+        self.transport = transport
+
+    def __repr__(self) -> str:
+        return "SendPolicy(" + ", ".join(f"{key}={getattr(self, key)!r}" for key in self.KEYS) + ")"
 
-    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
-        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-        sock.sendto(packet, (ip_address, port))
+    def __eq__(self, other) -> bool:
+        return isinstance(other, SendPolicy) and all(getattr(self, key) == getattr(other, key) for key in self.KEYS)
+
+    def override(self, data: dict | None) -> "SendPolicy":
+        """data(PC의 "send_policy")에 있는 값만 바꾼 정책. 잘못된 값이면 ValueError"""
+        if not data:
+            return self
+        unknown = set(data) - set(self.KEYS)
+        if unknown:
+            raise ValueError(f"Unknown send policy option: {', '.join(sorted(unknown))}")
+        try:
+            return SendPolicy(**{key: data.get(key, getattr(self, key)) for key in self.KEYS})
+        except TypeError as e:
+            raise ValueError(f"Invalid send policy: {e}")
+
+    def for_pc(self, pc: dict) -> "SendPolicy":
+        """PC의 send_policy와 interface/subnet 필드를 반영한 정책. 잘못된 값이면 ValueError"""
+        policy = self.override(pc.get("send_policy"))
+        fields = {key: pc[key] for key in ("interface", "subnet") if pc.get(key)}
+        return policy.override(fields)
+
+    def destinations(self, ip_address: str, port: int) -> list[tuple[str, tuple[str, int] | None]]:
+        """
+        한 번 보낼 때의 (인터페이스, (주소, 포트)) 목록. 인터페이스가 빈 문자열이면 기본 경로
+        - ethernet 전송이면 (인터페이스, None) 목록. 인터페이스를 정할 수 없으면 ValueError
+        """
+        if self.transport == "ethernet":
+            if self.interface == ALL_INTERFACES:
+                names = list(dict.fromkeys(interface.name for interface in interfaces_for(ip_address)))
+                if not names:
+                    raise ValueError(f"No interface is connected to {ip_address}")
+            elif self.interface:
+                names = [self.interface]
+            else:
+                raise ValueError("Ethernet transport needs an interface")
+            return [(name, None) for name in names]
+
+        addresses = [ip_address]
+        if self.subnet:
+            broadcast = subnet_broadcast(ip_address, self.subnet)
+        elif self.directed_broadcast:
+            broadcast = directed_broadcast(ip_address, self.prefix_length)
+        else:
+            broadcast = None
+        if broadcast is not None and broadcast != ip_address:
+            addresses.append(broadcast)
+
+        if self.interface == ALL_INTERFACES:
+            # 대상(또는 브로드캐스트 주소)이 연결된 서브넷에 있는 인터페이스마다 보낸다
+            names = dict.fromkeys(
+                interface.name for address in addresses for interface in interfaces_for(address)
+            )
+            interfaces = list(names) or [""]
+        else:
+            interfaces = [self.interface]
+
+        ports = self.ports or (int(port),)
+        return [(interface, (address, p)) for interface in interfaces for address in addresses for p in ports]
+
+
+DEFAULT_POLICY = SendPolicy()
+
+def plan_packets(targets: Iterable[Target], policies: Iterable[SendPolicy] | None = None
+                 ) -> list[tuple[float, int, str, tuple[str, int] | None, bytes]]:
+    """
+    실제로 보낼 패킷 목록 (dry-run 표시용)
+    - (첫 전송 기준 시각(초), 대상 번호, 인터페이스, (주소, 포트), 패킷)을 시각 순서로 반환
+    - ethernet 전송은 (주소, 포트)가 None이고 패킷은 Ethernet 프레임의 페이로드
+    - 속도 제한과 그룹 간격은 반영하지 않는다
+    """
+    targets = list(targets)
+    policies = list(policies) if policies is not None else [DEFAULT_POLICY] * len(targets)
+    plan = []
+    for index, ((ip_address, mac_address, port), policy) in enumerate(zip(targets, policies)):
+        packet = create_magic_packet(mac_address)
+        destinations = policy.destinations(ip_address, port)
+        for round_no in range(policy.repeat):
+            for interface, destination in destinations:
+                plan.append((round_no * policy.interval, index, interface, destination, packet))
+    plan.sort(key=lambda item: (item[0], item[1]))
+    return plan
 
 def get_ip_address(ddns: str) -> str | None:
+    start = time.perf_counter()
+    error = None
     try:
         ip = socket.gethostbyname(ddns)
-        return ip
-    except socket.gaierror:
-        return None
\ No newline at end of file
+    except (OSError, UnicodeError) as e:
+        # gaierror 외에 너무 긴 라벨 등 잘못된 이름도 조회 실패로 처리
+        ip = None
+        error = e
+    if metrics.enabled:
+        metrics.record("resolve", time.perf_counter() - start, error, ddns=ddns, ip=ip)
+    return ip
+
+def resolve_ip_addresses(ddns_list: Iterable[str], max_workers: int = 16, timeout: float = 5.0,
+                         resolver: Callable[[str], str | None] = get_ip_address
+                         ) -> Iterator[tuple[str, str | None]]:
+    """
+    여러 DDNS를 최대 max_workers개까지 동시에 조회
+    - 완료되는 순서대로 (ddns, ip)를 반환. 조회 실패 시 ip는 None
+    - 조회를 요청한 뒤 timeout초가 지나면 결과를 기다리지 않고 None으로 반환
+      (포기한 조회의 스레드가 멈춰 있어서 아직 시작하지 못하고 대기 중인 조회도 포함)
+    - resolver로 캐시 등 다른 조회 함수를 사용할 수 있다
+    """
+    # concurrent.futures는 logging까지 불러오므로 필요할 때만 import (CLI 시작 시간 단축)
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    pending_ddns = list(dict.fromkeys(ddns_list))  # 중복 제거, 순서 유지
+    if not pending_ddns:
+        return
+
+    workers = min(max_workers, len(pending_ddns))
+    executor = ThreadPoolExecutor(max_workers=workers)
+    # 한꺼번에 제출하면 wait()가 매번 모든 future를 확인하므로 (수만 개면 O(n²)) 스레드 수만큼만 제출해 둔다
+    remaining = iter(pending_ddns)
+    futures = {}
+    deadlines = {}  # future -> 요청 시각 + timeout
+    try:
+        while True:
+            for ddns in islice(remaining, max(0, workers - len(futures))):
+                future = executor.submit(resolver, ddns)
+                futures[future] = ddns
+                deadlines[future] = time.monotonic() + timeout
+            if not futures:
+                break
+            done, _ = wait(futures, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                del deadlines[future]
+                yield futures.pop(future), future.result()
+
+            # 제한 시간을 넘긴 조회는 포기 (실행 중인 스레드는 끝날 때까지 남고, 대기 중이면 취소)
+            now = time.monotonic()
+            for future, ddns in list(futures.items()):
+                if now > deadlines[future]:
+                    future.cancel()
+                    del futures[future], deadlines[future]
+                    yield ddns, None
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,222 @@
+"""
+매직 패킷 수신기 (세그먼트에 실제로 도착하는 패킷 확인, 루프백 부하 테스트의 수신 측)
+
+- UDP 포트 여러 개와 선택적으로 raw Ethernet(EtherType 0x0842)을 한 스레드에서 받는다
+- 미리 할당한 버퍼 하나에 recv_into로 받고, 버퍼 안에서 바로 동기 스트림과 MAC 반복을 확인한다
+  (패킷마다 bytes 객체를 만들지 않음. MAC 6바이트만 꺼낸다)
+- 도착한 패킷이 있는 동안은 non-blocking으로 연달아 읽고, 없을 때만 selector로 기다린다
+- MAC별 수신 수와 도착 간격(최소/평균/최대)을 기록하고 inventory의 PC 이름과 대응시킨다
+"""
+from typing import Callable, Iterable, Iterator
+import selectors
+import socket
+import threading
+import time
+
+from ethernet import ETH_P_WOL
+from hosts import MAGIC_PACKET_SIZE
+
+_SYNC_STREAM = b"\xff" * 6
+ETHERNET_HEADER_SIZE = 14
+# 받을 수 있는 최대 패킷 크기 (점보 프레임 포함)
+BUFFER_SIZE = 9216
+# 순간적으로 몰려도 커널에서 버려지지 않도록 늘리는 수신 버퍼 크기
+RECEIVE_BUFFER = 8 << 20
+# stop()을 확인하는 간격(초)
+POLL_INTERVAL = 0.2
+
+
+def find_magic_packet(buffer: bytearray, start: int, end: int) -> int | None:
+    """
+    buffer[start:end] 안의 매직 패킷(FF x 6 + MAC x 16)의 MAC을 48비트 정수로 반환 (없으면 None)
+    - 매직 패킷은 페이로드의 어디에나 올 수 있으므로 동기 스트림을 찾아서 확인한다
+    - 96바이트 안에 6바이트 MAC이 겹치지 않고 16번 나오면 정확히 16칸을 채우므로 count로 확인할 수 있다
+    """
+    position = buffer.find(_SYNC_STREAM, start, end)
+    while position != -1 and position + MAGIC_PACKET_SIZE <= end:
+        mac_start = position + 6
+        mac = buffer[mac_start:mac_start + 6]
+        if buffer.count(mac, mac_start, position + MAGIC_PACKET_SIZE) == 16:
+            return int.from_bytes(mac, "big")
+        # MAC이 FF로 시작하면 동기 스트림이 한 칸 뒤에서 시작할 수 있다
+        position = buffer.find(_SYNC_STREAM, position + 1, end)
+    return None
+
+def format_mac(mac: int) -> str:
+    text = f"{mac:012X}"
+    return ":".join(text[i:i + 2] for i in range(0, 12, 2))
+
+def mac_names(pcs: Iterable[dict]) -> dict[int, str]:
+    """PC 목록의 MAC(48비트 정수) -> 이름. MAC이 잘못된 PC는 건너뛴다"""
+    names = {}
+    for pc in pcs:
+        mac = str(pc.get("mac", "")).replace(":", "").replace("-", "")
+        try:
+            value = int(mac, 16)
+        except ValueError:
+            continue
+        if len(mac) == 12:
+            names.setdefault(value, pc.get("name", ""))
+    return names
+
+
+class MacStats:
+    """MAC 하나의 수신 기록 (도착 간격은 연속한 두 패킷 사이의 시간)"""
+
+    __slots__ = ("count", "first", "last", "min_interval", "max_interval")
+
+    def __init__(self, now: float):
+        self.count = 1
+        self.first = now
+        self.last = now
+        self.min_interval = None
+        self.max_interval = None
+
+    def add(self, now: float):
+        interval = now - self.last
+        if self.min_interval is None or interval < self.min_interval:
+            self.min_interval = interval
+        if self.max_interval is None or interval > self.max_interval:
+            self.max_interval = interval
+        self.count += 1
+        self.last = now
+
+    @property
+    def mean_interval(self) -> float | None:
+        if self.count < 2:
+            return None
+        return (self.last - self.first) / (self.count - 1)
+
+
+class PacketReceiver:
+    """
+    ports의 UDP(host에 bind)와 interface의 raw Ethernet 프레임에서 매직 패킷을 받는다
+    - interface는 Linux에서 root 또는 CAP_NET_RAW가 필요하다. 포트를 열 수 없으면 OSError
+    - run()은 stop(), duration초, count개 중 먼저 오는 것까지 받는다 (수신 스레드나 CLI에서 호출)
+    - names: MAC(정수) -> PC 이름 (mac_names). 목록에 없는 MAC도 기록한다
+    """
+
+    def __init__(self, ports: Iterable[int] = (9,), host: str = "0.0.0.0", interface: str | None = None,
+                 names: dict[int, str] | None = None):
+        self.names = names or {}
+        self.stats: dict[int, MacStats] = {}
+        self.received = 0  # 매직 패킷 수
+        self.invalid = 0   # 매직 패킷이 아닌 패킷 수
+        self.started = None
+        self.stopped = None
+        self._buffer = bytearray(BUFFER_SIZE)
+        self._stop = threading.Event()
+        self._selector = selectors.DefaultSelector()
+        self._sockets = []
+        try:
+            for port in ports:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                self._add_socket(sock, 0)
+                sock.bind((host, port))
+            if interface:
+                if not hasattr(socket, "AF_PACKET"):
+                    raise OSError("Raw Ethernet receive is only supported on Linux")
+                sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_WOL))
+                self._add_socket(sock, ETHERNET_HEADER_SIZE)
+                sock.bind((interface, ETH_P_WOL))
+        except OSError:
+            self.close()
+            raise
+
+    def _add_socket(self, sock: socket.socket, offset: int):
+        # offset: 버퍼에서 페이로드가 시작하는 위치 (raw 프레임은 Ethernet 헤더 다음)
+        self._sockets.append(sock)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER)
+        except OSError:
+            pass
+        sock.setblocking(False)
+        self._selector.register(sock, selectors.EVENT_READ, offset)
+
+    @property
+    def addresses(self) -> list:
+        """bind한 주소 (포트 0을 지정했을 때 실제 포트 확인용)"""
+        return [sock.getsockname() for sock in self._sockets]
+
+    def close(self):
+        self._selector.close()
+        for sock in self._sockets:
+            sock.close()
+        self._sockets = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def stop(self):
+        """다른 스레드에서 호출. POLL_INTERVAL 안에 run()이 끝난다"""
+        self._stop.set()
+
+    def run(self, duration: float | None = None, count: int | None = None,
+            on_packet: Callable[[int, float], None] | None = None):
+        """
+        매직 패킷을 받아서 기록
+        - on_packet(MAC, 도착 시각): 패킷마다 호출 (느려지므로 필요할 때만)
+        """
+        self.started = self.started or time.monotonic()
+        self.stopped = None
+        end = None if duration is None else time.monotonic() + duration
+        buffer = self._buffer
+        view = memoryview(buffer)
+        stats = self.stats
+        clock = time.monotonic
+        select = self._selector.select
+        try:
+            while not self._stop.is_set():
+                timeout = POLL_INTERVAL
+                if end is not None:
+                    timeout = min(timeout, end - clock())
+                    if timeout <= 0:
+                        break
+                for key, _ in select(timeout):
+                    recv_into = key.fileobj.recv_into
+                    offset = key.data
+                    # 도착해 있는 패킷을 모두 읽는다 (패킷마다 select하지 않음)
+                    while True:
+                        try:
+                            size = recv_into(view)
+                        except (BlockingIOError, InterruptedError):
+                            break
+                        mac = find_magic_packet(buffer, offset, size)
+                        if mac is None:
+                            self.invalid += 1
+                            continue
+                        now = clock()
+                        entry = stats.get(mac)
+                        if entry is None:
+                            stats[mac] = MacStats(now)
+                        else:
+                            entry.add(now)
+                        self.received += 1
+                        if on_packet is not None:
+                            on_packet(mac, now)
+                        if count is not None and self.received >= count:
+                            return
+        finally:
+            view.release()
+            self.stopped = clock()
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.stopped or time.monotonic()) - self.started
+
+    def report(self) -> Iterator[dict]:
+        """MAC별 기록 (받은 수가 많은 순서). 간격은 초"""
+        for mac, entry in sorted(self.stats.items(), key=lambda item: -item[1].count):
+            yield {
+                "mac": format_mac(mac),
+                "name": self.names.get(mac),
+                "count": entry.count,
+                "min_interval": entry.min_interval,
+                "mean_interval": entry.mean_interval,
+                "max_interval": entry.max_interval,
+            }
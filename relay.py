@@ -0,0 +1,486 @@
+"""
+다른 시스템(CI, 티켓 시스템, 홈 오토메이션)에서 PC를 깨우기 위한 HTTP/JSON 릴레이
+
+    POST /wake     {"name": "PC1"} | {"mac": "AA:BB:CC:DD:EE:FF"} | {"group": "lab"}
+                   {"names": [...], "macs": [...], "groups": [...]} 또는 위 객체들의 목록
+    GET  /hosts    PC 목록과 마지막 전송 결과
+    GET  /status   가동 시간, 요청/전송 수
+    GET  /metrics  Prometheus 텍스트 형식의 전송/DNS 조회/저장 지표 (metrics 모듈)
+    GET  /agents   연결된 에이전트와 상태 (coordinator가 있을 때)
+
+PC 목록, DNS 캐시, 전송 소켓(WakeScheduler)은 시작할 때 한 번만 준비해서 요청마다 전송 비용만 든다.
+storage를 주면 다른 프로그램이 바꾼 PC 목록 파일을 요청 사이에 합친다 (WATCH_INTERVAL초에 한 번 확인).
+history를 주면 전송 결과를 요청한 주소와 함께 기록한다 (파일 쓰기는 기록 스레드에서).
+coordinator(agents.Coordinator)를 주면 연결된 에이전트의 서브넷에 속한 PC는 그 에이전트가 보내고,
+나머지 PC는 이 프로세스에서 직접 보낸다.
+HTTP/1.1 keep-alive를 지원하는 최소한의 서버로, 외부 패키지 없이 asyncio만 사용한다.
+"""
+from typing import Any
+import asyncio
+import hmac
+import json
+import time
+
+from agents import Coordinator
+from dns_cache import DNSCache
+from history import FAILED, SENT, WakeHistory
+from hosts import HostError
+from inventory import FIELD_LABELS, Inventory
+import metrics
+from packet_sender import DEFAULT_POLICY, SendPolicy
+from scheduler import WakeScheduler
+from storage import StorageError
+from wake_groups import group_members
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8009
+# 요청 본문 최대 크기 (bytes)
+MAX_BODY = 1 << 20
+# 응답 없이 연결을 유지하는 시간(초)
+KEEP_ALIVE_TIMEOUT = 30.0
+# PC 목록 파일이 바뀌었는지 확인하는 최소 간격(초)
+WATCH_INTERVAL = 1.0
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    401: "Unauthorized",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class RelayService:
+    """
+    inventory의 PC를 HTTP 요청으로 깨운다
+    - scheduler는 요청 사이에 재사용 (소켓을 요청마다 만들지 않음)
+    - token이 있으면 "Authorization: Bearer <token>" 헤더가 있는 요청만 처리
+    """
+
+    def __init__(self, inventory: Inventory, scheduler: WakeScheduler | None = None,
+                 policy: SendPolicy = DEFAULT_POLICY, token: str | None = None, dns_cache: DNSCache | None = None,
+                 storage=None, history: WakeHistory | None = None, coordinator: Coordinator | None = None):
+        self.inventory = inventory
+        self.storage = storage
+        self.history = history
+        self.coordinator = coordinator
+        self.last_poll = time.monotonic()
+        self.polling = False
+        self.scheduler = scheduler or WakeScheduler()
+        self.policy = policy
+        self.token = token
+        # 빈 DNSCache는 len()이 0이라 거짓이므로 None과 비교한다
+        self.dns_cache = dns_cache if dns_cache is not None else DNSCache()
+        self.started = time.time()
+        self.requests = 0
+        self.sent = 0
+        self.failed = 0
+        self.last_wake: dict[int, tuple[float, str]] = {}  # pc id -> (시각, 결과)
+
+    def close(self):
+        self.scheduler.close()
+
+    # 요청 처리
+
+    async def handle(self, method: str, path: str, headers: dict[str, str], body: bytes,
+                     client: str = "") -> tuple[int, Any]:
+        """client: 요청한 주소 (전송 기록에 남긴다)"""
+        self.requests += 1
+        if self.token is not None:
+            expected = f"Bearer {self.token}"
+            if not hmac.compare_digest(headers.get("authorization", ""), expected):
+                raise HTTPError(401, "Missing or invalid token")
+
+        await self.poll_storage()
+        path = path.split("?", 1)[0].rstrip("/") or "/"
+        routes = {
+            "/wake": ("POST", lambda body: self.handle_wake(body, client)),
+            "/hosts": ("GET", self.handle_hosts),
+            "/status": ("GET", self.handle_status),
+            "/metrics": ("GET", self.handle_metrics),
+            "/agents": ("GET", self.handle_agents),
+        }
+        if path not in routes:
+            raise HTTPError(404, f"Unknown path: {path}")
+        allowed, handler = routes[path]
+        if method != allowed:
+            raise HTTPError(405, f"Use {allowed} {path}")
+        return await handler(body)
+
+    async def handle_wake(self, body: bytes, client: str = "") -> tuple[int, Any]:
+        try:
+            request = json.loads(body or b"null")
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise HTTPError(400, f"Invalid JSON: {e}")
+
+        pc_ids, unknown = self.select(request)
+        if not pc_ids:
+            raise HTTPError(404, f"No matching PC: {', '.join(unknown)}" if unknown else "No PC selected")
+        results = await self.wake(pc_ids, client)
+        sent = sum(1 for result in results if result["status"] == "sent")
+        return 200, {"sent": sent, "failed": len(results) - sent, "unknown": unknown, "results": results}
+
+    async def handle_hosts(self, body: bytes) -> tuple[int, Any]:
+        hosts = []
+        for pc_id, pc in self.inventory.items():
+            host = {"id": pc_id, **pc}
+            if pc_id in self.last_wake:
+                host["last_wake"], host["last_result"] = self.last_wake[pc_id]
+            hosts.append(host)
+        return 200, {"hosts": hosts}
+
+    async def handle_status(self, body: bytes) -> tuple[int, Any]:
+        status = {
+            "uptime": round(time.time() - self.started, 3),
+            "hosts": len(self.inventory),
+            "requests": self.requests,
+            "sent": self.sent,
+            "failed": self.failed,
+        }
+        if self.coordinator is not None:
+            status["agents"] = len(self.coordinator.agents)
+        return 200, status
+
+    async def handle_agents(self, body: bytes) -> tuple[int, Any]:
+        if self.coordinator is None:
+            raise HTTPError(404, "Agents are not enabled (start with --agent-port)")
+        return 200, {"agents": self.coordinator.status()}
+
+    async def handle_metrics(self, body: bytes) -> tuple[int, Any]:
+        # 문자열 응답은 text/plain으로 보낸다
+        return 200, metrics.render_prometheus()
+
+    async def poll_storage(self):
+        """WATCH_INTERVAL초가 지났으면 다른 프로그램이 바꾼 PC 목록을 합친다 (파일이 잘못되었으면 기존 목록 유지)"""
+        now = time.monotonic()
+        if self.storage is None or self.polling or now - self.last_poll < WATCH_INTERVAL:
+            return
+        self.last_poll = now
+        self.polling = True
+        try:
+            # 파일 확인과 잠금, 읽기는 이벤트 루프를 막지 않도록 스레드에서 하고
+            # inventory에 합치는 것은 다른 요청과 겹치지 않도록 루프에서 한다
+            pc_list = await asyncio.get_running_loop().run_in_executor(None, self.storage.read_polled)
+            changed_ids = self.storage.merge_polled(self.inventory, pc_list)
+        except (StorageError, OSError):
+            return
+        finally:
+            self.polling = False
+        for pc_id in changed_ids:
+            if pc_id not in self.inventory:
+                self.last_wake.pop(pc_id, None)
+
+    # PC 선택과 전송
+
+    def select(self, request) -> tuple[list[int], list[str]]:
+        """요청에서 깨울 PC id 목록(중복 제거, 순서 유지)과 찾지 못한 이름/MAC/그룹 반환"""
+        requests = request if isinstance(request, list) else [request]
+        pc_ids: dict[int, None] = {}
+        unknown = []
+        for item in requests:
+            if not isinstance(item, dict):
+                raise HTTPError(400, "Request must be a JSON object or a list of objects")
+            names = self._values(item, "name", "names")
+            macs = self._values(item, "mac", "macs")
+            groups = self._values(item, "group", "groups")
+            for name in names:
+                pc_id = self.inventory.find_by_name(name)
+                if pc_id is None:
+                    unknown.append(name)
+                else:
+                    pc_ids[pc_id] = None
+            for mac in macs:
+                pc_id = self.inventory.find_by_mac(mac)
+                if pc_id is None:
+                    unknown.append(mac)
+                else:
+                    pc_ids[pc_id] = None
+            for group in groups:
+                members = group_members(self.inventory.items(), [group])[group]
+                if not members:
+                    unknown.append(group)
+                pc_ids.update(dict.fromkeys(members))
+        return list(pc_ids), unknown
+
+    @staticmethod
+    def _values(item: dict, single: str, plural: str) -> list[str]:
+        values = item.get(plural, [])
+        if not isinstance(values, list):
+            raise HTTPError(400, f"'{plural}' must be a list")
+        if single in item:
+            values = [item[single], *values]
+        return [str(value) for value in values]
+
+    async def wake(self, pc_ids: list[int], client: str = "") -> list[dict]:
+        """PC들에 매직 패킷을 보내고 첫 전송 결과가 모두 나오면 PC별 결과 반환"""
+        loop = asyncio.get_running_loop()
+        results = []
+        hosts = []  # (pc id, PC, 결과, Host)
+        for pc_id in pc_ids:
+            pc = self.inventory.get(pc_id)
+            result = {"name": pc.get("name", ""), "mac": pc.get("mac", "")}
+            results.append(result)
+            try:
+                # 검증과 매직 패킷은 PC가 바뀌기 전까지 재사용 (Inventory.host)
+                hosts.append((pc_id, pc, result, self.inventory.host(pc_id)))
+            except HostError as e:
+                self._record(pc_id, result, f"Invalid {FIELD_LABELS[e.key]}", pc.get("ip", ""), client=client)
+
+        # IP가 없는 PC의 DDNS는 모아서 동시에 조회 (캐시에 있으면 바로, 없으면 스레드에서. 이벤트 루프를 막지 않음)
+        names = list(dict.fromkeys(pc["ddns"] for _, pc, _, host in hosts if host.ip is None))
+        addresses = {}
+        if names:
+            resolved = await asyncio.gather(*(loop.run_in_executor(None, self.dns_cache.resolve, name)
+                                              for name in names))
+            addresses = dict(zip(names, resolved))
+
+        targets = []
+        policies = []
+        positions = []  # 대상 번호 -> (pc id, 결과)
+        packets = []
+        for pc_id, pc, result, host in hosts:
+            error = None
+            if host.ip is None:
+                ip = addresses[pc["ddns"]]
+                if not ip:
+                    error = "Failed to resolve DDNS address"
+                else:
+                    try:
+                        host = host.with_ip(ip)
+                    except HostError as e:
+                        error = f"Invalid {FIELD_LABELS[e.key]}"
+            if error is None:
+                ip = host.ip_address
+                try:
+                    policy = self.policy.for_pc(pc)
+                    policy.destinations(ip, host.port)
+                except ValueError as e:
+                    error = str(e)
+            if error is not None:
+                self._record(pc_id, result, error, pc.get("ip", ""), client=client)
+                continue
+            targets.append((ip, pc["mac"], host.port))
+            policies.append(policy)
+            packets.append(host.packet)
+            positions.append((pc_id, result))
+
+        if targets:
+            # 에이전트가 맡는 서브넷의 PC는 에이전트로, 나머지는 직접
+            remote = [self.coordinator is not None and self.coordinator.route(target[0]) is not None
+                      for target in targets]
+            local = [index for index, routed in enumerate(remote) if not routed]
+            remote = [index for index, routed in enumerate(remote) if routed]
+            await asyncio.gather(
+                self._send_local([targets[i] for i in local], [policies[i] for i in local],
+                                 [packets[i] for i in local], [positions[i] for i in local], client),
+                self._send_remote([targets[i] for i in remote], [policies[i] for i in remote],
+                                  [positions[i] for i in remote], client)
+            )
+        return results
+
+    async def _send_local(self, targets: list, policies: list[SendPolicy], packets: list[bytes],
+                          positions: list[tuple[int, dict]], client: str):
+        """
+        스케줄러로 보내고 대상마다 첫 전송 결과가 나오면 끝난다
+        - 작업이 취소되거나 스케줄러가 닫혀서 보내지 못한 대상은 실패로 기록한다
+        """
+        if not targets:
+            return
+        loop = asyncio.get_running_loop()
+        finished = loop.create_future()
+        pending = set(range(len(targets)))
+
+        def on_result(index, target, error):
+            # 스케줄러 스레드에서 호출되므로 이벤트 루프로 넘긴다
+            loop.call_soon_threadsafe(done_one, index, error, time.monotonic())
+
+        def on_done():
+            # 재전송까지 끝났거나 취소됨 (보낸 대상의 on_result가 먼저 루프에 넘어간다)
+            try:
+                loop.call_soon_threadsafe(job_done)
+            except RuntimeError:
+                # 재전송이 끝나기 전에 이벤트 루프가 닫힘 (기다리는 요청이 없다)
+                pass
+
+        def done_one(index, error, sent_at):
+            if index not in pending:
+                return
+            pending.discard(index)
+            pc_id, result = positions[index]
+            self._record(pc_id, result, None if error is None else str(error), targets[index][0],
+                         sent_at - requested, client)
+            if not pending and not finished.done():
+                finished.set_result(None)
+
+        def job_done():
+            for index in sorted(pending):
+                pc_id, result = positions[index]
+                self._record(pc_id, result, "Cancelled before sending", targets[index][0], client=client)
+            pending.clear()
+            if not finished.done():
+                finished.set_result(None)
+
+        requested = time.monotonic()
+        try:
+            self.scheduler.submit(targets, on_result=on_result, on_done=on_done, policies=policies, packets=packets)
+        except (OSError, RuntimeError) as e:
+            # RuntimeError: 스케줄러가 이미 닫힘
+            for (pc_id, result), target in zip(positions, targets):
+                self._record(pc_id, result, str(e), target[0], client=client)
+        else:
+            await finished
+
+    async def _send_remote(self, targets: list, policies: list[SendPolicy], positions: list[tuple[int, dict]],
+                           client: str):
+        """코디네이터로 에이전트에 보내고 결과에 보낸 에이전트 이름을 남긴다"""
+        if not targets:
+            return
+        requested = time.monotonic()
+        outcomes = await self.coordinator.wake(targets, policies)
+        latency = time.monotonic() - requested
+        for (pc_id, result), target, (agent, error) in zip(positions, targets, outcomes):
+            if agent is not None:
+                result["agent"] = agent
+            self._record(pc_id, result, error, target[0], latency, client)
+
+    def _record(self, pc_id: int, result: dict, error: str | None, ip: str,
+                latency: float | None = None, client: str = ""):
+        """
+        result: wake()가 대상을 만들 때 채운 이름과 MAC
+        - 전송 중에 다른 요청의 poll_storage()가 PC를 지웠을 수 있으므로 inventory를 다시 읽지 않는다
+        """
+        if error is None:
+            self.sent += 1
+            result["status"] = SENT
+        else:
+            self.failed += 1
+            result["status"] = FAILED
+            result["error"] = error
+        if pc_id in self.inventory:
+            self.last_wake[pc_id] = (time.time(), result["status"])
+        if self.history is not None:
+            self.history.record(result["name"], result["mac"], ip, result["status"], error, latency, "relay", client)
+
+    # HTTP
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info("peername")
+        client = str(peer[0]) if isinstance(peer, tuple) else ""
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, asyncio.LimitOverrunError,
+                        ConnectionError):
+                    return
+                try:
+                    method, path, version, headers = parse_head(head)
+                    length = int(headers.get("content-length", "0"))
+                except ValueError:
+                    writer.write(build_response(400, {"error": "Malformed request"}, False))
+                    return
+                keep_alive = keep_alive_requested(version, headers)
+                if "transfer-encoding" in headers:
+                    # chunked 본문은 지원하지 않는다. 본문을 읽지 않으므로 연결을 유지할 수 없다
+                    writer.write(build_response(411, {"error": "Chunked request bodies are not supported, "
+                                                               "send Content-Length"}, False))
+                    return
+                if not 0 <= length <= MAX_BODY:
+                    # 본문을 읽지 않으므로 연결을 유지할 수 없다
+                    writer.write(build_response(413, {"error": f"Body larger than {MAX_BODY} bytes"}, False))
+                    return
+                try:
+                    body = await reader.readexactly(length) if length else b""
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+
+                try:
+                    status, payload = await self.handle(method, path, headers, body, client)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Exception as e:
+                    # 요청 하나의 오류로 서버가 멈추지 않도록 응답만 실패로 보낸다
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                writer.write(build_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, ready=None,
+                    agent_address: tuple[str, int] | None = None, agent_ready=None):
+        """
+        서버를 열고 계속 실행. ready(port)는 연결을 받을 준비가 되면 호출 (port=0이면 실제 포트)
+        - agent_address: 코디네이터가 에이전트 연결을 받을 (주소, 포트). agent_ready(port)도 같은 방식
+        """
+        agent_server = None
+        if agent_address is not None:
+            if self.coordinator is None:
+                self.coordinator = Coordinator(self.token)
+            agent_server = await self.coordinator.start(*agent_address)
+            if agent_ready is not None:
+                agent_ready(agent_server.sockets[0].getsockname()[1])
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        try:
+            async with server:
+                if ready is not None:
+                    ready(server.sockets[0].getsockname()[1])
+                await server.serve_forever()
+        finally:
+            if agent_server is not None:
+                agent_server.close()
+
+
+def parse_head(head: bytes) -> tuple[str, str, str, dict[str, str]]:
+    """요청 줄과 헤더 파싱. 헤더 이름은 소문자. 형식이 잘못되면 ValueError"""
+    lines = head.decode("latin-1").split("\r\n")
+    method, path, version = lines[0].split(" ", 2)
+    headers = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, value = line.split(":", 1)
+        headers[name.strip().lower()] = value.strip()
+    return method.upper(), path, version, headers
+
+def keep_alive_requested(version: str, headers: dict[str, str]) -> bool:
+    connection = headers.get("connection", "").lower()
+    if version == "HTTP/1.0":
+        return connection == "keep-alive"
+    return connection != "close"
+
+def build_response(status: int, payload: Any, keep_alive: bool) -> bytes:
+    """payload가 문자열이면 text/plain, 아니면 JSON"""
+    if isinstance(payload, str):
+        body = payload.encode("utf-8")
+        content_type = "text/plain; version=0.0.4; charset=utf-8"
+    else:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        content_type = "application/json; charset=utf-8"
+    head = (
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        "\r\n"
+    )
+    return head.encode("latin-1") + body
+
+def run(service: RelayService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, ready=None,
+        agent_address: tuple[str, int] | None = None, agent_ready=None):
+    # GET /metrics로 제공하므로 수집을 켠다 (프로세스 전체에 적용되므로 서비스를 만들 때가 아니라 실행할 때)
+    metrics.enable()
+    try:
+        asyncio.run(service.serve(host, port, ready, agent_address, agent_ready))
+    finally:
+        service.close()
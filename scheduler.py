@@ -0,0 +1,336 @@
+"""
+속도를 조절하며 매직 패킷을 보내는 스케줄러
+
+- 전체 전송 속도는 토큰 버킷으로 제한 (초당 패킷 수)
+- 같은 그룹(예: 같은 랙/서브넷) 안에서는 stagger초 간격으로 하나씩 깨운다 (돌입 전류 분산)
+- 대기 중인 전송은 (예정 시각) 힙에 넣고 스레드 하나가 다음 예정 시각까지 잠들어 있어서,
+  수천 개가 대기해도 CPU를 거의 쓰지 않는다
+- 대상별 SendPolicy의 재전송도 같은 힙에 다시 넣어서 하나의 전송 루프로 처리한다
+- 소켓은 인터페이스마다 하나씩 만들어 재사용한다. UDP 전송은 기다리지 않으므로
+  여러 인터페이스로 보내는 것도 이 루프 하나로 동시에 나간다
+- raw Ethernet 전송은 그 순간 보낼 차례가 된 프레임을 인터페이스별로 모아서 연달아 보낸다
+"""
+from typing import Callable, Hashable, Iterable
+import heapq
+import itertools
+import socket
+import threading
+import time
+
+from ethernet import EthernetSender
+from interfaces import open_interface_socket
+import metrics
+from packet_sender import DEFAULT_POLICY, SendPolicy, Target, create_magic_packet
+
+# 한 번에 꺼내서 보내는 최대 항목 수 (ethernet 프레임은 인터페이스별로 모아서 보낸다)
+MAX_BATCH = 256
+
+# 그룹을 지정하지 않으면 IPv4 /24 단위를 한 그룹으로 본다
+def group_by_subnet(target: Target) -> str:
+    return target[0].rsplit(".", 1)[0]
+
+
+class TokenBucket:
+    """초당 rate개, 최대 capacity개까지 모아 둘 수 있는 토큰 버킷"""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, now: float) -> float:
+        """토큰을 하나 사용하고 0 반환. 토큰이 없으면 기다려야 할 시간(초) 반환"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+
+class WakeJob:
+    """submit()으로 만든 전송 작업. 진행 상황 확인과 취소에 사용"""
+
+    def __init__(self, targets: list[Target], rate: float | None,
+                 on_result: Callable[[int, Target, Exception | None], None] | None,
+                 on_done: Callable[[], None] | None = None, policies: list[SendPolicy] | None = None,
+                 packets: list[bytes | None] | None = None):
+        self.targets = targets
+        self.policies = policies if policies is not None else [DEFAULT_POLICY] * len(targets)
+        # 대상별 매직 패킷과 목적지는 처음 보낼 때 한 번만 만들어서 재전송에 재사용
+        self.packets = packets if packets is not None else [None] * len(targets)
+        self.destinations: list[list | None] = [None] * len(targets)
+        self.total = len(targets)
+        self.sent = 0
+        self.failed = 0
+        self.cancelled = False
+        self.rate = rate
+        self.on_result = on_result
+        self.on_done = on_done
+        self.started = time.monotonic()
+        self.last_due = self.started  # 마지막 대상의 (마지막 재전송) 예정 시각
+        self._unfinished = self.total  # 재전송이 남은 대상 수 (스케줄러 스레드에서만 변경)
+        self._done = threading.Event()
+        self._done_lock = threading.Lock()
+        if not targets:
+            self._finish()
+
+    @property
+    def completed(self) -> int:
+        return self.sent + self.failed
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def eta(self) -> float:
+        """남은 예상 시간(초)"""
+        if self.done:
+            return 0.0
+        remaining = self.total - self.completed
+        eta = self.last_due - time.monotonic()
+        if self.rate:
+            eta = max(eta, remaining / self.rate)
+        return max(eta, 0.0)
+
+    def cancel(self):
+        """아직 보내지 않은 대상은 보내지 않는다 (on_result도 호출되지 않음)"""
+        self.cancelled = True
+        self._finish()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._done.wait(timeout)
+
+    def _record(self, index: int, error: Exception | None):
+        # 첫 전송 결과만 기록 (재전송은 진행 상황에 포함하지 않음)
+        if error is None:
+            self.sent += 1
+        else:
+            self.failed += 1
+        if self.on_result is not None:
+            self.on_result(index, self.targets[index], error)
+
+    def _target_finished(self):
+        self._unfinished -= 1
+        if self._unfinished == 0:
+            self._finish()
+
+    def _finish(self):
+        # 완료와 취소가 겹쳐도 on_done은 한 번만 호출
+        with self._done_lock:
+            if self._done.is_set():
+                return
+            self._done.set()
+        if self.on_done is not None:
+            self.on_done()
+
+
+class WakeScheduler:
+    """
+    - rate: 전체 초당 전송 수 (None이면 제한 없음). 대상 하나에 한 번 보내는 것(정책의 모든 주소/포트)을 1회로 센다
+    - stagger: 같은 그룹 안에서 다음 대상을 깨우기까지의 간격(초)
+    - 여러 작업을 동시에 제출해도 속도 제한과 그룹 간격은 모든 작업에 함께 적용된다
+    """
+
+    def __init__(self, rate: float | None = None, stagger: float = 0.0,
+                 group_key: Callable[[Target], Hashable] = group_by_subnet):
+        self.rate = rate
+        self.stagger = stagger
+        self.group_key = group_key
+        self._bucket = TokenBucket(rate) if rate else None
+        self._heap: list[tuple[float, int, WakeJob, int, int]] = []  # (예정 시각, 순번, 작업, 대상 번호, 회차)
+        self._sequence = itertools.count()
+        self._group_next: dict[Hashable, float] = {}  # 그룹별 다음 대상을 깨울 수 있는 시각
+        self._condition = threading.Condition()
+        self._thread = None
+        self._sockets: dict[str, socket.socket] = {}  # 인터페이스("" = 기본 경로) -> 소켓
+        self._ethernet: dict[str, EthernetSender] = {}  # 인터페이스 -> raw Ethernet 소켓
+        self._closed = False
+
+    def submit(self, targets: Iterable[Target], groups: Iterable[Hashable] | None = None,
+               on_result: Callable[[int, Target, Exception | None], None] | None = None,
+               on_done: Callable[[], None] | None = None,
+               policies: SendPolicy | Iterable[SendPolicy] | None = None,
+               packets: Iterable[bytes] | None = None) -> WakeJob:
+        """
+        targets 전송을 예약하고 작업 반환
+        - groups: 대상별 그룹 (없으면 group_key로 계산)
+        - on_result(대상 번호, 대상, 오류): 대상마다 첫 전송 후 스케줄러 스레드에서 호출
+        - on_done(): 재전송까지 모두 보냈거나 취소되면 한 번 호출 (취소한 스레드 또는 스케줄러 스레드)
+        - policies: 모든 대상에 적용할 SendPolicy 하나 또는 대상별 목록 (없으면 한 번만 전송)
+        - packets: 미리 만든 대상별 매직 패킷 (Host.packet). 없으면 MAC 문자열에서 만든다
+        - 소켓을 만들 수 없으면 OSError
+        """
+        targets = list(targets)
+        groups = list(groups) if groups is not None else [self.group_key(target) for target in targets]
+        if policies is None or isinstance(policies, SendPolicy):
+            policies = [policies or DEFAULT_POLICY] * len(targets)
+        else:
+            policies = list(policies)
+        job = WakeJob(targets, self.rate, on_result, on_done, policies,
+                      list(packets) if packets is not None else None)
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Scheduler is closed")
+            # 기본 소켓은 처음 한 번만 만들고 모든 작업에서 재사용
+            if "" not in self._sockets:
+                self._sockets[""] = open_interface_socket("")
+            now = time.monotonic()
+            for index, group in enumerate(groups):
+                due = max(now, self._group_next.get(group, now))
+                self._group_next[group] = due + self.stagger
+                heapq.heappush(self._heap, (due, next(self._sequence), job, index, 0))
+                policy = policies[index]
+                job.last_due = max(job.last_due, due + (policy.repeat - 1) * policy.interval)
+            self._start()
+            self._condition.notify()
+        return job
+
+    def close(self):
+        """대기 중인 전송을 모두 취소하고 스레드 종료"""
+        with self._condition:
+            self._closed = True
+            for _, _, job, _, _ in self._heap:
+                job.cancel()
+            self._heap.clear()
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+        for sock in self._sockets.values():
+            sock.close()
+        for sender in self._ethernet.values():
+            sender.close()
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="wol-scheduler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                batch = self._next_batch()
+                if not batch:
+                    return
+            start = time.perf_counter()
+            errors = self._send_batch(batch)
+            if metrics.enabled:
+                self._record_metrics(batch, errors, time.perf_counter() - start)
+            for (job, index, round_no), error in zip(batch, errors):
+                self._after_send(job, index, round_no, error)
+
+    def _after_send(self, job: WakeJob, index: int, round_no: int, error: Exception | None):
+        if round_no == 0:
+            job._record(index, error)
+
+        # 실패한 대상(잘못된 주소 등)은 재전송하지 않는다
+        policy = job.policies[index]
+        if error is None and round_no + 1 < policy.repeat:
+            with self._condition:
+                if not self._closed and not job.cancelled:
+                    due = time.monotonic() + policy.interval
+                    heapq.heappush(self._heap, (due, next(self._sequence), job, index, round_no + 1))
+                    return
+        job._target_finished()
+
+    def _send_batch(self, batch: list[tuple[WakeJob, int, int]]) -> list[Exception | None]:
+        """
+        보낼 차례가 된 대상들을 정책의 모든 목적지로 한 번씩 전송하고 대상별 오류 반환
+        - 하나라도 보냈으면 None, 모두 실패하면 마지막 오류
+        - ethernet 프레임은 인터페이스별로 모아서 한 번에 보낸다
+        """
+        errors: list[Exception | None] = [None] * len(batch)
+        sent = [False] * len(batch)
+        frames: dict[str, list[tuple[int, bytes]]] = {}  # 인터페이스 -> (batch 번호, 패킷)
+        for position, (job, index, _) in enumerate(batch):
+            packet = job.packets[index]
+            destinations = job.destinations[index]
+            try:
+                if packet is None:
+                    packet = job.packets[index] = create_magic_packet(job.targets[index][1])
+                if destinations is None:
+                    ip_address, _, port = job.targets[index]
+                    destinations = job.destinations[index] = job.policies[index].destinations(ip_address, port)
+            except ValueError as e:
+                errors[position] = e
+                continue
+            for interface, destination in destinations:
+                if destination is None:
+                    frames.setdefault(interface, []).append((position, packet))
+                    continue
+                try:
+                    self._socket(interface).sendto(packet, destination)
+                    sent[position] = True
+                except OSError as e:
+                    errors[position] = e
+
+        for interface, items in frames.items():
+            try:
+                self._ethernet_sender(interface).send([packet for _, packet in items])
+                for position, _ in items:
+                    sent[position] = True
+            except OSError as e:
+                for position, _ in items:
+                    errors[position] = e
+
+        return [None if ok else error for ok, error in zip(sent, errors)]
+
+    @staticmethod
+    def _record_metrics(batch: list[tuple[WakeJob, int, int]], errors: list[Exception | None], elapsed: float):
+        # 한 묶음으로 보내므로 대상별 지연 시간은 묶음 전체 시간을 대상 수로 나눈 값
+        seconds = elapsed / len(batch)
+        for (job, index, round_no), error in zip(batch, errors):
+            ip_address, mac_address, port = job.targets[index]
+            metrics.record("send", seconds, error, ip=ip_address, mac=mac_address, port=port, round=round_no)
+
+    def _socket(self, interface: str) -> socket.socket:
+        # 스케줄러 스레드에서만 호출. 만들지 못하면 OSError (인터페이스가 나중에 올라올 수 있으므로 다음에 다시 시도)
+        sock = self._sockets.get(interface)
+        if sock is None:
+            sock = self._sockets[interface] = open_interface_socket(interface)
+        return sock
+
+    def _ethernet_sender(self, interface: str) -> EthernetSender:
+        sender = self._ethernet.get(interface)
+        if sender is None:
+            sender = self._ethernet[interface] = EthernetSender(interface)
+        return sender
+
+    def _next_batch(self) -> list[tuple[WakeJob, int, int]]:
+        """
+        self._condition을 잡은 상태에서 호출. 보낼 차례가 될 때까지 기다렸다가
+        지금 보낼 수 있는 항목을 MAX_BATCH개까지 반환 (닫혔으면 빈 목록)
+        """
+        batch = []
+        while not self._closed and len(batch) < MAX_BATCH:
+            if not self._heap:
+                if batch:
+                    break
+                # 이미 지난 그룹 간격은 정리 (그룹 수만큼 메모리가 늘지 않도록)
+                now = time.monotonic()
+                self._group_next = {group: t for group, t in self._group_next.items() if t > now}
+                self._condition.wait()
+                continue
+
+            due, _, job, index, round_no = self._heap[0]
+            if job.cancelled:
+                heapq.heappop(self._heap)
+                continue
+            now = time.monotonic()
+            if due > now:
+                if batch:
+                    break
+                self._condition.wait(due - now)
+                continue
+            if self._bucket is not None:
+                wait = self._bucket.take(now)
+                if wait > 0:
+                    if batch:
+                        break
+                    self._condition.wait(wait)
+                    continue
+            heapq.heappop(self._heap)
+            batch.append((job, index, round_no))
+        return batch
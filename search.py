@@ -0,0 +1,98 @@
+"""
+PC 테이블의 필터와 정렬
+
+- SearchIndex: PC마다 name, IP, DDNS, MAC을 소문자로 이어 붙인 검색 문자열을 미리 만들어 두고
+  PC가 추가/수정/삭제될 때 해당 PC만 갱신한다. 검색은 부분 문자열 일치이고,
+  이전 검색어를 포함하는 검색어(한 글자 더 입력)는 이전 결과 안에서만 찾으므로 입력할수록 빨라진다
+- column_sort_key: 칼럼별 정렬 키 (IP는 숫자 순서, 포트는 정수)
+"""
+from typing import Any, Callable, Iterable
+
+SEARCH_KEYS = ("name", "ip", "ddns", "mac")
+# 결과를 기억해 두는 최근 검색어 수 (PC가 바뀌면 모두 지운다)
+MAX_CACHED_QUERIES = 64
+
+
+def _compact_mac(mac) -> str:
+    # inventory.normalize_mac과 같은 형태 (inventory가 이 모듈을 import하므로 여기서 정의)
+    return str(mac).replace(":", "").replace("-", "").upper()
+
+def search_text(pc: dict) -> str:
+    """
+    pc의 검색 문자열
+    - 필드 사이에 줄바꿈을 넣어서 두 필드에 걸친 문자열은 일치하지 않는다
+    - MAC은 구분자 없는 형태도 넣어서 "aabbcc"로도 찾을 수 있다
+    """
+    values = [str(pc.get(key, "")) for key in SEARCH_KEYS]
+    values.append(_compact_mac(pc.get("mac", "")))
+    return "\n".join(values).casefold()
+
+
+class SearchIndex:
+    """pc id -> 검색 문자열. 결과는 추가된 순서(inventory의 표시 순서)"""
+
+    def __init__(self, items: Iterable[tuple[int, dict]] = ()):
+        self._texts: dict[int, str] = {pc_id: search_text(pc) for pc_id, pc in items}
+        self._cache: dict[str, list[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def set(self, pc_id: int, pc: dict):
+        """추가 또는 수정 (수정한 PC의 순서는 그대로)"""
+        self._texts[pc_id] = search_text(pc)
+        self._cache.clear()
+
+    def remove(self, pc_id: int):
+        self._texts.pop(pc_id, None)
+        self._cache.clear()
+
+    def search(self, query: str) -> list[int]:
+        """query가 포함된 PC의 id 목록 (대소문자 무시). 반환한 목록은 캐시와 공유하므로 바꾸지 않는다"""
+        query = query.strip().casefold()
+        if not query:
+            return list(self._texts)
+        result = self._cache.get(query)
+        if result is not None:
+            return result
+
+        # 이전 검색어가 query의 일부이면 그 결과가 후보 (가장 적은 후보를 사용)
+        candidates = None
+        for cached_query, ids in self._cache.items():
+            if cached_query in query and (candidates is None or len(ids) < len(candidates)):
+                candidates = ids
+        texts = self._texts
+        if candidates is None:
+            result = [pc_id for pc_id, text in texts.items() if query in text]
+        else:
+            result = [pc_id for pc_id in candidates if query in texts[pc_id]]
+
+        if len(self._cache) >= MAX_CACHED_QUERIES:
+            self._cache.clear()
+        self._cache[query] = result
+        return result
+
+
+def _ip_sort_key(value: str) -> tuple:
+    # 올바른 IPv4는 숫자 순서로 앞에, 나머지(빈 값 포함)는 문자열 순서로 뒤에
+    try:
+        a, b, c, d = value.split(".")
+        return (0, int(a), int(b), int(c), int(d))
+    except ValueError:
+        return (1, value)
+
+def _port_sort_key(value) -> tuple:
+    try:
+        return (0, int(value))
+    except (TypeError, ValueError):
+        return (1, str(value))
+
+def column_sort_key(column: str) -> Callable[[Any], Any]:
+    """칼럼 값의 정렬 키 함수"""
+    if column == "ip":
+        return _ip_sort_key
+    if column == "port":
+        return _port_sort_key
+    if column == "mac":
+        return _compact_mac
+    return lambda value: str(value).casefold()
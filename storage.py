@@ -0,0 +1,339 @@
+"""
+PC 목록 저장소
+- JsonStorage: PCList.json 형식. 임시 파일에 쓴 뒤 rename해서 저장 중 종료돼도 파일이 깨지지 않는다
+  다른 프로그램(다른 인스턴스, 프로비저닝 스크립트)이 바꾼 내용은 poll()과 저장 전에 합치고,
+  읽기/쓰기는 advisory lock으로 다른 인스턴스와 겹치지 않게 한다
+- SQLiteStorage: SQLite(WAL) 파일. 바뀐 PC만 한 트랜잭션으로 기록한다
+두 저장소 모두 inventory에 바뀐 것이 없으면 아무것도 쓰지 않는다
+"""
+import json
+import os
+import tempfile
+import time
+
+from file_watch import FileWatcher, locked
+from inventory import Inventory, normalize_mac
+import metrics
+
+DEFAULT_JSON_FILE = "PCList.json"
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+
+class StorageError(Exception):
+    """저장소 파일이 손상되었거나 읽을 수 없음"""
+
+
+def load_pc_list(json_file: str = DEFAULT_JSON_FILE) -> list[dict]:
+    """
+    json 파일에서 PC 목록을 읽는다
+    - 파일이 없으면 빈 목록
+    - 형식이 잘못된 파일은 json.JSONDecodeError를 그대로 전달
+    """
+    if not os.path.exists(json_file):
+        return []
+
+    with open(json_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data.get("pc_list", [])
+
+def save_pc_list(pc_list: list[dict], json_file: str = DEFAULT_JSON_FILE):
+    """임시 파일에 쓰고 fsync 후 rename (기존 파일은 완전히 교체되거나 그대로 남는다)"""
+    directory = os.path.dirname(os.path.abspath(json_file))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".PCList.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({"pc_list": pc_list}, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp는 0600으로 만들므로 기존 파일(없으면 umask 기본값)의 권한을 유지
+        os.chmod(tmp_path, _file_mode(json_file))
+        os.replace(tmp_path, json_file)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _file_mode(path: str) -> int:
+    try:
+        return os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def _timed(event: str, storage, operation, *args):
+    """operation을 실행하고 수집이 켜져 있으면 event로 기록 (저장할 것이 없던 save(False 반환)는 제외)"""
+    if not metrics.enabled:
+        return operation(*args)
+    start = time.perf_counter()
+    try:
+        result = operation(*args)
+    except Exception as e:
+        metrics.record(event, time.perf_counter() - start, e, path=storage.path)
+        raise
+    if result is not False:
+        metrics.record(event, time.perf_counter() - start, None, path=storage.path)
+    return result
+
+
+def merge_key(pc: dict) -> str:
+    """파일의 PC와 inventory의 PC를 대응시키는 키 (MAC, 없으면 이름)"""
+    mac = normalize_mac(pc.get("mac", ""))
+    return mac if mac else f"name:{pc.get('name', '')}"
+
+def merge_pc_list(inventory: Inventory, pc_list: list[dict], synced_keys: dict[int, str]) -> set[int]:
+    """
+    다른 프로그램이 저장한 pc_list를 inventory에 합치고 추가/수정/삭제된 pc id 반환
+    - synced_keys: 마지막으로 파일과 같았을 때의 pc id -> merge_key. 파일과 같아진 PC의 키로 갱신한다
+    - 아직 저장하지 않은 변경(추가/수정/삭제)이 있는 PC는 inventory 쪽을 유지 (다음 저장 때 기록된다)
+      이 PC들의 키는 파일의 이전 항목과 계속 대응되도록 바꾸지 않는다
+    - 합친 내용은 이미 파일에 있으므로 저장할 변경으로 표시하지 않는다
+    """
+    local_changed, local_removed = inventory.take_changes()
+
+    # 키 -> 아직 대응되지 않은 pc id (같은 MAC이 여러 개여도 하나씩 대응)
+    unmatched: dict[str, list[int]] = {}
+    for pc_id, pc in inventory.items():
+        # 로컬에서 MAC을 바꾼 PC도 파일의 이전 항목과 대응되도록 마지막 동기화 때의 키를 사용
+        unmatched.setdefault(synced_keys.get(pc_id) or merge_key(pc), []).append(pc_id)
+    # 로컬에서 삭제한 PC의 파일 항목은 다시 추가하지 않는다
+    deleted: dict[str, list[int]] = {}
+    for pc_id in local_removed:
+        if pc_id in synced_keys:
+            deleted.setdefault(synced_keys[pc_id], []).append(pc_id)
+
+    affected = set()
+    for pc in pc_list:
+        key = merge_key(pc)
+        ids = unmatched.get(key)
+        if ids:
+            pc_id = ids.pop(0)
+            if pc_id not in local_changed and inventory.get(pc_id) != pc:
+                inventory.update(pc_id, pc)
+                affected.add(pc_id)
+        elif deleted.get(key):
+            deleted[key].pop(0)
+        else:
+            affected.add(inventory.add(pc))
+
+    # 파일에서 사라진 PC (로컬에서 새로 추가했거나 수정 중인 PC는 유지)
+    for ids in unmatched.values():
+        for pc_id in ids:
+            if pc_id not in local_changed:
+                inventory.remove(pc_id)
+                affected.add(pc_id)
+
+    inventory.take_changes()
+    inventory.restore_changes(local_changed, local_removed)
+
+    for pc_id in list(synced_keys):
+        if pc_id not in inventory and pc_id not in local_removed:
+            del synced_keys[pc_id]
+    # 파일에서도 사라진 삭제 PC는 더 대응시킬 항목이 없다
+    for ids in deleted.values():
+        for pc_id in ids:
+            del synced_keys[pc_id]
+    for pc_id, pc in inventory.items():
+        if pc_id not in local_changed:
+            synced_keys[pc_id] = merge_key(pc)
+    return affected
+
+
+class JsonStorage:
+    def __init__(self, path: str = DEFAULT_JSON_FILE):
+        self.path = path
+        self._watcher: FileWatcher | None = None
+        self._synced_keys: dict[int, str] = {}  # 마지막으로 파일과 같았을 때의 pc id -> merge_key
+        self._merged: set[int] = set()  # 저장 전에 합쳐서 아직 poll()로 알리지 않은 pc id
+
+    def load(self) -> Inventory:
+        return _timed("load", self, self._load)
+
+    def save(self, inventory: Inventory) -> bool:
+        """바뀐 것이 있으면 전체 파일을 다시 쓰고 True 반환"""
+        return _timed("save", self, self._save, inventory)
+
+    def poll(self, inventory: Inventory) -> set[int]:
+        """
+        마지막으로 읽거나 쓴 뒤 다른 프로그램이 파일을 바꿨으면 inventory에 합치고 바뀐 pc id 반환
+        - 바뀌지 않았으면 파일을 읽지 않는다 (inotify 이벤트 확인 또는 stat 한 번)
+        - 파일이 잘못되었으면 StorageError (다음 poll에서 다시 시도)
+        """
+        return self.merge_polled(inventory, self.read_polled())
+
+    def read_polled(self) -> list[dict] | None:
+        """
+        poll()에서 파일을 다루는 부분: 바뀌었으면 잠금을 잡고 읽은 pc_list, 바뀌지 않았으면 None
+        - inventory를 건드리지 않으므로 스레드에서 실행하고 merge_polled()만 inventory를 쓰는 쪽에서 호출할 수 있다
+        """
+        if self._watcher is None or not self._watcher.changed():
+            return None
+        with locked(self.path, exclusive=False):
+            pc_list = self._read()
+            self._watcher.snapshot()
+        return pc_list
+
+    def merge_polled(self, inventory: Inventory, pc_list: list[dict] | None) -> set[int]:
+        """read_polled()가 읽은 pc_list를 inventory에 합치고 바뀐 pc id 반환"""
+        merged, self._merged = self._merged, set()
+        if pc_list is not None:
+            merged |= merge_pc_list(inventory, pc_list, self._synced_keys)
+        return merged
+
+    def _read(self) -> list[dict]:
+        # 잠금을 잡은 상태에서 호출
+        try:
+            return load_pc_list(self.path)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise StorageError(str(e)) from e
+
+    def _merge(self, inventory: Inventory) -> set[int]:
+        # 잠금을 잡은 상태에서 호출
+        merged = merge_pc_list(inventory, self._read(), self._synced_keys)
+        self._watcher.snapshot()
+        return merged
+
+    def _synced(self, inventory: Inventory):
+        # 지금 파일 내용을 기준으로 (자신이 쓴 변경은 poll에서 다시 읽지 않는다)
+        if self._watcher is None:
+            self._watcher = FileWatcher(self.path)
+        else:
+            self._watcher.snapshot()
+        self._synced_keys = {pc_id: merge_key(pc) for pc_id, pc in inventory.items()}
+
+    def _load(self) -> Inventory:
+        with locked(self.path, exclusive=False):
+            try:
+                inventory = Inventory(load_pc_list(self.path))
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                raise StorageError(str(e)) from e
+            inventory.take_changes()
+            self._synced(inventory)
+        return inventory
+
+    def _save(self, inventory: Inventory) -> bool:
+        if not inventory.has_changes:
+            return False
+        with locked(self.path):
+            # 다른 프로그램의 변경을 덮어쓰지 않도록 먼저 합친다
+            if self._watcher is not None and self._watcher.changed():
+                self._merged |= self._merge(inventory)
+            changes = inventory.take_changes()
+            try:
+                save_pc_list(inventory.to_list(), self.path)
+            except BaseException:
+                inventory.restore_changes(*changes)
+                raise
+            self._synced(inventory)
+        return True
+
+    def reset(self):
+        with locked(self.path):
+            save_pc_list([], self.path)
+        self.close()
+
+    def close(self):
+        if self._watcher is not None:
+            self._watcher.close()
+            self._watcher = None
+
+
+class SQLiteStorage:
+    """
+    PC 하나가 한 행. 행 id가 inventory의 pc id와 같아서 바뀐 PC만 기록할 수 있다
+    - 데이터베이스가 비어 있고 import_from의 json 파일이 있으면 처음 열 때 가져온다
+    """
+
+    def __init__(self, path: str, import_from: str | None = None):
+        self.path = path
+        self.import_from = import_from
+        self._connection = None
+
+    def _connect(self) -> "sqlite3.Connection":
+        # sqlite3는 SQLite 저장소를 쓸 때만 import (json만 쓰는 경우의 시작 시간 단축)
+        import sqlite3
+
+        if self._connection is None:
+            connection = sqlite3.connect(self.path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS pc (id INTEGER PRIMARY KEY, data TEXT NOT NULL)")
+            self._connection = connection
+        return self._connection
+
+    def load(self) -> Inventory:
+        return _timed("load", self, self._load)
+
+    def save(self, inventory: Inventory) -> bool:
+        """바뀐/삭제된 PC만 한 트랜잭션으로 기록하고 True 반환"""
+        return _timed("save", self, self._save, inventory)
+
+    def _load(self) -> Inventory:
+        import sqlite3
+
+        try:
+            connection = self._connect()
+            rows = connection.execute("SELECT id, data FROM pc ORDER BY id").fetchall()
+            inventory = Inventory()
+            for pc_id, data in rows:
+                inventory.add(json.loads(data), pc_id)
+        except (sqlite3.DatabaseError, json.JSONDecodeError) as e:
+            raise StorageError(str(e)) from e
+
+        if not rows and self.import_from and os.path.exists(self.import_from):
+            try:
+                inventory = Inventory(load_pc_list(self.import_from))
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                raise StorageError(str(e)) from e
+            self._save(inventory)
+            return inventory
+
+        inventory.take_changes()
+        return inventory
+
+    def _save(self, inventory: Inventory) -> bool:
+        if not inventory.has_changes:
+            return False
+        changed, removed = inventory.take_changes()
+        try:
+            with self._connect() as connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO pc (id, data) VALUES (?, ?)",
+                    [(pc_id, json.dumps(inventory.get(pc_id), ensure_ascii=False)) for pc_id in changed]
+                )
+                connection.executemany("DELETE FROM pc WHERE id = ?", [(pc_id,) for pc_id in removed])
+        except BaseException:
+            inventory.restore_changes(changed, removed)
+            raise
+        return True
+
+    def poll(self, inventory: Inventory) -> set[int]:
+        # 행 단위로 트랜잭션 안에서 기록하므로 다른 인스턴스의 변경을 덮어쓰지 않는다 (다시 읽기는 하지 않음)
+        return set()
+
+    def read_polled(self) -> None:
+        return None
+
+    def merge_polled(self, inventory: Inventory, pc_list: None) -> set[int]:
+        return set()
+
+    def reset(self):
+        self.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def open_storage(path: str = DEFAULT_JSON_FILE) -> JsonStorage | SQLiteStorage:
+    """확장자가 .db/.sqlite/.sqlite3이면 SQLite, 그 외는 json 저장소"""
+    if path.lower().endswith(SQLITE_EXTENSIONS):
+        # 같은 폴더의 PCList.json이 있으면 처음 열 때 가져온다
+        import_from = os.path.join(os.path.dirname(path), DEFAULT_JSON_FILE)
+        return SQLiteStorage(path, import_from=import_from)
+    return JsonStorage(path)
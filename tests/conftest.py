@@ -0,0 +1,9 @@
+"""
+테스트 공용 설정: 저장소 루트의 모듈(flat 구조)을 import할 수 있도록 sys.path에 추가
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -0,0 +1,84 @@
+import asyncio
+import socket
+
+import pytest
+
+from agents import Agent, Coordinator, encode_message, read_message
+from packet_sender import DEFAULT_POLICY, SendPolicy
+
+
+@pytest.fixture
+def sink():
+    """매직 패킷을 받을 로컬 UDP 포트"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    yield sock.getsockname()[1]
+    sock.close()
+
+async def wait_until(condition, timeout: float = 5.0):
+    end = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < end, "timed out"
+        await asyncio.sleep(0.01)
+
+async def start_agent(coordinator: Coordinator, port: int, name: str, subnet: str, priority: int = 0):
+    # 루프백에는 서브넷 브로드캐스트로 보내지 않는다
+    agent = Agent("127.0.0.1", port, name, [subnet], priority, policy=SendPolicy())
+    task = asyncio.create_task(agent.run())
+    await wait_until(lambda: name in coordinator.agents)
+    return agent, task
+
+async def stop_agent(coordinator: Coordinator, agent: Agent, task: asyncio.Task):
+    agent.stop()
+    await task
+    agent.scheduler.close()
+    await wait_until(lambda: agent.name not in coordinator.agents)
+
+
+def test_routing_failover_and_uncovered_ip(sink):
+    async def main():
+        coordinator = Coordinator()
+        server = await coordinator.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        wide = await start_agent(coordinator, port, "wide", "127.0.0.0/8")
+        backup = await start_agent(coordinator, port, "backup", "127.0.0.0/24", priority=5)
+        primary = await start_agent(coordinator, port, "primary", "127.0.0.0/24", priority=1)
+        targets = [("127.0.0.1", "00:11:22:33:44:55", sink), ("127.5.0.1", "00:11:22:33:44:66", sink),
+                   ("10.9.9.9", "00:11:22:33:44:77", sink)]
+        try:
+            # prefix가 긴 서브넷, 같으면 priority가 낮은 에이전트
+            first = await coordinator.wake(targets, [DEFAULT_POLICY] * 3)
+            await stop_agent(coordinator, *primary)
+            second = await coordinator.wake(targets[:1], [DEFAULT_POLICY])
+        finally:
+            for agent, task in (wide, backup):
+                await stop_agent(coordinator, agent, task)
+            server.close()
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first == [("primary", None), ("wide", None), (None, "No agent for 10.9.9.9")]
+    assert second == [("backup", None)]
+
+def test_unanswered_batch_goes_to_next_agent(sink):
+    async def main():
+        coordinator = Coordinator(result_timeout=0.2)
+        server = await coordinator.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        # 연결은 유지하지만 wake에 결과를 보내지 않는 에이전트
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(encode_message({"type": "hello", "name": "silent", "subnets": ["127.0.0.0/24"]}))
+        assert (await read_message(reader))["type"] == "welcome"
+        backup = await start_agent(coordinator, port, "backup", "127.0.0.0/24", priority=5)
+        try:
+            result = await coordinator.wake([("127.0.0.1", "00:11:22:33:44:55", sink)], [DEFAULT_POLICY])
+            wake = await read_message(reader)
+        finally:
+            await stop_agent(coordinator, *backup)
+            writer.close()
+            server.close()
+        return result, wake
+
+    result, wake = asyncio.run(main())
+    assert wake["type"] == "wake"
+    assert result == [("backup", None)]
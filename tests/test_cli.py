@@ -0,0 +1,59 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT
+import verifier
+from wol_cli import build_parser
+
+
+def test_wake_defaults_match_verifier():
+    args = build_parser().parse_args(["wake", "--all"])
+    assert args.verify_ports == list(verifier.DEFAULT_PORTS)
+    assert args.deadline == verifier.DEFAULT_DEADLINE
+
+def test_serve_defaults_match_agents(capsys):
+    import agents
+    args = build_parser().parse_args(["serve"])
+    assert args.heartbeat == agents.HEARTBEAT_INTERVAL
+    with pytest.raises(SystemExit):
+        build_parser().parse_args(["agent", "--help"])
+    assert f"relay.example.com:{agents.DEFAULT_AGENT_PORT}" in capsys.readouterr().out
+
+def test_import_does_not_load_asyncio_or_sqlite3():
+    # 명령마다 필요한 모듈만 불러와서 시작 시간을 줄인다 (serve, wake --verify 등에서만 asyncio)
+    code = "import sys, wol_cli; print(' '.join(name for name in ('asyncio', 'sqlite3') if name in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == ""
+
+def test_discover_help_matches_discovery(capsys):
+    import discovery
+    with pytest.raises(SystemExit):
+        build_parser().parse_args(["discover", "--help"])
+    help_text = " ".join(capsys.readouterr().out.split())
+    assert f"default: {discovery.ARP_CONCURRENCY} for arp, {discovery.UDP_CONCURRENCY} for udp" in help_text
+    assert f"default: {discovery.ARP_TIMEOUT:g} for arp, {discovery.UDP_TIMEOUT:g} for udp" in help_text
+
+def test_wake_dry_run_prints_every_packet(tmp_path):
+    path = tmp_path / "PCList.json"
+    path.write_text(json.dumps({"pc_list": [
+        {"name": "pc1", "ip": "192.168.1.100", "ddns": "", "mac": "00:11:22:33:44:55", "port": 9}
+    ]}), encoding="utf-8")
+    output = subprocess.run(
+        [sys.executable, "-m", "wol_cli", "-f", str(path), "wake", "pc1", "--dry-run", "--repeat", "2",
+         "--interval", "0.5", "--ports", "7,9", "--broadcast"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    lines = output.stdout.splitlines()
+    assert [line.split("  ")[:3] for line in lines] == [
+        ["+0.00s", "pc1", "192.168.1.100:7"], ["+0.00s", "pc1", "192.168.1.100:9"],
+        ["+0.00s", "pc1", "192.168.1.255:7"], ["+0.00s", "pc1", "192.168.1.255:9"],
+        ["+0.50s", "pc1", "192.168.1.100:7"], ["+0.50s", "pc1", "192.168.1.100:9"],
+        ["+0.50s", "pc1", "192.168.1.255:7"], ["+0.50s", "pc1", "192.168.1.255:9"],
+    ]
+    assert all(line.endswith("102 bytes  " + "ff" * 6 + "001122334455" * 16) for line in lines)
+    assert "8 packets to 1 PCs (dry run, nothing sent)" in output.stderr
+    # 보내지 않았으므로 기록도 남기지 않는다
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["PCList.json"]
@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+
+import dns_cache
+from dns_cache import DNSCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+class StubResolver:
+    """answers의 값을 돌려주고 조회한 이름을 기록 (값이 None이면 실패)"""
+
+    def __init__(self, **answers):
+        self.answers = answers
+        self.calls = []
+        self.called = threading.Event()
+
+    def __call__(self, ddns: str) -> str | None:
+        self.calls.append(ddns)
+        self.called.set()
+        return self.answers.get(ddns.split(".")[0])
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(dns_cache, "time", clock)
+    return clock
+
+def wait_refreshed(cache: DNSCache):
+    end = time.monotonic() + 5
+    while cache._refreshing and time.monotonic() < end:
+        time.sleep(0.01)
+
+
+def test_result_is_cached_until_ttl(clock):
+    resolver = StubResolver(pc1="10.0.0.1")
+    cache = DNSCache(ttl=60, resolver=resolver)
+    assert cache.resolve("pc1.example.com") == "10.0.0.1"
+    clock.now += 59
+    assert cache.resolve("pc1.example.com") == "10.0.0.1"
+    assert resolver.calls == ["pc1.example.com"]
+
+    # 만료 후 allow_stale=False면 바로 다시 조회
+    clock.now += 2
+    resolver.answers["pc1"] = "10.0.0.2"
+    assert cache.resolve("pc1.example.com", allow_stale=False) == "10.0.0.2"
+    assert len(resolver.calls) == 2
+
+def test_failure_is_negative_cached(clock):
+    resolver = StubResolver()
+    cache = DNSCache(negative_ttl=30, resolver=resolver)
+    assert cache.resolve("pc1.example.com") is None
+    clock.now += 29
+    assert cache.resolve("pc1.example.com") is None
+    assert len(resolver.calls) == 1
+    clock.now += 2
+    assert cache.resolve("pc1.example.com") is None
+    assert len(resolver.calls) == 2
+
+def test_failed_refresh_keeps_last_good_ip(clock):
+    resolver = StubResolver(pc1="10.0.0.1")
+    cache = DNSCache(ttl=60, resolver=resolver)
+    cache.resolve("pc1.example.com")
+    resolver.answers["pc1"] = None
+    assert cache.refresh("pc1.example.com") == "10.0.0.1"
+    assert cache.resolve("pc1.example.com") == "10.0.0.1"
+
+def test_expired_entry_is_returned_while_refreshing(clock):
+    resolver = StubResolver(pc1="10.0.0.1")
+    cache = DNSCache(ttl=60, resolver=resolver)
+    cache.resolve("pc1.example.com")
+    clock.now += 61
+    resolver.answers["pc1"] = "10.0.0.2"
+    resolver.called.clear()
+    # 기존 IP를 바로 돌려주고 백그라운드에서 갱신
+    assert cache.resolve("pc1.example.com") == "10.0.0.1"
+    assert resolver.called.wait(5)
+    wait_refreshed(cache)
+    assert cache.resolve("pc1.example.com") == "10.0.0.2"
+    assert len(resolver.calls) == 2
+
+def test_primed_ip_is_used_and_refreshed(clock):
+    resolver = StubResolver(pc1="10.0.0.2")
+    cache = DNSCache(resolver=resolver)
+    cache.prime("pc1.example.com", "10.0.0.1")
+    assert cache.resolve("pc1.example.com") == "10.0.0.1"
+    wait_refreshed(cache)
+    assert cache.resolve("pc1.example.com") == "10.0.0.2"
+
+def test_least_recently_used_entry_is_evicted(clock):
+    resolver = StubResolver(a="10.0.0.1", b="10.0.0.2", c="10.0.0.3")
+    cache = DNSCache(max_size=2, resolver=resolver)
+    cache.resolve("a.example.com")
+    cache.resolve("b.example.com")
+    cache.resolve("a.example.com")
+    cache.resolve("c.example.com")
+    assert len(cache) == 2
+    # b가 가장 오래 사용하지 않은 항목
+    resolver.calls.clear()
+    cache.resolve("a.example.com")
+    cache.resolve("b.example.com")
+    assert resolver.calls == ["b.example.com"]
+
+def test_invalidate(clock):
+    resolver = StubResolver(pc1="10.0.0.1")
+    cache = DNSCache(resolver=resolver)
+    cache.resolve("pc1.example.com")
+    cache.invalidate("pc1.example.com")
+    cache.resolve("pc1.example.com")
+    assert len(resolver.calls) == 2
+    cache.invalidate()
+    assert len(cache) == 0
@@ -0,0 +1,69 @@
+import os
+import shutil
+import subprocess
+import threading
+
+import pytest
+
+from ethernet import EthernetSender
+from packet_sender import SendPolicy, create_magic_packet
+from receiver import PacketReceiver, mac_names
+from scheduler import WakeScheduler
+
+LOCAL_LINK = "woltest0"
+PEER_LINK = "woltest1"
+PCS = [{"name": "PC1", "mac": "00:11:22:33:44:55"}, {"name": "PC2", "mac": "00:11:22:33:44:66"}]
+
+
+@pytest.fixture
+def veth():
+    """보내는 쪽과 받는 쪽 veth 쌍 (raw 소켓과 ip link에 root 필요)"""
+    if not hasattr(os, "geteuid") or os.geteuid() != 0 or shutil.which("ip") is None:
+        pytest.skip("needs root and the ip command")
+    subprocess.run(["ip", "link", "del", LOCAL_LINK], capture_output=True)
+    try:
+        for args in (("link", "add", LOCAL_LINK, "type", "veth", "peer", "name", PEER_LINK),
+                     ("link", "set", LOCAL_LINK, "up"), ("link", "set", PEER_LINK, "up")):
+            subprocess.run(["ip", *args], check=True, capture_output=True)
+    except subprocess.CalledProcessError as e:
+        pytest.skip(f"cannot create a veth pair: {e.stderr.decode().strip()}")
+    yield LOCAL_LINK, PEER_LINK
+    subprocess.run(["ip", "link", "del", LOCAL_LINK], capture_output=True)
+
+def receive(interface: str, count: int, send) -> dict:
+    """interface에서 count개를 받는 동안 send()를 실행하고 PC 이름별 수 반환"""
+    with PacketReceiver(ports=[], interface=interface, names=mac_names(PCS)) as receiver:
+        thread = threading.Thread(target=receiver.run, kwargs={"duration": 5.0, "count": count})
+        thread.start()
+        try:
+            send()
+        finally:
+            thread.join()
+        return {row["name"]: row["count"] for row in receiver.report()}
+
+
+def test_frames_reach_peer(veth):
+    local, peer = veth
+    payloads = [create_magic_packet(PCS[0]["mac"])] * 3 + [create_magic_packet(PCS[1]["mac"])]
+
+    def send():
+        with EthernetSender(local) as sender:
+            assert sender.send(payloads) == 4
+
+    assert receive(peer, 4, send) == {"PC1": 3, "PC2": 1}
+
+def test_scheduler_ethernet_transport(veth):
+    local, peer = veth
+    scheduler = WakeScheduler()
+
+    def send():
+        # 이더넷 전송은 IP를 쓰지 않는다
+        job = scheduler.submit([("0.0.0.0", pc["mac"], 9) for pc in PCS],
+                               policies=SendPolicy(repeat=2, interval=0.01, transport="ethernet", interface=local))
+        assert job.wait(5.0)
+        assert (job.sent, job.failed) == (2, 0)
+
+    try:
+        assert receive(peer, 4, send) == {"PC1": 2, "PC2": 2}
+    finally:
+        scheduler.close()
@@ -0,0 +1,28 @@
+import os
+
+from file_watch import lock_path, locked
+from storage import JsonStorage, save_pc_list
+
+
+def test_shared_lock_does_not_create_lock_file(tmp_path):
+    path = str(tmp_path / "PCList.json")
+    with locked(path, exclusive=False):
+        pass
+    assert not os.path.exists(lock_path(path))
+
+    with locked(path):
+        pass
+    assert os.path.exists(lock_path(path))
+    # 잠금 파일이 있으면 공유 잠금도 건다
+    with locked(path, exclusive=False):
+        pass
+
+def test_load_leaves_no_lock_file(tmp_path):
+    path = str(tmp_path / "PCList.json")
+    save_pc_list([{"name": "PC1", "mac": "00:11:22:33:44:55"}], path)
+    storage = JsonStorage(path)
+    try:
+        assert len(storage.load()) == 1
+    finally:
+        storage.close()
+    assert os.listdir(tmp_path) == ["PCList.json"]
@@ -0,0 +1,154 @@
+import pytest
+
+import history
+from history import FAILED, NO_RESPONSE, SENT, UP, WakeHistory
+
+
+class FakeClock:
+    """history.time 대신 쓰는 시계 (기록 시각을 정할 수 있게)"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(history, "time", clock)
+    return clock
+
+@pytest.fixture
+def directory(tmp_path):
+    return str(tmp_path / "WakeHistory")
+
+def open_history(directory: str, **options) -> WakeHistory:
+    # 기록 스레드가 알아서 쓰지 않도록 flush_interval을 길게 두고 flush()로 쓴다
+    options.setdefault("flush_interval", 60.0)
+    return WakeHistory(directory, **options)
+
+def names(records) -> list[str]:
+    return [record.name for record in records]
+
+def count_reads(wake_history: WakeHistory, monkeypatch) -> list[int]:
+    """_read_block이 푼 블록의 위치 목록"""
+    reads = []
+    read_block = wake_history._read_block
+
+    def counting(segment, block, filters):
+        reads.append(block.offset)
+        return read_block(segment, block, filters)
+
+    monkeypatch.setattr(wake_history, "_read_block", counting)
+    return reads
+
+
+def test_query_includes_unwritten_records(directory, clock):
+    with open_history(directory) as wake_history:
+        wake_history.record("pc1", "aa-bb-cc-dd-ee-01", "10.0.0.1", SENT)
+        assert names(wake_history.query()) == ["pc1"]
+        assert wake_history.query()[0].mac == "AA:BB:CC:DD:EE:01"
+
+def test_segments_rotate_and_old_ones_are_removed(directory, clock):
+    # 블록마다 새 파일로 넘어가고 파일은 최근 3개만 남는다
+    with open_history(directory, max_segment_bytes=1, max_segments=3) as wake_history:
+        for i in range(5):
+            clock.now += 1
+            wake_history.record(f"pc{i}", f"aabbccddee0{i}", "", SENT)
+            wake_history.flush()
+        assert wake_history._segment_numbers() == [3, 4, 5]
+        assert names(wake_history.query()) == ["pc4", "pc3", "pc2"]
+        assert wake_history.error is None
+
+def test_segment_keeps_appending_below_size_limit(directory, clock):
+    with open_history(directory) as wake_history:
+        for i in range(3):
+            wake_history.record(f"pc{i}", "", "", SENT)
+            wake_history.flush()
+        assert wake_history._segment_numbers() == [1]
+        assert names(wake_history.query()) == ["pc2", "pc1", "pc0"]
+
+def test_last_records_for_host_read_only_its_blocks(directory, clock, monkeypatch):
+    with open_history(directory) as wake_history:
+        for i in range(6):
+            clock.now += 1
+            name = "target" if i in (1, 3, 4) else f"other{i}"
+            wake_history.record(name, f"aabbccddee0{i}" if name != "target" else "aabbccddeeff", "", SENT)
+            wake_history.flush()
+        reads = count_reads(wake_history, monkeypatch)
+        records = wake_history.query(host="target", limit=2)
+        assert [record.time for record in records] == [1005.0, 1004.0]
+        # 색인에 따라 target이 있는 최근 블록 두 개만 푼다
+        assert len(reads) == 2
+
+        # MAC으로도 찾는다 (구분자 무관)
+        assert len(wake_history.query(host="aa-bb-cc-dd-ee-ff", limit=None)) == 3
+        assert wake_history.query(host="missing") == []
+
+def test_host_query_filters_records_inside_shared_block(directory, clock):
+    with open_history(directory) as wake_history:
+        for name in ("pc1", "pc2", "pc1", "pc3"):
+            clock.now += 1
+            wake_history.record(name, "", "", SENT)
+        wake_history.flush()
+        assert [record.time for record in wake_history.query(host="pc1")] == [1003.0, 1001.0]
+
+def test_failures_since(directory, clock, monkeypatch):
+    with open_history(directory) as wake_history:
+        # 오래된 실패, 최근 성공만 있는 블록, 최근 실패가 있는 블록
+        clock.now = 1000.0
+        wake_history.record("old", "", "", FAILED, error="unreachable")
+        wake_history.flush()
+        clock.now = 2000.0
+        wake_history.record("ok", "", "", SENT)
+        wake_history.record("ok", "", "", UP)
+        wake_history.flush()
+        clock.now = 3000.0
+        wake_history.record("new", "", "", SENT)
+        wake_history.record("new", "", "", NO_RESPONSE)
+        wake_history.flush()
+
+        reads = count_reads(wake_history, monkeypatch)
+        records = wake_history.query(failed=True, since=1500.0)
+        assert [(record.name, record.result) for record in records] == [("new", NO_RESPONSE)]
+        # 시각이 지났거나 실패가 없는 블록은 풀지 않는다
+        assert len(reads) == 1
+
+        records = wake_history.query(failed=True, limit=None)
+        assert [(record.name, record.error) for record in records] == [("new", None), ("old", "unreachable")]
+
+def test_reopen_existing_log(directory, clock):
+    with open_history(directory) as wake_history:
+        wake_history.record("pc1", "aabbccddee01", "10.0.0.1", FAILED, error="timeout", latency=0.5,
+                            source="cli", user="alice")
+    # close()가 남은 기록을 쓴다
+
+    with open_history(directory) as reopened:
+        assert reopened.recent() == []
+        [record] = reopened.query(host="pc1")
+        assert (record.mac, record.ip, record.result, record.error, record.latency, record.source, record.user) == (
+            "AA:BB:CC:DD:EE:01", "10.0.0.1", FAILED, "timeout", 0.5, "cli", "alice")
+        clock.now += 1
+        reopened.record("pc2", "", "", SENT)
+        reopened.flush()
+        # 같은 파일에 이어 붙인다
+        assert reopened._segment_numbers() == [1]
+        assert names(reopened.query()) == ["pc2", "pc1"]
+
+def test_query_sees_blocks_written_by_another_instance(directory, clock):
+    with open_history(directory) as reader, open_history(directory) as writer:
+        writer.record("pc1", "", "", SENT)
+        writer.flush()
+        assert names(reader.query()) == ["pc1"]
+        clock.now += 1
+        writer.record("pc2", "", "", SENT)
+        writer.flush()
+        # 앞에서 읽은 색인 뒤에 추가된 줄만 더 읽는다
+        assert names(reader.query()) == ["pc2", "pc1"]
+
+def test_record_after_close_raises(directory, clock):
+    wake_history = open_history(directory)
+    wake_history.close()
+    with pytest.raises(ValueError):
+        wake_history.record("pc1", "", "", SENT)
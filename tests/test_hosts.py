@@ -0,0 +1,62 @@
+import pytest
+
+from hosts import MAGIC_PACKET_SIZE, Host, HostError, magic_packet
+
+
+def pc(**fields) -> dict:
+    return {"name": "pc", "ip": "192.168.0.10", "ddns": "", "mac": "aa-bb-cc-dd-ee-ff", "port": "9", **fields}
+
+
+def test_from_pc():
+    host = Host.from_pc(pc())
+    assert host.mac == 0xAABBCCDDEEFF
+    assert host.ip == bytes([192, 168, 0, 10])
+    assert host.ip_address == "192.168.0.10"
+    assert host.port == 9
+
+def test_packet():
+    host = Host.from_pc(pc(mac="01:02:03:04:05:06"))
+    assert len(host.packet) == MAGIC_PACKET_SIZE
+    assert host.packet[:6] == b"\xff" * 6
+    assert host.packet[6:] == bytes([1, 2, 3, 4, 5, 6]) * 16
+    assert host.packet == magic_packet(0x010203040506)
+
+def test_leading_zeros_are_decimal():
+    assert Host.from_pc(pc(ip="010.000.000.008")).ip == bytes([10, 0, 0, 8])
+
+@pytest.mark.parametrize("fields, key", [
+    ({"ip": "256.0.0.1"}, "ip"),
+    ({"ip": ""}, "ip"),
+    ({"mac": "aa-bb-cc"}, "mac"),
+    ({"port": "70000"}, "port"),
+    ({"subnet": "not a subnet"}, "subnet"),
+])
+def test_invalid_pc(fields, key):
+    with pytest.raises(HostError) as error:
+        Host.from_pc(pc(**fields))
+    assert error.value.key == key
+    assert str(error.value) == f"Invalid {key}"
+    assert isinstance(error.value, ValueError)
+
+def test_ddns_only_host_has_no_ip():
+    host = Host.from_pc(pc(ip="", ddns="home.example.com"))
+    assert host.ip is None
+    assert host.ip_address == ""
+
+def test_with_ip_shares_packet():
+    host = Host.from_pc(pc(ip="", ddns="home.example.com"))
+    resolved = host.with_ip("203.0.113.7")
+    assert resolved.ip_address == "203.0.113.7"
+    assert (resolved.mac, resolved.port) == (host.mac, host.port)
+    assert resolved.packet is host.packet
+    # 원래 레코드는 그대로
+    assert host.ip is None
+
+def test_with_invalid_ip():
+    host = Host.from_pc(pc())
+    with pytest.raises(HostError) as error:
+        host.with_ip("example.com")
+    assert error.value.key == "ip"
+
+def test_repr():
+    assert repr(Host.from_pc(pc())) == "Host(mac=AABBCCDDEEFF, ip='192.168.0.10', port=9)"
@@ -0,0 +1,91 @@
+import io
+import json
+
+import pytest
+
+from importer import import_rows, parse_csv, parse_dhcpd_leases, parse_json, parse_jsonl
+from inventory import Inventory
+
+LEASES = """\
+lease 10.0.0.5 {
+  binding state active;
+  hardware ethernet 00:11:22:33:44:55;
+  client-hostname "pc1";
+}
+lease 10.0.0.7 {
+  binding state free;
+  hardware ethernet 00:11:22:33:44:66;
+  client-hostname "pc2";
+}
+lease 10.0.0.5 {
+  binding state expired;
+  next binding state free;
+  hardware ethernet 00:11:22:33:44:55;
+  client-hostname "pc1";
+}
+lease 10.0.0.9 {
+  binding state active;
+  next binding state free;
+  hardware ethernet 00:11:22:33:44:55;
+  client-hostname "pc1";
+}
+lease 10.0.0.20 {
+  hardware ethernet 00:11:22:33:44:77;
+}
+"""
+
+
+def test_dhcpd_leases_keep_last_active_lease():
+    rows = [row for _, row in parse_dhcpd_leases(io.StringIO(LEASES))]
+    # 10.0.0.5는 만료, 10.0.0.7은 free. binding state가 없는 오래된 형식은 active로 본다
+    assert rows == [
+        {"ip": "10.0.0.9", "mac": "00:11:22:33:44:55", "name": "pc1"},
+        {"ip": "10.0.0.20", "mac": "00:11:22:33:44:77"},
+    ]
+
+def test_dhcpd_leases_import_without_rejects():
+    inventory = Inventory()
+    result = import_rows(inventory, parse_dhcpd_leases(io.StringIO(LEASES)))
+    assert (result.added, result.rejected) == (2, 0)
+    assert inventory.get(inventory.find_by_mac("00:11:22:33:44:55"))["ip"] == "10.0.0.9"
+
+def test_parse_json_rejects_top_level_list():
+    with pytest.raises(ValueError):
+        list(parse_json(io.StringIO("[1, 2]")))
+
+def test_parse_json_rejects_non_object_rows():
+    inventory = Inventory()
+    result = import_rows(inventory, parse_json(io.StringIO('{"pc_list": [1]}')))
+    assert result.rejected == 1
+    assert result.rejected_rows[0][1] == "Not a JSON object"
+
+def test_non_scalar_port_is_rejected():
+    inventory = Inventory()
+    rows = parse_jsonl(io.StringIO('{"name": "pc1", "ip": "10.0.0.1", "mac": "00:11:22:33:44:55", "port": [9]}\n'
+                                   '{"name": "pc2", "ip": "10.0.0.2", "mac": "00:11:22:33:44:66", "port": "7"}\n'))
+    result = import_rows(inventory, rows)
+    assert (result.added, result.rejected) == (1, 1)
+    assert result.rejected_rows[0][1] == "Invalid Port Number"
+    assert inventory.get(inventory.find_by_name("pc2"))["port"] == 7
+
+def test_groups_and_send_policy_are_kept():
+    pc_list = {"pc_list": [{"name": "pc1", "ip": "10.0.0.1", "ddns": "", "mac": "00:11:22:33:44:55", "port": 9,
+                            "groups": ["lab", "storage"], "send_policy": {"repeat": 3, "ports": [7, 9]}}]}
+    inventory = Inventory()
+    result = import_rows(inventory, parse_json(io.StringIO(json.dumps(pc_list))))
+    assert result.added == 1
+    pc = inventory.get(inventory.find_by_name("pc1"))
+    assert pc["groups"] == ["lab", "storage"]
+    assert pc["send_policy"] == {"repeat": 3, "ports": [7, 9]}
+
+def test_csv_groups_and_invalid_send_policy():
+    inventory = Inventory()
+    rows = parse_csv(io.StringIO('name,ip,mac,groups\npc1,10.0.0.1,00:11:22:33:44:55,"lab, storage"\n'))
+    assert import_rows(inventory, rows).added == 1
+    assert inventory.get(inventory.find_by_name("pc1"))["groups"] == ["lab", "storage"]
+
+    rows = parse_jsonl(io.StringIO('{"name": "pc2", "ip": "10.0.0.2", "mac": "00:11:22:33:44:66", '
+                                   '"send_policy": {"repeat": 0}}\n'))
+    result = import_rows(inventory, rows)
+    assert result.rejected == 1
+    assert result.rejected_rows[0][1] == "repeat must be at least 1"
@@ -0,0 +1,160 @@
+import pytest
+
+from hosts import HostError
+from inventory import Inventory
+
+
+def pc(name: str, mac: str = "", ip: str = "", ddns: str = "", port: str = "9") -> dict:
+    return {"name": name, "ip": ip, "ddns": ddns, "mac": mac, "port": port}
+
+@pytest.fixture
+def inventory():
+    return Inventory([
+        pc("pc1", "AA:BB:CC:DD:EE:01", "10.0.0.1"),
+        pc("pc2", "AA:BB:CC:DD:EE:02", "203.0.113.1"),
+        pc("pc3", "AA:BB:CC:DD:EE:03", "203.0.113.1", ddns="home.example.com"),
+    ])
+
+
+def test_find_by_indexed_fields(inventory):
+    assert inventory.find_by_name("pc2") == 2
+    assert inventory.find_by_name("missing") is None
+    # MAC은 구분자와 대소문자 무관
+    assert inventory.find_by_mac("aa-bb-cc-dd-ee-03") == 3
+    assert inventory.find_by_mac("aabbccddee01") == 1
+    # 같은 공인 IP 뒤의 PC 여러 개
+    assert inventory.find_by_ip("203.0.113.1") == [2, 3]
+    assert inventory.find_by_ddns("home.example.com") == [3]
+    # 빈 값은 색인하지 않는다
+    assert inventory.find("ddns", "") == []
+
+def test_indexes_follow_update_set_field_and_remove(inventory):
+    inventory.update(1, pc("renamed", "AA:BB:CC:DD:EE:11", "10.0.0.9"))
+    assert inventory.find_by_name("pc1") is None
+    assert inventory.find_by_name("renamed") == 1
+    assert inventory.find_by_mac("AA:BB:CC:DD:EE:01") is None
+    assert inventory.find_by_ip("10.0.0.9") == [1]
+
+    inventory.set_field(2, "ip", "10.0.0.2")
+    assert inventory.find_by_ip("203.0.113.1") == [3]
+    assert inventory.find_by_ip("10.0.0.2") == [2]
+
+    inventory.remove(3)
+    assert inventory.find_by_ip("203.0.113.1") == []
+    assert inventory.find_by_ddns("home.example.com") == []
+    assert 3 not in inventory
+    assert [entry["name"] for entry in inventory] == ["renamed", "pc2"]
+
+def test_update_keeps_dict_reference(inventory):
+    record = inventory.get(1)
+    inventory.update(1, pc("renamed", "AA:BB:CC:DD:EE:01"))
+    assert record is inventory.get(1)
+    assert record["name"] == "renamed"
+
+def test_loads_duplicates_and_shrinks_index_sets():
+    # 기존 파일의 중복 항목도 그대로 불러온다
+    inventory = Inventory([pc("dup", "AA:BB:CC:DD:EE:01"), pc("dup", "aa-bb-cc-dd-ee-01"), pc("dup")])
+    assert len(inventory) == 3
+    assert inventory.find("name", "dup") == [1, 2, 3]
+    assert inventory.find("mac", "AABBCCDDEE01") == [1, 2]
+
+    inventory.remove(2)
+    inventory.remove(3)
+    # 하나 남으면 집합 대신 id로 돌아간다
+    assert inventory._indexes["name"]["dup"] == 1
+    assert inventory.find_by_mac("AA:BB:CC:DD:EE:01") == 1
+
+def test_find_conflict(inventory):
+    assert inventory.find_conflict(pc("pc1", "AA:BB:CC:DD:EE:99")) == "name"
+    assert inventory.find_conflict(pc("new", "aa:bb:cc:dd:ee:02")) == "mac"
+    assert inventory.find_conflict(pc("new", "AA:BB:CC:DD:EE:99")) == ""
+    # 편집 중인 PC 자신은 겹쳐도 괜찮다
+    assert inventory.find_conflict(pc("pc1", "AA:BB:CC:DD:EE:01"), ignore_id=1) == ""
+    assert inventory.find_conflict(pc("pc1", "AA:BB:CC:DD:EE:02"), ignore_id=1) == "mac"
+
+def test_find_conflict_with_duplicates_ignores_only_self():
+    inventory = Inventory([pc("dup"), pc("dup")])
+    assert inventory.find_conflict(pc("dup"), ignore_id=1) == "name"
+
+def test_add_with_stored_id():
+    inventory = Inventory()
+    assert inventory.add(pc("pc5"), pc_id=5) == 5
+    # 다음 id는 지정된 id 뒤에서 시작한다
+    assert inventory.add(pc("pc6")) == 6
+    with pytest.raises(ValueError):
+        inventory.add(pc("again"), pc_id=5)
+
+def test_take_changes(inventory):
+    assert inventory.has_changes
+    assert inventory.take_changes() == ({1, 2, 3}, set())
+    assert not inventory.has_changes
+
+    version = inventory.version
+    inventory.set_field(1, "port", "7")
+    inventory.remove(2)
+    new_id = inventory.add(pc("pc4"))
+    assert inventory.version == version + 3
+    assert inventory.take_changes() == ({1, new_id}, {2})
+    assert inventory.take_changes() == (set(), set())
+
+def test_removed_then_added_again_is_a_change(inventory):
+    inventory.take_changes()
+    record = inventory.remove(2)
+    inventory.add(record, pc_id=2)
+    assert inventory.take_changes() == ({2}, set())
+
+def test_restore_changes_after_failed_save(inventory):
+    inventory.take_changes()
+    inventory.set_field(1, "port", "7")
+    inventory.set_field(2, "port", "7")
+    inventory.remove(3)
+    changed, removed = inventory.take_changes()
+
+    # 저장에 실패한 사이에 2가 삭제되었다
+    inventory.remove(2)
+    inventory.restore_changes(changed, removed)
+    assert inventory.take_changes() == ({1}, {2, 3})
+
+def test_restore_changes_skips_ids_added_back(inventory):
+    inventory.take_changes()
+    record = inventory.remove(3)
+    changed, removed = inventory.take_changes()
+    inventory.add(record, pc_id=3)
+    inventory.restore_changes(changed, removed)
+    assert inventory.take_changes() == ({3}, set())
+
+def test_host_is_cached_until_pc_changes(inventory):
+    host = inventory.host(1)
+    assert inventory.host(1) is host
+    assert host.ip_address == "10.0.0.1"
+
+    inventory.set_field(1, "ip", "10.0.0.5")
+    changed = inventory.host(1)
+    assert changed is not host
+    assert changed.ip_address == "10.0.0.5"
+
+def test_host_error_is_cached_and_cleared(inventory):
+    inventory.set_field(2, "mac", "not a mac")
+    with pytest.raises(HostError) as error:
+        inventory.host(2)
+    assert error.value.key == "mac"
+    # 같은 오류를 다시 검증하지 않고 돌려준다
+    with pytest.raises(HostError) as again:
+        inventory.host(2)
+    assert again.value is error.value
+
+    inventory.set_field(2, "mac", "AA:BB:CC:DD:EE:02")
+    assert inventory.host(2).mac == 0xAABBCCDDEE02
+
+def test_search_index_follows_changes(inventory):
+    assert inventory.search("pc") == [1, 2, 3]
+    inventory.set_field(2, "name", "server")
+    inventory.remove(3)
+    new_id = inventory.add(pc("pc9"))
+    assert inventory.search("pc") == [1, new_id]
+    assert inventory.search("SERVER") == [2]
+
+def test_slice_follows_display_order(inventory):
+    assert inventory.slice(1, 3) == [2, 3]
+    inventory.remove(2)
+    assert inventory.slice(0, 10) == [1, 3]
@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+from packet_sender import (SendPolicy, create_magic_packet, directed_broadcast, plan_packets, resolve_ip_addresses,
+                           subnet_broadcast)
+
+
+def test_lookups_queued_behind_hung_workers_time_out():
+    release = threading.Event()
+
+    def resolve(ddns):
+        if ddns.startswith("hang"):
+            release.wait()
+        return "10.0.0.1"
+
+    results = {}
+
+    def run():
+        names = ["hang1", "hang2", "ok1", "ok2"]
+        results.update(resolve_ip_addresses(names, max_workers=2, timeout=0.3, resolver=resolve))
+
+    start = time.monotonic()
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(3.0)
+    release.set()
+    # 멈춘 스레드가 일꾼을 모두 차지해서 ok1, ok2도 시작하지 못하지만 제한 시간 안에 끝난다
+    assert results == {"hang1": None, "hang2": None, "ok1": None, "ok2": None}
+    assert time.monotonic() - start < 1.5
+
+def test_lookups_complete_in_order_of_completion():
+    results = list(resolve_ip_addresses(["a", "b", "a"], resolver=lambda ddns: {"a": "10.0.0.1"}.get(ddns)))
+    assert sorted(results) == [("a", "10.0.0.1"), ("b", None)]
+
+
+def test_default_policy_sends_once_to_the_pc():
+    assert SendPolicy().destinations("192.168.1.100", 9) == [("", ("192.168.1.100", 9))]
+
+def test_ports_and_directed_broadcast_fan_out():
+    policy = SendPolicy(ports=[7, 9], directed_broadcast=True, prefix_length=24, interface="eth1")
+    assert policy.destinations("192.168.1.100", 9) == [
+        ("eth1", ("192.168.1.100", 7)), ("eth1", ("192.168.1.100", 9)),
+        ("eth1", ("192.168.1.255", 7)), ("eth1", ("192.168.1.255", 9)),
+    ]
+    # /31, /32와 브로드캐스트 주소 자신에게는 브로드캐스트를 더하지 않는다
+    assert SendPolicy(directed_broadcast=True, prefix_length=32).destinations("10.0.0.1", 9) == [("", ("10.0.0.1", 9))]
+    assert len(SendPolicy(directed_broadcast=True).destinations("10.0.0.255", 9)) == 1
+
+def test_subnet_overrides_prefix_length():
+    policy = SendPolicy(subnet="10.1.0.0/16", directed_broadcast=True, prefix_length=24)
+    assert [destination for _, destination in policy.destinations("10.1.2.3", 9)] == [
+        ("10.1.2.3", 9), ("10.1.255.255", 9)]
+    assert directed_broadcast("192.168.1.100", 26) == "192.168.1.127"
+    assert subnet_broadcast("192.168.1.100", "255.255.255.0") == "192.168.1.255"
+
+def test_ethernet_transport_needs_an_interface():
+    assert SendPolicy(transport="ethernet", interface="eth0").destinations("", 9) == [("eth0", None)]
+    with pytest.raises(ValueError):
+        SendPolicy(transport="ethernet").destinations("", 9)
+
+def test_policy_override_and_validation():
+    policy = SendPolicy().for_pc({"send_policy": {"repeat": 3}, "interface": "eth1", "subnet": "24"})
+    assert (policy.repeat, policy.interface, policy.subnet) == (3, "eth1", "24")
+    for data in ({"repeat": 0}, {"interval": -1}, {"prefix_length": 33}, {"transport": "carrier-pigeon"},
+                 {"color": "red"}, {"subnet": "not a subnet"}):
+        with pytest.raises(ValueError):
+            SendPolicy().override(data)
+
+def test_plan_repeats_every_destination():
+    targets = [("192.168.1.100", "00:11:22:33:44:55", 9), ("192.168.1.101", "00:11:22:33:44:66", 9)]
+    policies = [SendPolicy(repeat=3, interval=0.5, ports=[7, 9]), SendPolicy()]
+    plan = plan_packets(targets, policies)
+    # 대상 0: 3회 x 포트 2개, 대상 1: 1회
+    assert len(plan) == 7
+    assert [(offset, index) for offset, index, _, _, _ in plan] == [
+        (0.0, 0), (0.0, 0), (0.0, 1), (0.5, 0), (0.5, 0), (1.0, 0), (1.0, 0)]
+    assert {packet for _, index, _, _, packet in plan if index == 1} == {create_magic_packet("00:11:22:33:44:66")}
+    assert all(len(packet) == 102 for *_, packet in plan)
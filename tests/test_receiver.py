@@ -0,0 +1,54 @@
+import socket
+import threading
+
+import pytest
+
+from packet_sender import SendPolicy, plan_packets
+from receiver import PacketReceiver, mac_names
+from scheduler import WakeScheduler
+
+PCS = [{"name": "PC1", "mac": "00:11:22:33:44:55"}, {"name": "PC2", "mac": "00-11-22-33-44-66"}]
+
+
+@pytest.fixture
+def receiver():
+    with PacketReceiver(ports=[0], host="127.0.0.1", names=mac_names(PCS)) as receiver:
+        yield receiver
+
+def counts(receiver: PacketReceiver) -> dict:
+    return {row["name"] or row["mac"]: row["count"] for row in receiver.report()}
+
+
+def test_planned_packets_round_trip(receiver):
+    port = receiver.addresses[0][1]
+    targets = [("127.0.0.1", "00:11:22:33:44:55", port), ("127.0.0.1", "00:11:22:33:44:66", port),
+               ("127.0.0.1", "00:11:22:33:44:77", port)]
+    plan = plan_packets(targets, [SendPolicy(repeat=3), SendPolicy(repeat=1), SendPolicy(repeat=2)])
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.sendto(b"not a magic packet", ("127.0.0.1", port))
+        for _, _, _, destination, packet in plan:
+            sock.sendto(packet, destination)
+    # 루프백 패킷은 이미 수신 버퍼에 있다
+    receiver.run(duration=2.0, count=len(plan))
+
+    assert counts(receiver) == {"PC1": 3, "PC2": 1, "00:11:22:33:44:77": 2}
+    assert receiver.received == 6
+    assert receiver.invalid == 1
+    [pc1] = [row for row in receiver.report() if row["name"] == "PC1"]
+    assert 0 <= pc1["min_interval"] <= pc1["mean_interval"] <= pc1["max_interval"]
+
+def test_scheduler_round_trip(receiver):
+    port = receiver.addresses[0][1]
+    thread = threading.Thread(target=receiver.run, kwargs={"duration": 5.0, "count": 5})
+    thread.start()
+    scheduler = WakeScheduler()
+    try:
+        job = scheduler.submit([("127.0.0.1", pc["mac"], port) for pc in PCS],
+                               policies=[SendPolicy(repeat=2, interval=0.01), SendPolicy(repeat=3, interval=0.01)])
+        assert job.wait(5.0)
+    finally:
+        scheduler.close()
+    thread.join()
+
+    assert counts(receiver) == {"PC1": 2, "PC2": 3}
+    assert (job.sent, job.failed) == (2, 0)
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import time
+
+from dns_cache import DNSCache
+from history import WakeHistory
+from inventory import Inventory
+import metrics
+import relay
+from relay import RelayService
+from scheduler import WakeScheduler
+from storage import JsonStorage, save_pc_list
+
+
+async def request(port: int, data: bytes) -> bytes:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(data)
+    await writer.drain()
+    # 서버가 연결을 닫을 때까지 읽는다
+    response = await asyncio.wait_for(reader.read(), 5)
+    writer.close()
+    return response
+
+def test_chunked_body_is_rejected_and_connection_closed():
+    async def main():
+        service = RelayService(Inventory([{"name": "PC1", "mac": "00:11:22:33:44:55"}]))
+        server = await asyncio.start_server(service.handle_connection, "127.0.0.1", 0)
+        try:
+            port = server.sockets[0].getsockname()[1]
+            return await request(port, b"POST /wake HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: chunked\r\n\r\n"
+                                       b"10\r\n{\"name\": \"PC1\"}\r\n0\r\n\r\n")
+        finally:
+            server.close()
+            service.close()
+
+    response = asyncio.run(main())
+    head, _, body = response.partition(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 411 ")
+    assert b"Connection: close" in head
+    # 남은 chunk를 다음 요청으로 읽지 않는다 (응답은 하나)
+    assert response.count(b"HTTP/1.1") == 1
+    assert "Content-Length" in json.loads(body)["error"]
+
+def test_poll_storage_merges_file_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(relay, "WATCH_INTERVAL", 0.0)
+    path = str(tmp_path / "PCList.json")
+    save_pc_list([{"name": "PC1", "mac": "00:11:22:33:44:55"}], path)
+    storage = JsonStorage(path)
+    service = RelayService(storage.load(), storage=storage)
+    try:
+        save_pc_list([{"name": "PC1", "mac": "00:11:22:33:44:55"}, {"name": "PC2", "mac": "00:11:22:33:44:66"}],
+                     path)
+        status, payload = asyncio.run(service.handle("GET", "/hosts", {}, b""))
+    finally:
+        service.close()
+        storage.close()
+    assert status == 200
+    assert [host["name"] for host in payload["hosts"]] == ["PC1", "PC2"]
+
+
+class InstantScheduler:
+    """보내지 않고 모든 대상의 결과를 바로 알린다"""
+
+    def __init__(self):
+        self.targets = []
+
+    def submit(self, targets, on_result=None, on_done=None, policies=None, packets=None):
+        self.targets += targets
+        for index, target in enumerate(targets):
+            on_result(index, target, None)
+        on_done()
+
+    def close(self):
+        pass
+
+class RemovingScheduler(InstantScheduler):
+    """보내는 동안 다른 요청이 PC를 지운 것처럼 inventory에서 지운다"""
+
+    def __init__(self, inventory: Inventory):
+        super().__init__()
+        self.inventory = inventory
+
+    def submit(self, targets, **options):
+        for pc_id in list(self.inventory.ids()):
+            self.inventory.remove(pc_id)
+        super().submit(targets, **options)
+
+def test_pc_removed_during_send_is_recorded(tmp_path):
+    inventory = Inventory([{"name": "PC1", "ip": "127.0.0.1", "ddns": "", "mac": "00:11:22:33:44:55", "port": 9}])
+    with WakeHistory(str(tmp_path / "history")) as history:
+        service = RelayService(inventory, RemovingScheduler(inventory), history=history)
+        [result] = asyncio.run(asyncio.wait_for(service.wake([inventory.find_by_name("PC1")]), 5))
+        history.flush()
+        [record] = history.recent()
+    assert result["status"] == "sent"
+    assert (record.name, record.mac, record.ip) == ("PC1", "00:11:22:33:44:55", "127.0.0.1")
+    assert service.last_wake == {}
+
+def test_scheduler_closed_during_send_fails_unsent_targets():
+    pcs = [{"name": f"PC{i}", "ip": "127.0.0.1", "ddns": "", "mac": f"00:11:22:33:44:5{i}", "port": 9}
+           for i in range(2)]
+    inventory = Inventory(pcs)
+    # 두 번째 PC는 2초 뒤에 보낼 차례지만 그 전에 스케줄러를 닫는다
+    scheduler = WakeScheduler(rate=0.5)
+    service = RelayService(inventory, scheduler)
+
+    async def main():
+        asyncio.get_running_loop().call_later(0.2, scheduler.close)
+        return await asyncio.wait_for(service.wake(inventory.ids()), 5)
+
+    results = asyncio.run(main())
+    assert [result["status"] for result in results] == ["sent", "failed"]
+    assert results[1]["error"] == "Cancelled before sending"
+
+def test_ddns_hosts_are_resolved_concurrently():
+    def resolve(ddns):
+        time.sleep(0.3)
+        return f"127.0.0.{ddns.split('.')[0][2:]}"
+
+    pcs = [{"name": f"PC{i}", "ip": "", "ddns": f"pc{i}.example.com", "mac": f"00:11:22:33:44:5{i}", "port": 9}
+           for i in range(1, 6)]
+    inventory = Inventory(pcs)
+    scheduler = InstantScheduler()
+    service = RelayService(inventory, scheduler, dns_cache=DNSCache(resolver=resolve))
+    start = time.monotonic()
+    results = asyncio.run(service.wake(inventory.ids()))
+    assert time.monotonic() - start < 1.0
+    assert [result["status"] for result in results] == ["sent"] * 5
+    assert [target[0] for target in scheduler.targets] == [f"127.0.0.{i}" for i in range(1, 6)]
+
+def test_service_does_not_enable_metrics():
+    RelayService(Inventory(), InstantScheduler()).close()
+    assert not metrics.enabled
@@ -0,0 +1,116 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from packet_sender import SendPolicy
+from scheduler import TokenBucket, WakeScheduler, group_by_subnet
+
+
+@pytest.fixture
+def sink():
+    """매직 패킷을 받아서 버리는 로컬 UDP 포트"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    yield sock.getsockname()[1]
+    sock.close()
+
+@pytest.fixture
+def scheduler_factory():
+    schedulers = []
+
+    def create(**options) -> WakeScheduler:
+        schedulers.append(WakeScheduler(**options))
+        return schedulers[-1]
+
+    yield create
+    for scheduler in schedulers:
+        scheduler.close()
+
+def targets(port: int, count: int) -> list:
+    return [("127.0.0.1", f"00:11:22:33:44:{i:02X}", port) for i in range(count)]
+
+def record_times(results: list):
+    """on_result: (대상 번호, 전송 시각)을 results에 추가"""
+    return lambda index, target, error: results.append((index, time.monotonic(), error))
+
+
+def test_token_bucket_with_fake_clock():
+    bucket = TokenBucket(rate=4.0, capacity=2.0)
+    bucket.updated = 0.0
+    assert bucket.take(0.0) == 0.0
+    assert bucket.take(0.0) == 0.0
+    # 토큰이 없으면 하나가 찰 때까지 1/rate초
+    assert bucket.take(0.0) == pytest.approx(0.25)
+    assert bucket.take(0.25) == 0.0
+    # 오래 기다려도 capacity개까지만 모인다
+    assert [bucket.take(10.0) for _ in range(3)] == [0.0, 0.0, pytest.approx(0.25)]
+
+def test_group_by_subnet():
+    assert group_by_subnet(("10.1.2.3", "", 9)) == group_by_subnet(("10.1.2.200", "", 9)) == "10.1.2"
+
+def test_rate_limits_packets_per_second(sink, scheduler_factory):
+    results = []
+    scheduler = scheduler_factory(rate=50)
+    start = time.monotonic()
+    job = scheduler.submit(targets(sink, 10), on_result=record_times(results))
+    assert job.wait(5.0)
+    # 첫 패킷은 바로, 나머지 9개는 1/50초 간격
+    assert time.monotonic() - start >= 9 / 50 * 0.9
+    assert [index for index, _, _ in results] == list(range(10))
+    assert all(error is None for _, _, error in results)
+
+def test_stagger_spaces_members_of_one_group(sink, scheduler_factory):
+    results = []
+    scheduler = scheduler_factory(stagger=0.1)
+    job = scheduler.submit(targets(sink, 4), groups=["a", "a", "b", "b"], on_result=record_times(results))
+    assert job.wait(5.0)
+    # 그룹마다 하나씩 먼저 보내고 stagger초 뒤에 다음 PC
+    assert [index for index, _, _ in results] == [0, 2, 1, 3]
+    sent = dict((index, at) for index, at, _ in results)
+    assert sent[2] - sent[0] < 0.05
+    assert sent[1] - sent[0] >= 0.09
+    assert sent[3] - sent[2] >= 0.09
+
+def test_progress_and_eta(sink, scheduler_factory):
+    scheduler = scheduler_factory(rate=20)
+    job = scheduler.submit(targets(sink, 10))
+    assert job.total == 10
+    assert 0.3 < job.eta() <= 0.5
+    assert job.wait(5.0)
+    assert (job.completed, job.sent, job.failed) == (10, 10, 0)
+    assert job.eta() == 0.0
+
+def test_repeat_is_counted_once(sink, scheduler_factory):
+    results = []
+    scheduler = scheduler_factory()
+    job = scheduler.submit(targets(sink, 2), on_result=record_times(results),
+                           policies=SendPolicy(repeat=3, interval=0.02))
+    assert job.wait(5.0)
+    assert job.completed == 2
+    assert sorted(index for index, _, _ in results) == [0, 1]
+
+def test_cancel_stops_remaining_targets(sink, scheduler_factory):
+    results = []
+    done = threading.Event()
+    scheduler = scheduler_factory(rate=20)
+    job = scheduler.submit(targets(sink, 20), on_result=record_times(results), on_done=done.set)
+    time.sleep(0.15)
+    job.cancel()
+    assert done.is_set() and job.done and job.cancelled
+    # 취소 직전에 꺼낸 전송은 끝날 수 있다
+    time.sleep(0.05)
+    sent = len(results)
+    time.sleep(0.2)
+    assert 0 < sent < 20
+    assert len(results) == sent
+
+def test_close_cancels_pending_jobs(sink, scheduler_factory):
+    done = threading.Event()
+    scheduler = scheduler_factory(rate=5)
+    job = scheduler.submit(targets(sink, 10), on_done=done.set)
+    scheduler.close()
+    assert done.is_set() and job.cancelled
+    with pytest.raises(RuntimeError):
+        scheduler.submit(targets(sink, 1))
@@ -0,0 +1,68 @@
+import search
+from search import SearchIndex, column_sort_key, search_text
+
+
+def pc(name: str, ip: str = "", ddns: str = "", mac: str = "") -> dict:
+    return {"name": name, "ip": ip, "ddns": ddns, "mac": mac, "port": "9"}
+
+def index() -> SearchIndex:
+    return SearchIndex([
+        (1, pc("Office-PC", "10.0.0.1", mac="AA:BB:CC:DD:EE:01")),
+        (2, pc("server", "10.0.0.2", ddns="office.example.com", mac="AA:BB:CC:DD:EE:02")),
+        (3, pc("laptop", "192.168.0.3", mac="11-22-33-44-55-66")),
+    ])
+
+
+def test_search_fields_case_insensitive():
+    search_index = index()
+    assert search_index.search("OFFICE") == [1, 2]
+    assert search_index.search("192.168") == [3]
+    assert search_index.search("example.com") == [2]
+    assert search_index.search("nothing") == []
+
+def test_empty_query_returns_all():
+    assert index().search("  ") == [1, 2, 3]
+
+def test_mac_with_or_without_separators():
+    search_index = index()
+    assert search_index.search("aabbccddee02") == [2]
+    assert search_index.search("11-22-33") == [3]
+    assert search_index.search("112233") == [3]
+
+def test_match_does_not_span_fields():
+    # name 끝과 IP 앞이 이어져도 일치하지 않는다
+    assert "\n" in search_text(pc("laptop", "192.168.0.3"))
+    assert index().search("laptop192") == []
+
+def test_set_and_remove():
+    search_index = index()
+    assert search_index.search("office") == [1, 2]
+    search_index.set(3, pc("office laptop"))
+    search_index.remove(1)
+    # 수정한 PC는 원래 순서, 결과 캐시는 지워진다
+    assert search_index.search("office") == [2, 3]
+    search_index.set(4, pc("office desktop"))
+    assert search_index.search("office") == [2, 3, 4]
+    assert len(search_index) == 3
+
+def test_longer_query_searches_previous_results():
+    search_index = index()
+    assert search_index.search("o") == [1, 2, 3]
+    assert search_index.search("of") == [1, 2]
+    # 이전 결과("of") 밖의 PC는 보지 않는다
+    search_index._texts[3] += "\noff"
+    assert search_index.search("off") == [1, 2]
+
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(search, "MAX_CACHED_QUERIES", 2)
+    search_index = index()
+    for query in ("a", "b", "c"):
+        search_index.search(query)
+    assert list(search_index._cache) == ["c"]
+
+def test_column_sort_key():
+    assert sorted(["10.0.0.10", "", "10.0.0.9", "host"], key=column_sort_key("ip")) == [
+        "10.0.0.9", "10.0.0.10", "", "host"]
+    assert sorted(["10", "9", "x"], key=column_sort_key("port")) == ["9", "10", "x"]
+    assert column_sort_key("mac")("aa-bb") == column_sort_key("mac")("AA:BB")
+    assert sorted(["b", "A", "c"], key=column_sort_key("name")) == ["A", "b", "c"]
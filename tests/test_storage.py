@@ -0,0 +1,51 @@
+from inventory import Inventory
+from storage import JsonStorage, load_pc_list, open_storage, save_pc_list
+
+
+def test_sqlite_storage_round_trip(tmp_path):
+    storage = open_storage(str(tmp_path / "pcs.db"))
+    inventory = Inventory([{"name": "a", "ip": "10.0.0.1", "ddns": "", "mac": "00:11:22:33:44:55", "port": 9}])
+    assert storage.save(inventory)
+    storage.close()
+
+    loaded = open_storage(str(tmp_path / "pcs.db")).load()
+    assert [pc["name"] for pc in loaded] == ["a"]
+
+
+def pc(name: str, last: int) -> dict:
+    return {"name": name, "ip": f"10.0.0.{last}", "ddns": "", "mac": f"00:11:22:33:44:{last:02X}", "port": 9}
+
+def test_poll_keeps_unsaved_local_delete(tmp_path):
+    path = str(tmp_path / "PCList.json")
+    a, b, c, d = pc("A", 1), pc("B", 2), pc("C", 3), pc("D", 4)
+    save_pc_list([a, b], path)
+    storage = JsonStorage(path)
+    try:
+        inventory = storage.load()
+        inventory.remove(inventory.find_by_name("B"))
+        # 다른 프로그램이 저장한 내용을 poll로 합친 뒤 다시 바뀐 파일에 저장
+        save_pc_list([a, b, c], path)
+        storage.poll(inventory)
+        save_pc_list([a, b, c, d], path)
+        assert storage.save(inventory)
+    finally:
+        storage.close()
+    assert [row["name"] for row in load_pc_list(path)] == ["A", "C", "D"]
+
+def test_poll_keeps_unsaved_local_mac_edit(tmp_path):
+    path = str(tmp_path / "PCList.json")
+    a, b, c = pc("A", 1), pc("B", 2), pc("C", 3)
+    save_pc_list([a, b], path)
+    storage = JsonStorage(path)
+    try:
+        inventory = storage.load()
+        pc_id = inventory.find_by_name("B")
+        inventory.update(pc_id, {**b, "mac": "00:11:22:33:44:99"})
+        save_pc_list([a, b, c], path)
+        storage.poll(inventory)
+        save_pc_list([a, b, c, pc("D", 4)], path)
+        assert storage.save(inventory)
+    finally:
+        storage.close()
+    assert [(row["name"], row["mac"][-2:]) for row in load_pc_list(path)] == [
+        ("A", "01"), ("B", "99"), ("C", "03"), ("D", "04")]
@@ -0,0 +1,41 @@
+import socket
+import time
+
+import pytest
+
+from verifier import run_verification
+
+
+@pytest.fixture
+def listener():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.listen()
+    yield sock.getsockname()[1]
+    sock.close()
+
+@pytest.fixture
+def closed_port():
+    # bind만 하고 listen하지 않은 포트는 연결이 거부된다
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    yield sock.getsockname()[1]
+    sock.close()
+
+
+def test_listening_port_is_reachable(listener, closed_port):
+    [result] = run_verification([("127.0.0.1", time.monotonic())], ports=[closed_port, listener], deadline=2.0)
+    assert (result.reachable, result.port, result.attempts) == (True, listener, 1)
+    assert 0 <= result.time_to_wake < 2.0
+
+def test_refused_port_is_unreachable_until_deadline(closed_port):
+    start = time.monotonic()
+    [result] = run_verification([("127.0.0.1", start)], ports=[closed_port], deadline=0.5, initial_delay=0.1)
+    assert not result.reachable
+    assert result.attempts > 1
+    assert time.monotonic() - start < 2.0
+
+def test_refused_port_counts_as_up_when_requested(closed_port):
+    [result] = run_verification([("127.0.0.1", time.monotonic())], ports=[closed_port], deadline=0.5,
+                                refused_is_up=True)
+    assert (result.reachable, result.port) == (True, closed_port)
@@ -0,0 +1,141 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from packet_sender import SendPolicy
+from scheduler import WakeScheduler
+from wake_groups import (GroupError, GroupGraph, GroupTarget, GroupWake, assign_members, group_members,
+                         load_group_graph, pc_groups, tagged_groups)
+
+CONFIG = {"groups": {
+    "storage": {"timeout": 180},
+    "dc": {"depends_on": ["storage"]},
+    "backup": {"depends_on": "storage", "timeout": 0},
+    "workstations": {"depends_on": ["dc"], "timeout": 120},
+}}
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = WakeScheduler()
+    yield scheduler
+    scheduler.close()
+
+@pytest.fixture
+def sink():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    yield sock.getsockname()[1]
+    sock.close()
+
+@pytest.fixture
+def listener():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.listen()
+    yield sock.getsockname()[1]
+    sock.close()
+
+def target(key: str, port: int) -> GroupTarget:
+    return GroupTarget(key, ("127.0.0.1", "00:11:22:33:44:55", port), SendPolicy(), None)
+
+
+def test_waves_follow_dependencies():
+    graph = GroupGraph.from_config(CONFIG, default_timeout=60)
+    assert graph.waves(["workstations", "backup"]) == [["storage"], ["dc", "backup"], ["workstations"]]
+    assert graph.waves(["dc"]) == [["storage"], ["dc"]]
+    assert (graph.timeout("storage"), graph.timeout("dc"), graph.timeout("backup")) == (180, 60, 0)
+
+def test_groups_without_config_are_woken_together():
+    assert GroupGraph().waves(["a", "b"]) == [["a", "b"]]
+
+def test_cycle_is_reported_when_loaded():
+    config = {"groups": {"a": {"depends_on": ["c"]}, "b": {"depends_on": ["a"]}, "c": {"depends_on": ["b"]},
+                         "d": {}}}
+    with pytest.raises(GroupError, match="Dependency cycle: b -> a -> c -> b"):
+        GroupGraph.from_config(config)
+
+@pytest.mark.parametrize("config", [
+    [],
+    {"groups": []},
+    {"groups": {"a": []}},
+    {"groups": {"a": {"depends_on": 1}}},
+    {"groups": {"a": {"timeout": -1}}},
+    {"groups": {"a": {"timeout": "soon"}}},
+])
+def test_invalid_config(config):
+    with pytest.raises(GroupError):
+        GroupGraph.from_config(config)
+
+def test_load_group_graph(tmp_path):
+    assert load_group_graph(str(tmp_path / "missing.json")).waves(["a", "b"]) == [["a", "b"]]
+    path = tmp_path / "WakeGroups.json"
+    path.write_text("{not json", encoding="utf-8")
+    with pytest.raises(GroupError):
+        load_group_graph(str(path))
+
+def test_members_of_several_groups_are_woken_once():
+    pcs = [{"groups": ["dc", "storage"]}, {"groups": "dc"}, {"groups": ["workstations", "dc"]}, {}]
+    assert pc_groups(pcs[1]) == ["dc"]
+    assert tagged_groups(pcs) == ["dc", "storage", "workstations"]
+    members = group_members(enumerate(pcs), ["storage", "dc", "workstations"])
+    assert members == {"storage": [0], "dc": [0, 1, 2], "workstations": [2]}
+    waves = GroupGraph.from_config(CONFIG).waves(["workstations"])
+    # 가장 앞 단계의 그룹에서만 깨운다
+    assert assign_members(waves, members) == {"storage": [0], "dc": [1, 2], "workstations": []}
+
+
+def test_groups_start_after_prerequisites(scheduler, sink):
+    graph = GroupGraph({"dc": ["storage"]}, {"storage": 0.1, "dc": 0.0})
+    events = []
+    wake = GroupWake(scheduler, graph, graph.waves(["dc"]),
+                     {"storage": [target("nas", sink)], "dc": [target("dc1", sink), target("dc2", sink)]},
+                     ports=(), on_group=lambda group, state: events.append((group, state, time.monotonic())),
+                     on_result=lambda key, error: events.append((key, error, time.monotonic())))
+    assert wake.total == 3
+    assert wake.run() == {"storage": GroupWake.TIMEOUT, "dc": GroupWake.TIMEOUT}
+    order = [(name, state) for name, state, _ in events]
+    assert order.index(("storage", GroupWake.TIMEOUT)) < order.index(("dc", GroupWake.WAKING))
+    assert order.index(("nas", None)) < order.index(("dc1", None))
+    # 응답을 확인하지 않으면 storage의 timeout만큼 기다린 뒤 dc를 깨운다
+    times = {(name, state): at for name, state, at in events}
+    assert times[("dc1", None)] - times[("nas", None)] >= 0.09
+
+def test_group_is_ready_when_hosts_respond(scheduler, sink, listener):
+    verified = []
+    graph = GroupGraph(timeouts={"lab": 5.0})
+    wake = GroupWake(scheduler, graph, [["lab"]], {"lab": [target("pc1", sink)]}, ports=[listener],
+                     on_verified=lambda key, result: verified.append((key, result.reachable)))
+    assert wake.run() == {"lab": GroupWake.READY}
+    assert verified == [("pc1", True)]
+
+def test_unresponsive_group_times_out_and_next_group_still_runs(scheduler, sink):
+    # bind만 하고 listen하지 않은 포트는 응답하지 않는다
+    closed = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    closed.bind(("127.0.0.1", 0))
+    try:
+        graph = GroupGraph({"dc": ["storage"]}, {"storage": 0.3, "dc": 0.3})
+        wake = GroupWake(scheduler, graph, graph.waves(["dc"]),
+                         {"storage": [target("nas", sink)], "dc": []}, ports=[closed.getsockname()[1]])
+        assert wake.run() == {"storage": GroupWake.TIMEOUT, "dc": GroupWake.READY}
+    finally:
+        closed.close()
+
+def test_cancel_stops_waiting_groups(scheduler, sink):
+    graph = GroupGraph({"dc": ["storage"]}, {"storage": 30.0})
+    sent = []
+    wake = GroupWake(scheduler, graph, graph.waves(["dc"]),
+                     {"storage": [target("nas", sink)], "dc": [target("dc1", sink)]},
+                     ports=(), on_result=lambda key, error: sent.append(key))
+    threading.Timer(0.2, wake.cancel).start()
+    start = time.monotonic()
+    assert wake.run() == {"storage": GroupWake.CANCELLED, "dc": GroupWake.CANCELLED}
+    assert time.monotonic() - start < 5
+    assert sent == ["nas"]
+
+def test_cancel_before_run(scheduler, sink):
+    wake = GroupWake(scheduler, GroupGraph(), [["lab"]], {"lab": [target("pc1", sink)]}, ports=())
+    wake.cancel()
+    assert wake.run() == {"lab": GroupWake.CANCELLED}
@@ -0,0 +1,37 @@
+import pytest
+
+from worker import BackgroundWorker
+
+
+class FakeWidget:
+    """after()로 예약한 함수를 테스트에서 직접 실행하는 tkinter 위젯 대역"""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, fn):
+        self.scheduled.append(fn)
+
+    def run_pending(self):
+        scheduled, self.scheduled = self.scheduled, []
+        for fn in scheduled:
+            fn()
+
+
+def test_callback_error_does_not_stop_polling():
+    widget = FakeWidget()
+    worker = BackgroundWorker(widget)
+    results = []
+
+    def fail(result, error):
+        raise RuntimeError("callback failed")
+
+    worker.submit(lambda: 1, callback=fail).result()
+    worker.submit(lambda: 2, callback=lambda result, error: results.append(result)).result()
+    with pytest.raises(RuntimeError):
+        widget.run_pending()
+    # 예외가 난 뒤에도 다음 확인이 예약돼서 두 번째 결과가 전달된다
+    widget.run_pending()
+    assert results == [2]
+    assert widget.scheduled == []
+    worker.shutdown()
@@ -0,0 +1,84 @@
+import ipaddress
+import re
+
+# 호스트명.서브도메인.최상위도메인
+DDNS_PATTERN = re.compile(r'^(?=.{1,253}$)(?!\-)([a-zA-Z0-9\-]{1,63}\.)+[a-zA-Z]{2,}$')
+# XX:XX:XX:XX:XX:XX 또는 XX-XX-XX-XX-XX-XX 형식
+MAC_PATTERN = re.compile(r'^([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})$')
+# 인터페이스 이름 (eth0, enp3s0.10, "*"는 모든 인터페이스)
+INTERFACE_PATTERN = re.compile(r'^(\*|[A-Za-z0-9_.:\-]{1,15})$')
+
+
+def validate_ip_address(ip: str) -> bool:
+    parts = ip.split('.')
+    if len(parts) != 4:
+        return False
+    for part in parts:
+        try:
+            num = int(part)
+        except ValueError:
+            return False
+        if not 0 <= num <= 255:
+            return False
+    return True
+
+def validate_ddns_address(ddns: str) -> bool:
+    return bool(DDNS_PATTERN.match(ddns))
+
+def validate_mac_address(mac: str) -> bool:
+    return bool(MAC_PATTERN.match(mac))
+
+def validate_port_number(num: int) -> bool:
+    # 정수인지 확인
+    try:
+        num = int(num)
+    except ValueError:
+        return False
+    
+    # 1-65535 범위 내인지 확인
+    if 1 <= num <= 65535:
+        return True
+    else:
+        return False
+
+def validate_interface(interface: str) -> bool:
+    # 이름 또는 출발지 IP 주소
+    return bool(INTERFACE_PATTERN.match(interface)) or validate_ip_address(interface)
+
+def validate_subnet(subnet: str) -> bool:
+    # CIDR(192.168.10.0/24, 192.168.10.0/255.255.255.0), 넷마스크(255.255.255.0) 또는 프리픽스 길이(24, /24)
+    subnet = subnet.strip()
+    if not subnet:
+        return False
+    if "/" in subnet and not subnet.startswith("/"):
+        network = subnet
+    else:
+        network = f"0.0.0.0/{subnet.lstrip('/')}"
+    try:
+        ipaddress.IPv4Network(network, strict=False)
+    except ValueError:
+        return False
+    return True
+
+def validate_pc(pc: dict) -> tuple[bool, str]:
+    """
+    tuple[bool, str]: 검증 결과
+    - (True, ""): 모든 데이터가 유효함
+    - (False, key): 유효하지 않은 데이터와 필드의 키
+    """
+    # ip
+    if not validate_ip_address(pc["ip"]):
+        return False, "ip"
+    # mac
+    if not validate_mac_address(pc["mac"]):
+        return False, "mac"
+    # port
+    if not validate_port_number(pc["port"]):
+        return False, "port"
+    # 선택 항목은 값이 있을 때만 검사
+    if pc.get("interface") and not validate_interface(pc["interface"]):
+        return False, "interface"
+    if pc.get("subnet") and not validate_subnet(pc["subnet"]):
+        return False, "subnet"
+    
+    return True, ""
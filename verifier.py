@@ -0,0 +1,106 @@
+"""
+깨운 PC가 실제로 켜졌는지 확인
+
+asyncio로 모든 PC에 동시에 TCP 연결을 시도한다 (PC마다 스레드를 만들지 않음).
+응답이 없으면 간격을 늘려가며 다시 시도하고, 패킷을 보낸 시각부터 처음 응답한 시각까지를 기록한다.
+"""
+from typing import Callable, Iterable
+import asyncio
+import time
+
+# SSH, RDP, SMB, HTTP
+DEFAULT_PORTS = (22, 3389, 445, 80)
+DEFAULT_DEADLINE = 300.0
+# 동시에 열어 둘 수 있는 최대 연결 시도 수
+DEFAULT_CONCURRENCY = 256
+
+
+class VerifyResult:
+    def __init__(self, ip: str, reachable: bool, port: int | None, time_to_wake: float | None, attempts: int):
+        self.ip = ip
+        self.reachable = reachable
+        self.port = port                  # 처음 응답한 포트
+        self.time_to_wake = time_to_wake  # 패킷 전송부터 첫 응답까지 걸린 시간(초)
+        self.attempts = attempts
+
+    def __repr__(self) -> str:
+        return (f"VerifyResult(ip={self.ip!r}, reachable={self.reachable}, port={self.port}, "
+                f"time_to_wake={self.time_to_wake}, attempts={self.attempts})")
+
+
+async def probe(ip: str, ports: Iterable[int], timeout: float, semaphore: asyncio.Semaphore,
+                refused_is_up: bool = False) -> int | None:
+    """ports에 동시에 연결을 시도해서 연결된 첫 포트 반환 (없으면 None)"""
+    async def connect(port):
+        async with semaphore:
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+            except ConnectionRefusedError:
+                # 거부 응답(RST)도 PC가 켜져 있다는 뜻이지만, 공유기를 거치는 주소는 공유기가 응답할 수 있다
+                return port if refused_is_up else None
+            except (OSError, asyncio.TimeoutError):
+                return None
+            # 동시에 수백 개를 확인하므로 소켓 정리를 GC에 맡기지 않고 닫힐 때까지 기다린다
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+            return port
+
+    tasks = [asyncio.ensure_future(connect(port)) for port in ports]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            port = await finished
+            if port is not None:
+                return port
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def verify_host(ip: str, sent_at: float, semaphore: asyncio.Semaphore, ports: Iterable[int] = DEFAULT_PORTS,
+                      deadline: float = DEFAULT_DEADLINE, connect_timeout: float = 1.0,
+                      initial_delay: float = 1.0, max_delay: float = 10.0,
+                      refused_is_up: bool = False) -> VerifyResult:
+    """
+    sent_at(time.monotonic() 기준 전송 시각)부터 deadline초까지 응답을 기다린다
+    - 시도 간격은 initial_delay부터 두 배씩 늘어나 max_delay까지
+    """
+    ports = tuple(ports)
+    end = sent_at + deadline
+    delay = initial_delay
+    attempts = 0
+    while True:
+        attempts += 1
+        timeout = max(min(connect_timeout, end - time.monotonic()), 0.01)
+        port = await probe(ip, ports, timeout, semaphore, refused_is_up)
+        now = time.monotonic()
+        if port is not None:
+            return VerifyResult(ip, True, port, now - sent_at, attempts)
+        if now + delay >= end:
+            return VerifyResult(ip, False, None, None, attempts)
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, max_delay)
+
+async def verify_hosts(hosts: Iterable[tuple[str, float]], on_result: Callable[[int, VerifyResult], None] | None = None,
+                       concurrency: int = DEFAULT_CONCURRENCY, **options) -> list[VerifyResult]:
+    """
+    (ip, 전송 시각) 목록을 동시에 확인해서 입력 순서대로 결과 반환
+    - on_result(번호, 결과): PC 하나의 확인이 끝날 때마다 호출
+    - options는 verify_host의 인자 (ports, deadline 등)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def verify(index, ip, sent_at):
+        result = await verify_host(ip, sent_at, semaphore, **options)
+        if on_result is not None:
+            on_result(index, result)
+        return result
+
+    return await asyncio.gather(*(verify(index, ip, sent_at) for index, (ip, sent_at) in enumerate(hosts)))
+
+def run_verification(hosts: Iterable[tuple[str, float]], on_result: Callable[[int, VerifyResult], None] | None = None,
+                     **options) -> list[VerifyResult]:
+    """verify_hosts를 새 이벤트 루프에서 실행 (작업 스레드나 CLI에서 사용)"""
+    return asyncio.run(verify_hosts(list(hosts), on_result, **options))
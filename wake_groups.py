@@ -0,0 +1,356 @@
+"""
+그룹 단위 깨우기 (선행 그룹 순서와 병렬 단계)
+
+- PC의 선택 항목 "groups"(그룹 이름 목록)가 PC의 그룹(태그)
+- 그룹 사이의 선행 관계와 대기 시간은 PC 목록 파일과 같은 폴더의 WakeGroups.json에 둔다
+    {"groups": {"storage": {"timeout": 180},
+                "dc": {"depends_on": ["storage"]},
+                "workstations": {"depends_on": ["dc"], "timeout": 120}}}
+- 그룹을 깨우면 선행 그룹까지 포함한 DAG로 실행한다. 선행 그룹이 모두 준비된 그룹은 바로 (다른 그룹과 동시에)
+  깨우고, 그룹은 깨운 PC가 모두 응답하거나(verifier) timeout초가 지나면 준비된 것으로 본다
+  (단계를 통째로 기다리지 않으므로 빨리 준비된 그룹의 후속 그룹은 먼저 시작한다)
+- 여러 그룹에 속한 PC는 가장 앞 단계의 그룹에서 한 번만 깨운다
+"""
+from typing import Any, Callable, Hashable, Iterable, NamedTuple
+import asyncio
+import json
+import os
+import threading
+import time
+
+from packet_sender import SendPolicy, Target
+from scheduler import WakeScheduler
+from verifier import DEFAULT_DEADLINE, DEFAULT_PORTS, VerifyResult, verify_hosts
+
+GROUP_CONFIG_FILE = "WakeGroups.json"
+# 설정에 timeout이 없는 그룹의 대기 시간(초)
+DEFAULT_TIMEOUT = DEFAULT_DEADLINE
+
+
+class GroupError(ValueError):
+    """그룹 설정이 잘못되었음 (형식, 순환 의존)"""
+
+
+def pc_groups(pc: dict) -> list[str]:
+    """PC의 그룹 이름 목록 (직접 편집한 파일의 문자열 하나도 허용)"""
+    groups = pc.get("groups") or []
+    if isinstance(groups, str):
+        groups = [groups]
+    return [str(group) for group in groups]
+
+def group_members(items: Iterable[tuple[Hashable, dict]], groups: Iterable[str]) -> dict[str, list]:
+    """groups의 그룹별 PC id (PC 목록 순서). items는 (id, pc) 목록"""
+    members: dict[str, list] = {group: [] for group in groups}
+    for pc_id, pc in items:
+        for group in pc_groups(pc):
+            ids = members.get(group)
+            if ids is not None:
+                ids.append(pc_id)
+    return members
+
+def tagged_groups(pcs: Iterable[dict]) -> list[str]:
+    """PC들에 붙은 그룹 이름 (처음 나온 순서)"""
+    groups: dict[str, None] = {}
+    for pc in pcs:
+        groups.update(dict.fromkeys(pc_groups(pc)))
+    return list(groups)
+
+def assign_members(waves: list[list[str]], members: dict[str, list]) -> dict[str, list]:
+    """여러 그룹에 속한 PC는 가장 앞 단계의 그룹에만 남긴다"""
+    seen = set()
+    assigned = {}
+    for wave in waves:
+        for group in wave:
+            assigned[group] = [pc_id for pc_id in members.get(group, ()) if pc_id not in seen]
+            seen.update(assigned[group])
+    return assigned
+
+
+class GroupGraph:
+    """그룹 -> 선행 그룹 목록과 그룹별 대기 시간"""
+
+    def __init__(self, depends_on: dict[str, Iterable[str]] | None = None,
+                 timeouts: dict[str, float] | None = None, default_timeout: float = DEFAULT_TIMEOUT):
+        self.depends_on = {group: tuple(prerequisites) for group, prerequisites in (depends_on or {}).items()}
+        self.timeouts = dict(timeouts or {})
+        self.default_timeout = default_timeout
+
+    @classmethod
+    def from_config(cls, data: Any, default_timeout: float = DEFAULT_TIMEOUT) -> "GroupGraph":
+        """{"groups": {이름: {"depends_on": [...], "timeout": 초}}}에서 만든다. 잘못되었거나 순환이 있으면 GroupError"""
+        groups = data.get("groups", {}) if isinstance(data, dict) else None
+        if not isinstance(groups, dict):
+            raise GroupError("'groups' must be an object")
+        depends_on = {}
+        timeouts = {}
+        for name, spec in groups.items():
+            if not isinstance(spec, dict):
+                raise GroupError(f"Group '{name}' must be an object")
+            prerequisites = spec.get("depends_on", [])
+            if isinstance(prerequisites, str):
+                prerequisites = [prerequisites]
+            if not isinstance(prerequisites, list):
+                raise GroupError(f"Group '{name}': 'depends_on' must be a list")
+            depends_on[name] = [str(group) for group in prerequisites]
+            if "timeout" in spec:
+                try:
+                    timeout = float(spec["timeout"])
+                except (TypeError, ValueError):
+                    timeout = -1.0
+                if not timeout >= 0:
+                    raise GroupError(f"Group '{name}': invalid timeout {spec['timeout']!r}")
+                timeouts[name] = timeout
+        graph = cls(depends_on, timeouts, default_timeout)
+        # 순환은 깨울 때가 아니라 불러올 때 알린다
+        graph.waves(graph.names())
+        return graph
+
+    def names(self) -> list[str]:
+        """설정에 나오는 모든 그룹 (선행 그룹으로만 나오는 그룹 포함)"""
+        names: dict[str, None] = {}
+        for group, prerequisites in self.depends_on.items():
+            names[group] = None
+            names.update(dict.fromkeys(prerequisites))
+        return list(names)
+
+    def prerequisites(self, group: str) -> tuple[str, ...]:
+        return self.depends_on.get(group, ())
+
+    def timeout(self, group: str) -> float:
+        return self.timeouts.get(group, self.default_timeout)
+
+    def closure(self, groups: Iterable[str]) -> list[str]:
+        """groups와 그 선행 그룹 전체 (선행 그룹이 먼저)"""
+        result: dict[str, None] = {}
+        visiting = set()
+
+        def visit(group):
+            if group in result or group in visiting:
+                # 순환은 waves()에서 알린다
+                return
+            visiting.add(group)
+            for prerequisite in self.prerequisites(group):
+                visit(prerequisite)
+            visiting.discard(group)
+            result[group] = None
+
+        for group in groups:
+            visit(group)
+        return list(result)
+
+    def waves(self, groups: Iterable[str]) -> list[list[str]]:
+        """
+        groups와 선행 그룹들을 단계로 나눈다 (각 그룹은 앞 단계의 그룹에만 의존)
+        - 순환 의존이 있으면 GroupError
+        """
+        remaining = self.closure(groups)
+        done = set()
+        waves = []
+        while remaining:
+            wave = [group for group in remaining if all(p in done for p in self.prerequisites(group))]
+            if not wave:
+                raise GroupError(f"Dependency cycle: {' -> '.join(self._find_cycle(remaining))}")
+            waves.append(wave)
+            done.update(wave)
+            remaining = [group for group in remaining if group not in done]
+        return waves
+
+    def _find_cycle(self, remaining: list[str]) -> list[str]:
+        # 남은 그룹은 모두 남은 그룹에 의존하므로 선행 그룹을 따라가면 반드시 되돌아온다
+        pending = set(remaining)
+        path = [remaining[0]]
+        while True:
+            following = next(p for p in self.prerequisites(path[-1]) if p in pending)
+            if following in path:
+                return path[path.index(following):] + [following]
+            path.append(following)
+
+
+def group_config_path(pc_list_path: str) -> str:
+    """PC 목록 파일과 같은 폴더의 WakeGroups.json"""
+    return os.path.join(os.path.dirname(os.path.abspath(pc_list_path)), GROUP_CONFIG_FILE)
+
+def load_group_graph(path: str, default_timeout: float = DEFAULT_TIMEOUT) -> GroupGraph:
+    """파일이 없으면 의존 관계가 없는 그래프 (모든 그룹을 동시에 깨운다). 잘못된 파일은 GroupError"""
+    if not os.path.exists(path):
+        return GroupGraph(default_timeout=default_timeout)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise GroupError(f"Invalid group file '{path}': {e}") from e
+    return GroupGraph.from_config(data, default_timeout)
+
+
+class GroupTarget(NamedTuple):
+    key: Hashable        # 호출한 쪽의 PC 식별자 (pc id, 이름)
+    target: Target
+    policy: SendPolicy
+    packet: bytes | None
+
+
+class GroupWake:
+    """
+    그룹별 대상을 의존 관계 순서대로 깨운다
+    - waves: GroupGraph.waves()의 결과, members: 그룹 -> GroupTarget 목록 (assign_members로 중복을 없앤 것)
+    - ports가 비어 있으면 응답을 확인하지 않고 그룹마다 timeout초를 기다린다
+    - run()은 끝날 때까지 블록 (작업 스레드나 CLI에서 호출), cancel()은 다른 스레드에서 호출할 수 있다
+    - 콜백은 run()을 실행하는 스레드나 스케줄러 스레드에서 호출된다
+      on_group(그룹, 상태), on_result(key, 첫 전송 오류 또는 None), on_verified(key, VerifyResult)
+    """
+
+    # 그룹 상태. ready 외의 끝난 상태에서도 후속 그룹은 시작한다 (취소 제외)
+    WAITING, WAKING, READY, TIMEOUT, FAILED, CANCELLED = "waiting", "waking", "ready", "timeout", "failed", "cancelled"
+    FINISHED = (READY, TIMEOUT, FAILED, CANCELLED)
+
+    def __init__(self, scheduler: WakeScheduler, graph: GroupGraph, waves: list[list[str]],
+                 members: dict[str, list[GroupTarget]], ports: Iterable[int] = DEFAULT_PORTS,
+                 on_group: Callable[[str, str], None] | None = None,
+                 on_result: Callable[[Hashable, Exception | None], None] | None = None,
+                 on_verified: Callable[[Hashable, VerifyResult], None] | None = None):
+        self.scheduler = scheduler
+        self.graph = graph
+        self.waves = waves
+        self.members = members
+        self.ports = tuple(ports)
+        self.on_group = on_group
+        self.on_result = on_result
+        self.on_verified = on_verified
+        self.states = {group: self.WAITING for wave in waves for group in wave}
+        self.cancelled = False
+        self._lock = threading.Lock()
+        self._jobs = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._cancel_event: asyncio.Event | None = None
+
+    @property
+    def total(self) -> int:
+        """깨울 PC 수"""
+        return sum(len(targets) for targets in self.members.values())
+
+    def run(self) -> dict[str, str]:
+        """모든 그룹이 끝날 때까지 실행하고 그룹별 최종 상태 반환"""
+        return asyncio.run(self._run())
+
+    def cancel(self):
+        """아직 시작하지 않은 그룹과 보내지 않은 PC는 깨우지 않고, 응답 대기를 멈춘다"""
+        with self._lock:
+            self.cancelled = True
+            jobs = list(self._jobs)
+            loop = self._loop
+        for job in jobs:
+            job.cancel()
+        if loop is not None:
+            loop.call_soon_threadsafe(self._cancel_event.set)
+
+    async def _run(self) -> dict[str, str]:
+        self._cancel_event = asyncio.Event()
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            if self.cancelled:
+                self._cancel_event.set()
+        ready = {group: asyncio.Event() for group in self.states}
+        try:
+            await asyncio.gather(*(self._run_group(group, ready) for group in self.states))
+        finally:
+            with self._lock:
+                self._loop = None
+        return dict(self.states)
+
+    async def _run_group(self, group: str, ready: dict[str, asyncio.Event]):
+        state = self.CANCELLED
+        try:
+            prerequisites = [ready[p] for p in self.graph.prerequisites(group) if p in ready]
+            if prerequisites:
+                self._set_state(group, self.WAITING)
+                finished, _ = await self._until_cancelled(self._wait_all(prerequisites))
+                if not finished:
+                    return
+            if not self.cancelled:
+                state = await self._wake(group)
+        finally:
+            self._set_state(group, state)
+            ready[group].set()
+
+    @staticmethod
+    async def _wait_all(events: list[asyncio.Event]):
+        for event in events:
+            await event.wait()
+
+    async def _wake(self, group: str) -> str:
+        targets = self.members.get(group, [])
+        if not targets:
+            return self.READY
+        self._set_state(group, self.WAKING)
+        sent = await asyncio.get_running_loop().run_in_executor(None, self._send, targets)
+        if self.cancelled:
+            return self.CANCELLED
+        if not sent:
+            return self.FAILED
+
+        timeout = self.graph.timeout(group)
+        if not self.ports:
+            # 확인할 수 없으므로 마지막 PC를 보낸 뒤 timeout초가 지나면 준비된 것으로 본다
+            delay = max(sent[-1][2] + timeout - time.monotonic(), 0.0)
+            finished, _ = await self._until_cancelled(asyncio.sleep(delay))
+            return self.TIMEOUT if finished else self.CANCELLED
+
+        def on_verified(index, result):
+            if self.on_verified is not None:
+                self.on_verified(sent[index][0], result)
+
+        finished, results = await self._until_cancelled(verify_hosts(
+            [(ip, sent_at) for _, ip, sent_at in sent], on_verified, ports=self.ports, deadline=timeout
+        ))
+        if not finished:
+            return self.CANCELLED
+        return self.READY if all(result.reachable for result in results) else self.TIMEOUT
+
+    def _send(self, targets: list[GroupTarget]) -> list[tuple[Hashable, str, float]]:
+        # 실행기 스레드에서 실행: 전송이 끝날 때까지 기다리고 보낸 (key, ip, 전송 시각)을 보낸 순서대로 반환
+        sent = []
+
+        def on_result(index, target, error):
+            if error is None:
+                sent.append((targets[index].key, target[0], time.monotonic()))
+            if self.on_result is not None:
+                self.on_result(targets[index].key, error)
+
+        try:
+            job = self.scheduler.submit(
+                [target.target for target in targets], on_result=on_result,
+                policies=[target.policy for target in targets], packets=[target.packet for target in targets]
+            )
+        except OSError as e:
+            for target in targets:
+                if self.on_result is not None:
+                    self.on_result(target.key, e)
+            return []
+        with self._lock:
+            self._jobs.add(job)
+            cancelled = self.cancelled
+        if cancelled:
+            job.cancel()
+        job.wait()
+        with self._lock:
+            self._jobs.discard(job)
+        return sent
+
+    async def _until_cancelled(self, awaitable) -> tuple[bool, Any]:
+        """awaitable이 끝나면 (True, 결과), 그 전에 취소되면 awaitable을 취소하고 (False, None)"""
+        task = asyncio.ensure_future(awaitable)
+        cancel = asyncio.ensure_future(self._cancel_event.wait())
+        try:
+            await asyncio.wait({task, cancel}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            cancel.cancel()
+        if task.done():
+            return True, task.result()
+        task.cancel()
+        await asyncio.wait({task})
+        return False, None
+
+    def _set_state(self, group: str, state: str):
+        self.states[group] = state
+        if self.on_group is not None:
+            self.on_group(group, state)
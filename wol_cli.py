@@ -0,0 +1,752 @@
+"""
+tkinter 없이 PC 목록을 사용하는 명령줄 도구
+
+사용법:
+    python -m wol_cli list
+    python -m wol_cli wake <name> [<name> ...]
+    python -m wol_cli wake --all [--rate PPS] [--stagger SECONDS] [--verify]
+    python -m wol_cli wake <name> --repeat 3 --interval 0.5 --ports 7,9 --broadcast [--dry-run]
+    python -m wol_cli wake --group workstations [--groups-file FILE] [--deadline SECONDS]
+    python -m wol_cli interfaces
+    python -m wol_cli serve [--host HOST] [--port PORT] [--token TOKEN] [--agent-port PORT]
+    python -m wol_cli agent --coordinator HOST:PORT --subnet CIDR [--name NAME] [--priority N]
+    python -m wol_cli resolve [--no-save]
+    python -m wol_cli import <file> [--format FORMAT] [--update] [--dry-run]
+    python -m wol_cli discover <CIDR> [--mode auto|arp|udp] [--reverse-dns] [--add] [--update] [--json]
+    python -m wol_cli listen [--ports 7,9] [--interface IF] [--duration SECONDS] [--json]
+    python -m wol_cli history [--host NAME] [--failed] [--since 1h] [--limit 50] [--json]
+    python -m wol_cli --log-json - wake --all        # 전송/DNS 조회/저장마다 JSON 한 줄을 stderr에
+    python -m wol_cli --metrics-port 9109 serve      # Prometheus 지표를 :9109/metrics 에서도 제공
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+from history import CANCELLED, FAILED, NO_RESPONSE, SENT, UP, WakeHistory, current_user, history_path
+from hosts import HostError
+from importer import FORMATS, import_file, import_rows
+from interfaces import list_interfaces
+from inventory import FIELD_LABELS, Inventory
+import metrics
+from storage import DEFAULT_JSON_FILE, StorageError, open_storage
+from packet_sender import TRANSPORTS, SendPolicy, Target, get_ip_address, plan_packets, resolve_ip_addresses
+from receiver import PacketReceiver, format_mac, mac_names
+from scheduler import WakeScheduler
+
+
+def cmd_list(args, inventory: Inventory) -> int:
+    columns = ["name", "ip", "ddns", "mac", "port"]
+    rows = [[FIELD_LABELS[column] for column in columns]]
+    rows += [[str(pc.get(column, "")) for column in columns] for pc in inventory]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    for row in rows:
+        print("  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip())
+    return 0
+
+def cmd_wake(args, inventory: Inventory) -> int:
+    if args.all:
+        pc_ids = inventory.ids()
+    else:
+        pc_ids = [inventory.find_by_name(name) for name in args.names]
+        unknown = [name for name, pc_id in zip(args.names, pc_ids) if pc_id is None]
+        if unknown:
+            print(f"Unknown PC: {', '.join(unknown)}", file=sys.stderr)
+            return 2
+
+    try:
+        default_policy = SendPolicy(args.repeat, args.interval, args.ports or (), args.broadcast, args.prefix,
+                                    interface=args.interface, transport=args.transport)
+    except ValueError as e:
+        print(f"Invalid send policy: {e}", file=sys.stderr)
+        return 2
+
+    if args.group:
+        return wake_by_group(args, inventory, default_policy)
+
+    # 보내지 않는 --dry-run은 기록하지 않는다
+    history = None if args.dry_run else args.history
+    target_ids, targets, policies, packets, failed = prepare_targets(inventory, pc_ids, default_policy, history)
+    target_names = [inventory.get(pc_id).get("name", "Unknown PC") for pc_id in target_ids]
+
+    if args.dry_run:
+        print_plan(targets, target_names, policies)
+        return 1 if failed else 0
+
+    sent = []  # (이름, ip, 전송 시각, MAC)
+    if targets:
+        failed += wake_paced(targets, target_names, args.rate, args.stagger, sent, policies, packets, history)
+
+    if args.verify and sent:
+        failed += verify_sent(sent, args.verify_ports, args.deadline, history)
+    return 1 if failed else 0
+
+def record_wake(history: WakeHistory | None, name: str, mac: str, ip: str, result: str, error=None,
+                latency: float | None = None):
+    """전송 기록에 추가 (파일 쓰기는 기록 스레드에서)"""
+    if history is not None:
+        history.record(name, mac, ip, result, error, latency, "cli", current_user())
+
+def prepare_targets(inventory: Inventory, pc_ids: list[int], default_policy: SendPolicy,
+                    history: WakeHistory | None = None):
+    """
+    보낼 수 있는 PC들의 (id, 대상, 정책, 매직 패킷) 목록과 실패한 수 반환
+    - 검증하지 못한 PC는 실패를 출력하고 (history가 있으면 기록하고) 건너뛴다
+    """
+    target_ids = []
+    targets = []
+    policies = []
+    packets = []
+    failed = 0
+    for pc_id in pc_ids:
+        pc = inventory.get(pc_id)
+        pc_name = pc.get("name", "Unknown PC")
+        try:
+            # 검증과 매직 패킷 생성은 PC마다 한 번 (Inventory.host)
+            host = inventory.host(pc_id)
+            # 저장된 ip가 없을 때만 ddns를 조회 (파일에는 반영하지 않음)
+            if host.ip is None:
+                ip = get_ip_address(pc["ddns"])
+                if not ip:
+                    print(f"Failed: {pc_name} (Failed to resolve {FIELD_LABELS['ddns']})")
+                    record_wake(history, pc_name, pc["mac"], "", FAILED, f"Failed to resolve {FIELD_LABELS['ddns']}")
+                    failed += 1
+                    continue
+                host = host.with_ip(ip)
+        except HostError as e:
+            print(f"Failed: {pc_name} (Invalid {FIELD_LABELS[e.key]})")
+            record_wake(history, pc_name, pc.get("mac", ""), pc.get("ip", ""), FAILED, f"Invalid {FIELD_LABELS[e.key]}")
+            failed += 1
+            continue
+        ip = host.ip_address
+        # PC에 저장된 send_policy, interface, subnet이 있으면 명령줄 정책의 해당 값만 바꾼다
+        try:
+            policy = default_policy.for_pc(pc)
+            # 목적지를 정할 수 없는 PC(인터페이스 없는 ethernet 전송 등)는 보내기 전에 실패 처리
+            policy.destinations(ip, host.port)
+        except ValueError as e:
+            print(f"Failed: {pc_name} ({e})")
+            record_wake(history, pc_name, pc["mac"], ip, FAILED, e)
+            failed += 1
+            continue
+        target_ids.append(pc_id)
+        targets.append((ip, pc["mac"], host.port))
+        policies.append(policy)
+        packets.append(host.packet)
+    return target_ids, targets, policies, packets, failed
+
+def wake_by_group(args, inventory: Inventory, default_policy: SendPolicy) -> int:
+    """
+    args.group의 그룹과 선행 그룹들을 WakeGroups.json의 의존 관계 순서대로 깨운다
+    - 그룹은 PC가 모두 응답하거나 timeout(설정에 없으면 --deadline)초가 지나면 준비된 것으로 보고 후속 그룹을 시작
+    """
+    # wake_groups는 asyncio와 verifier를 불러오므로 그룹 단위로 깨울 때만 import
+    from wake_groups import (GroupError, GroupTarget, GroupWake, assign_members, group_config_path, group_members,
+                             load_group_graph)
+
+    config = args.groups_file or group_config_path(args.file)
+    try:
+        graph = load_group_graph(config, args.deadline)
+        waves = graph.waves(args.group)
+    except GroupError as e:
+        print(f"Invalid wake groups: {e}", file=sys.stderr)
+        return 2
+    members = group_members(inventory.items(), graph.closure(args.group))
+    known = set(graph.names())
+    unknown = [group for group in args.group if not members[group] and group not in known]
+    if unknown:
+        print(f"Unknown group: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    members = assign_members(waves, members)
+
+    failed = 0
+    group_targets = {}
+    names = {}  # pc id -> 이름
+    for wave_no, wave in enumerate(waves, 1):
+        for group in wave:
+            target_ids, targets, policies, packets, group_failed = prepare_targets(
+                inventory, members[group], default_policy, None if args.dry_run else args.history
+            )
+            failed += group_failed
+            target_names = [inventory.get(pc_id).get("name", "Unknown PC") for pc_id in target_ids]
+            names.update(zip(target_ids, target_names))
+            group_targets[group] = [GroupTarget(*target) for target in zip(target_ids, targets, policies, packets)]
+            after = graph.prerequisites(group)
+            print(f"Wave {wave_no}: {group} ({len(targets)} PCs"
+                  + (f", after {', '.join(after)}" if after else "") + f", timeout {graph.timeout(group):.0f}s)",
+                  file=sys.stderr)
+            if args.dry_run:
+                print_plan(targets, target_names, policies)
+    if args.dry_run:
+        return 1 if failed else 0
+
+    started = time.monotonic()
+
+    def on_group(group, state):
+        elapsed = time.monotonic() - started
+        if state == GroupWake.WAKING:
+            print(f"Waking group {group} ({len(group_targets[group])} PCs) at +{elapsed:.1f}s", file=sys.stderr)
+        elif state == GroupWake.READY:
+            print(f"Group {group} ready at +{elapsed:.1f}s", file=sys.stderr)
+        elif state == GroupWake.TIMEOUT:
+            print(f"Group {group} timed out at +{elapsed:.1f}s, continuing", file=sys.stderr)
+        elif state == GroupWake.FAILED:
+            print(f"Group {group} failed, continuing", file=sys.stderr)
+
+    finished = set()  # 전송 결과를 받은 pc id (취소되면 나머지는 취소로 기록)
+    ips = {target.key: target.target[0] for targets in group_targets.values() for target in targets}
+
+    def record(pc_id, ip, result, error=None, latency=None):
+        record_wake(args.history, names[pc_id], inventory.get(pc_id)["mac"], ip, result, error, latency)
+
+    def on_result(pc_id, error):
+        finished.add(pc_id)
+        if error is None:
+            print(f"Sent: {names[pc_id]}")
+            record(pc_id, ips[pc_id], SENT)
+        else:
+            print(f"Failed: {names[pc_id]} ({error})")
+            record(pc_id, ips[pc_id], FAILED, error)
+
+    def on_verified(pc_id, result):
+        if result.reachable:
+            print(f"Up: {names[pc_id]} ({result.time_to_wake:.1f}s, port {result.port})")
+            record(pc_id, result.ip, UP, latency=result.time_to_wake)
+        else:
+            print(f"No response: {names[pc_id]}")
+            record(pc_id, result.ip, NO_RESPONSE)
+
+    scheduler = WakeScheduler(rate=args.rate, stagger=args.stagger)
+    run = GroupWake(scheduler, graph, waves, group_targets, args.verify_ports,
+                    on_group=on_group, on_result=on_result, on_verified=on_verified)
+    # Ctrl+C를 받을 수 있도록 메인 스레드는 기다리기만 한다
+    results = {}
+    thread = threading.Thread(target=lambda: results.update(run.run()), name="wol-groups")
+    thread.start()
+    try:
+        while thread.is_alive():
+            thread.join(0.2)
+    except KeyboardInterrupt:
+        run.cancel()
+        thread.join()
+        print("Cancelled", file=sys.stderr)
+    finally:
+        scheduler.close()
+    for pc_id in ips.keys() - finished:
+        record(pc_id, ips[pc_id], CANCELLED)
+    not_ready = [group for group, state in results.items() if state != GroupWake.READY]
+    if not_ready or failed or run.cancelled:
+        return 1
+    return 0
+
+def print_plan(targets: list[Target], target_names: list[str], policies: list[SendPolicy]):
+    """보내지 않고 보낼 패킷을 순서대로 표시 (속도 제한과 그룹 간격은 반영하지 않음)"""
+    plan = plan_packets(targets, policies)
+    for offset, index, interface, destination, packet in plan:
+        if destination is None:
+            # raw Ethernet 프레임
+            destination = "ff:ff:ff:ff:ff:ff ethertype 0x0842"
+        else:
+            destination = f"{destination[0]}:{destination[1]}"
+        via = f"via {interface}" if interface else "default route"
+        print(f"+{offset:.2f}s  {target_names[index]}  {destination}  {via}  {len(packet)} bytes  {packet.hex()}")
+    print(f"{len(plan)} packets to {len(targets)} PCs (dry run, nothing sent)", file=sys.stderr)
+
+def wake_paced(targets: list[Target], target_names: list[str], rate: float | None, stagger: float,
+               sent: list[tuple[str, str, float, str]], policies: list[SendPolicy] | None = None,
+               packets: list[bytes] | None = None, history: WakeHistory | None = None) -> int:
+    """
+    정책대로 전송하고 실패/취소된 수 반환. 진행 상황은 stderr에 표시, Ctrl+C로 취소
+    - 전송에 성공한 (이름, ip, 첫 전송 시각, MAC)은 sent에 추가
+    - history가 있으면 결과와 요청부터 전송까지 걸린 시간을 기록 (보내지 못한 PC는 취소)
+    """
+    finished = set()
+
+    def on_result(index, target, error):
+        now = time.monotonic()
+        finished.add(index)
+        if error is None:
+            print(f"Sent: {target_names[index]}")
+            sent.append((target_names[index], target[0], now, target[1]))
+            record_wake(history, target_names[index], target[1], target[0], SENT, latency=now - requested)
+        else:
+            print(f"Failed: {target_names[index]} ({error})")
+            record_wake(history, target_names[index], target[1], target[0], FAILED, error, now - requested)
+
+    scheduler = WakeScheduler(rate=rate, stagger=stagger)
+    requested = time.monotonic()
+    try:
+        job = scheduler.submit(targets, on_result=on_result, policies=policies, packets=packets)
+    except OSError as e:
+        for pc_name, target in zip(target_names, targets):
+            print(f"Failed: {pc_name} ({e})")
+            record_wake(history, pc_name, target[1], target[0], FAILED, e)
+        return len(target_names)
+
+    try:
+        while not job.wait(1.0):
+            print(f"{job.completed}/{job.total} sent, ETA {job.eta():.0f}s", file=sys.stderr)
+    except KeyboardInterrupt:
+        job.cancel()
+        print(f"Cancelled: {job.total - job.completed} PCs not woken", file=sys.stderr)
+    finally:
+        scheduler.close()
+    for index, target in enumerate(targets):
+        if index not in finished:
+            record_wake(history, target_names[index], target[1], target[0], CANCELLED)
+    return job.total - job.sent
+
+def verify_sent(sent: list[tuple[str, str, float, str]], ports: list[int], deadline: float,
+                history: WakeHistory | None = None) -> int:
+    """깨운 PC들이 응답할 때까지 기다리고 응답하지 않은 수 반환"""
+    # verifier는 asyncio를 불러오므로 확인할 때만 import (CLI 시작 시간 단축)
+    from verifier import run_verification
+
+    print(f"Waiting up to {deadline:.0f}s for {len(sent)} PCs to respond on ports {', '.join(map(str, ports))}",
+          file=sys.stderr)
+
+    def on_result(index, result):
+        pc_name, ip, _, mac = sent[index]
+        if result.reachable:
+            print(f"Up: {pc_name} ({result.time_to_wake:.1f}s, port {result.port})")
+            record_wake(history, pc_name, mac, ip, UP, latency=result.time_to_wake)
+        else:
+            print(f"No response: {pc_name}")
+            record_wake(history, pc_name, mac, ip, NO_RESPONSE)
+
+    results = run_verification([(ip, sent_at) for _, ip, sent_at, _ in sent], on_result,
+                               ports=ports, deadline=deadline)
+    return sum(1 for result in results if not result.reachable)
+
+def parse_ports(value: str) -> list[int]:
+    try:
+        return [int(port) for port in value.split(",") if port]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid port list: {value}")
+
+def cmd_interfaces(args, inventory: Inventory) -> int:
+    for interface in list_interfaces():
+        if interface.loopback:
+            continue
+        network = interface.network
+        print(f"{interface.name}  {interface.address}"
+              + (f"  {network}  broadcast {interface.broadcast}" if network is not None else ""))
+    return 0
+
+def cmd_serve(args, inventory: Inventory) -> int:
+    # asyncio 서버는 serve 명령에서만 필요하므로 여기서 import
+    from agents import Coordinator
+    from relay import RelayService, run
+
+    token = args.token or os.environ.get("WOL_RELAY_TOKEN") or None
+    coordinator = None
+    agent_address = None
+    if args.agent_port is not None:
+        coordinator = Coordinator(token, args.heartbeat)
+        agent_address = (args.agent_host or args.host, args.agent_port)
+    service = RelayService(inventory, WakeScheduler(rate=args.rate), token=token, storage=args.storage,
+                           history=args.history, coordinator=coordinator)
+    print(f"{len(inventory)} PCs loaded", file=sys.stderr)
+    try:
+        run(service, args.host, args.port,
+            ready=lambda port: print(f"Listening on http://{args.host}:{port}", file=sys.stderr),
+            agent_address=agent_address,
+            agent_ready=lambda port: print(f"Waiting for agents on {agent_address[0]}:{port}", file=sys.stderr))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"Cannot start server: {e}", file=sys.stderr)
+        return 2
+    return 0
+
+def cmd_agent(args, inventory: Inventory) -> int:
+    from agents import Agent, AgentError, run_agent
+
+    host, _, port = args.coordinator.rpartition(":")
+    try:
+        policy = SendPolicy(directed_broadcast=not args.no_broadcast, interface=args.interface,
+                            transport=args.transport)
+        agent = Agent(host or "127.0.0.1", int(port), args.name or socket.gethostname(), args.subnet,
+                      args.priority, args.token or os.environ.get("WOL_RELAY_TOKEN") or None, policy,
+                      WakeScheduler(rate=args.rate), log=lambda text: print(text, file=sys.stderr))
+    except ValueError as e:
+        print(f"Invalid agent options: {e}", file=sys.stderr)
+        return 2
+    print(f"Agent {agent.name} for {', '.join(map(str, agent.subnets))}, coordinator {agent.host}:{agent.port}",
+          file=sys.stderr)
+    try:
+        run_agent(agent)
+    except KeyboardInterrupt:
+        pass
+    except AgentError as e:
+        print(f"Rejected by coordinator: {e}", file=sys.stderr)
+        return 2
+    print(f"{agent.batches} batches, {agent.sent} sent, {agent.failed} failed", file=sys.stderr)
+    return 0
+
+def cmd_resolve(args, inventory: Inventory) -> int:
+    ddns_list = [pc["ddns"] for pc in inventory if pc.get("ddns", "")]
+    changed = False
+    failed = 0
+    for ddns, ip in resolve_ip_addresses(ddns_list):
+        print(f"{ddns} -> {ip or 'FAILED'}")
+        # 조회에 실패하면 기존 ip를 유지
+        if not ip:
+            failed += 1
+            continue
+        for pc_id in inventory.find_by_ddns(ddns):
+            if inventory.get(pc_id)["ip"] != ip:
+                inventory.set_field(pc_id, "ip", ip)
+                changed = True
+
+    if changed and not args.no_save:
+        args.storage.save(inventory)
+
+    return 1 if failed else 0
+
+def cmd_import(args, inventory: Inventory) -> int:
+    try:
+        result = import_file(inventory, args.source, args.format, update_existing=args.update)
+    except (OSError, ValueError) as e:
+        print(f"Import failed: {e}", file=sys.stderr)
+        return 2
+
+    for line_no, reason, _ in result.rejected_rows:
+        print(f"Rejected: line {line_no} ({reason})")
+    if result.rejected > len(result.rejected_rows):
+        print(f"... and {result.rejected - len(result.rejected_rows)} more rejected rows")
+    print(f"{result.rows} rows, {result.added} added, {result.updated} updated, {result.rejected} rejected "
+          f"in {result.elapsed:.2f}s ({result.rows_per_second:,.0f} rows/sec)")
+
+    # 가져온 결과는 한 번에 저장 (SQLite는 한 트랜잭션)
+    if not args.dry_run:
+        args.storage.save(inventory)
+    return 1 if result.rejected else 0
+
+def cmd_discover(args, inventory: Inventory) -> int:
+    # discovery는 subprocess 등을 불러오므로 discover 명령에서만 import
+    from discovery import SubnetScanner, inventory_status
+
+    try:
+        scanner = SubnetScanner(args.cidr, args.interface, args.mode, args.concurrency, args.timeout, args.retries,
+                                args.reverse_dns)
+    except ValueError as e:
+        print(f"Cannot discover: {e}", file=sys.stderr)
+        return 2
+    print(f"Sweeping {scanner.address_count:,} addresses on "
+          + ", ".join(f"{sweep} ({interface.name})" for interface, sweep in scanner.ranges), file=sys.stderr)
+
+    # Ctrl+C를 받으면 지금까지 찾은 장비로 끝낼 수 있도록 탐색은 스레드에서
+    outcome = {}
+
+    def run():
+        try:
+            outcome["result"] = scanner.run()
+        except OSError as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run, name="wol-discover")
+    thread.start()
+    try:
+        while thread.is_alive():
+            thread.join(1.0)
+    except KeyboardInterrupt:
+        scanner.stop()
+        thread.join()
+    if "error" in outcome:
+        print(f"Cannot discover: {outcome['error']}", file=sys.stderr)
+        return 2
+    result = outcome["result"]
+
+    rows = []
+    for host in result.hosts:
+        status, pc_id = inventory_status(inventory, host)
+        rows.append((host, status, "" if pc_id is None else inventory.get(pc_id).get("name", "")))
+    if args.json:
+        print(json.dumps([{**host._asdict(), "status": status, "pc": pc_name} for host, status, pc_name in rows],
+                         indent=2, ensure_ascii=False))
+    else:
+        table = [["IP", "MAC Address", "DNS Name", "Interface", "Status", "PC Name"]]
+        table += [[host.ip, host.mac, host.name, host.interface, status, pc_name] for host, status, pc_name in rows]
+        widths = [max(len(row[i]) for row in table) for i in range(len(table[0]))]
+        for row in table:
+            print("  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip())
+    print(f"{len(result.hosts)} devices ({result.cached} already in the neighbour table), {result.probed:,} probes "
+          f"in {result.elapsed:.2f}s ({result.probes_per_second:,.0f} probes/sec, {result.mode})", file=sys.stderr)
+
+    if not args.add and not args.update:
+        return 0
+    # 이름이 없는(역방향 DNS 조회를 하지 않은) 장비는 IP를 이름으로 추가
+    imported = import_rows(inventory, [(index, host.to_row()) for index, host in enumerate(result.hosts, 1)],
+                           update_existing=args.update)
+    for line_no, reason, row in imported.rejected_rows:
+        print(f"Rejected: {row['ip']} {row['mac']} ({reason})")
+    print(f"{imported.added} added, {imported.updated} updated, {imported.rejected} rejected")
+    if not args.dry_run:
+        args.storage.save(inventory)
+    return 0
+
+def cmd_listen(args, inventory: Inventory) -> int:
+    names = mac_names(inventory)
+    try:
+        receiver = PacketReceiver(args.ports, args.host, args.interface, names)
+    except OSError as e:
+        print(f"Cannot listen: {e}", file=sys.stderr)
+        return 2
+
+    on_packet = None
+    if args.verbose:
+        def on_packet(mac, now):
+            print(f"{format_mac(mac)}  {names.get(mac) or '-'}")
+
+    listening = [f"udp {address[0]}:{address[1]}" if len(address) == 2 else f"ethernet {address[0]}"
+                 for address in receiver.addresses]
+    print(f"Listening on {', '.join(listening)}", file=sys.stderr)
+    # Ctrl+C를 받을 수 있도록 수신은 스레드에서 하고 메인 스레드는 진행 상황만 표시
+    thread = threading.Thread(target=receiver.run, args=(args.duration, args.count, on_packet), name="wol-listen")
+    thread.start()
+    try:
+        while thread.is_alive():
+            thread.join(1.0)
+            if thread.is_alive() and not args.verbose:
+                print(f"{receiver.received} magic packets from {len(receiver.stats)} MACs, "
+                      f"{receiver.invalid} other packets", file=sys.stderr)
+    except KeyboardInterrupt:
+        receiver.stop()
+        thread.join()
+    finally:
+        receiver.close()
+
+    report = list(receiver.report())
+    if args.json:
+        print(json.dumps({"received": receiver.received, "invalid": receiver.invalid, "seconds": receiver.elapsed,
+                          "macs": report}, indent=2, ensure_ascii=False))
+        return 0
+
+    def milliseconds(value):
+        return "" if value is None else f"{value * 1000:.1f}"
+
+    rows = [["MAC Address", "PC Name", "Packets", "Min ms", "Mean ms", "Max ms"]]
+    rows += [[entry["mac"], entry["name"] or "-", str(entry["count"]), milliseconds(entry["min_interval"]),
+              milliseconds(entry["mean_interval"]), milliseconds(entry["max_interval"])] for entry in report]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    for row in rows:
+        print("  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip())
+    rate = receiver.received / receiver.elapsed if receiver.elapsed else 0.0
+    print(f"{receiver.received} magic packets ({rate:,.0f}/sec) from {len(report)} MACs, "
+          f"{receiver.invalid} other packets in {receiver.elapsed:.1f}s", file=sys.stderr)
+    return 0
+
+def cmd_history(args, inventory: Inventory) -> int:
+    since = None if args.since is None else time.time() - args.since
+    records = args.history.query(host=args.host, since=since, failed=args.failed, limit=args.limit)
+    if args.json:
+        print(json.dumps([record.to_dict() for record in records], indent=2, ensure_ascii=False))
+        return 0
+
+    rows = [["Time", "PC Name", "MAC Address", "IP", "Result", "Latency", "Source", "User", "Error"]]
+    rows += [[time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.time)), record.name, record.mac, record.ip,
+              record.result, "" if record.latency is None else f"{record.latency:.2f}s", record.source, record.user,
+              record.error or ""] for record in records]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    for row in rows:
+        print("  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip())
+    print(f"{len(records)} records", file=sys.stderr)
+    return 0
+
+def parse_duration(value: str) -> float:
+    """초 단위 기간 (30, 90s, 15m, 1h, 2d)"""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    try:
+        if value and value[-1] in units:
+            return float(value[:-1]) * units[value[-1]]
+        return float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid duration: {value}")
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="wol", description="Wake on LAN command line interface")
+    parser.add_argument("-f", "--file", default=DEFAULT_JSON_FILE,
+                        help="PC list file, .json or .db/.sqlite (default: %(default)s)")
+    parser.add_argument("--log-json", metavar="FILE",
+                        help="append a JSON line for every send, DNS lookup, load and save to FILE ('-' for stderr)")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics while running")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="show the PC list")
+    list_parser.set_defaults(func=cmd_list)
+
+    wake_parser = subparsers.add_parser("wake", help="send wake up signal")
+    wake_parser.add_argument("names", nargs="*", metavar="name", help="PC name")
+    wake_parser.add_argument("--all", action="store_true", help="wake up every PC")
+    wake_parser.add_argument("--rate", type=float, help="maximum packets per second")
+    wake_parser.add_argument("--stagger", type=float, default=0.0,
+                             help="seconds between wakes in the same /24 subnet")
+    wake_parser.add_argument("--repeat", type=int, default=1, help="packets to send to each PC (default: %(default)s)")
+    wake_parser.add_argument("--interval", type=float, default=0.5,
+                             help="seconds between repeated packets (default: %(default)s)")
+    wake_parser.add_argument("--ports", type=parse_ports,
+                             help="comma separated UDP ports to send to, e.g. 7,9 (default: each PC's port)")
+    wake_parser.add_argument("--broadcast", action="store_true",
+                             help="also send to the subnet-directed broadcast address of each PC")
+    wake_parser.add_argument("--prefix", type=int, default=24,
+                             help="subnet prefix length for --broadcast (default: %(default)s)")
+    wake_parser.add_argument("--interface", default="",
+                             help="interface name or source address to send from, '*' for every interface "
+                                  "connected to the PC's subnet (default: default route)")
+    wake_parser.add_argument("--transport", choices=TRANSPORTS, default="udp",
+                             help="udp, or ethernet for raw EtherType 0x0842 frames on --interface "
+                                  "(Linux, needs root or CAP_NET_RAW)")
+    wake_parser.add_argument("--dry-run", action="store_true", help="show the packets that would be sent and exit")
+    wake_parser.add_argument("--verify", action="store_true", help="wait until the woken PCs respond")
+    # verifier.DEFAULT_PORTS, DEFAULT_DEADLINE과 같은 값 (asyncio를 불러오지 않도록 직접 적는다)
+    wake_parser.add_argument("--verify-ports", type=parse_ports, default=[22, 3389, 445, 80],
+                             help="comma separated TCP ports to check (default: %(default)s)")
+    wake_parser.add_argument("--deadline", type=float, default=300.0,
+                             help="seconds to wait for a response (default: %(default)s)")
+    wake_parser.add_argument("--group", action="append", metavar="NAME",
+                             help="wake the PCs tagged with group NAME after the groups it depends on, "
+                                  "each group once the previous ones respond or time out (repeatable)")
+    wake_parser.add_argument("--groups-file", metavar="FILE",
+                             help="group dependencies and timeouts (default: WakeGroups.json next to the PC list)")
+    wake_parser.set_defaults(func=cmd_wake)
+
+    interfaces_parser = subparsers.add_parser("interfaces", help="show network interfaces that can send packets")
+    interfaces_parser.set_defaults(func=cmd_interfaces)
+
+    serve_parser = subparsers.add_parser(
+        "serve", help="run the HTTP wake relay (POST /wake, GET /hosts, GET /status, GET /metrics)"
+    )
+    serve_parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: %(default)s)")
+    serve_parser.add_argument("--port", type=int, default=8009, help="port to listen on (default: %(default)s)")
+    serve_parser.add_argument("--token", help="require 'Authorization: Bearer TOKEN' (default: $WOL_RELAY_TOKEN)")
+    serve_parser.add_argument("--rate", type=float, help="maximum packets per second")
+    serve_parser.add_argument("--agent-port", type=int, metavar="PORT",
+                              help="accept wake agents on PORT and send to their subnets through them")
+    serve_parser.add_argument("--agent-host", metavar="HOST", help="address for agent connections (default: --host)")
+    # agents.HEARTBEAT_INTERVAL, DEFAULT_AGENT_PORT와 같은 값 (asyncio를 불러오지 않도록 직접 적는다)
+    serve_parser.add_argument("--heartbeat", type=float, default=5.0,
+                              help="seconds between agent heartbeats, an agent is dropped after 3 missed "
+                                   "(default: %(default)s)")
+    serve_parser.set_defaults(func=cmd_serve)
+
+    agent_parser = subparsers.add_parser("agent", help="send wakes for a coordinator (wol serve --agent-port) "
+                                                       "on this machine's subnets")
+    agent_parser.add_argument("--coordinator", required=True, metavar="HOST:PORT",
+                              help="coordinator address, e.g. relay.example.com:8010")
+    agent_parser.add_argument("--subnet", action="append", required=True, metavar="CIDR",
+                              help="subnet this agent wakes PCs on, e.g. 10.1.0.0/24 (repeatable)")
+    agent_parser.add_argument("--name", help="agent name, unique per coordinator (default: host name)")
+    agent_parser.add_argument("--priority", type=int, default=0,
+                              help="lower is preferred when several agents serve a subnet (default: %(default)s)")
+    agent_parser.add_argument("--token", help="coordinator token (default: $WOL_RELAY_TOKEN)")
+    agent_parser.add_argument("--rate", type=float, help="maximum packets per second")
+    agent_parser.add_argument("--interface", default="", help="interface name or source address to send from")
+    agent_parser.add_argument("--transport", choices=TRANSPORTS, default="udp",
+                              help="udp, or ethernet for raw EtherType 0x0842 frames on --interface")
+    agent_parser.add_argument("--no-broadcast", action="store_true",
+                              help="send only to each PC's address, not also to the subnet broadcast address")
+    agent_parser.set_defaults(func=cmd_agent)
+
+    resolve_parser = subparsers.add_parser("resolve", help="resolve DDNS addresses and update IPs")
+    resolve_parser.add_argument("--no-save", action="store_true", help="do not write resolved IPs to the file")
+    resolve_parser.set_defaults(func=cmd_resolve)
+
+    import_parser = subparsers.add_parser("import", help="import PCs from CSV, JSON Lines, DHCP leases or ARP cache")
+    import_parser.add_argument("source", help="file to import (e.g. hosts.csv, dhcpd.leases, /proc/net/arp)")
+    import_parser.add_argument("--format", choices=FORMATS, help="file format (default: detect from file name)")
+    import_parser.add_argument("--update", action="store_true", help="update PCs whose MAC address already exists")
+    import_parser.add_argument("--dry-run", action="store_true", help="validate only, do not save")
+    import_parser.set_defaults(func=cmd_import)
+
+    discover_parser = subparsers.add_parser("discover", help="find MAC addresses of devices on a local subnet")
+    discover_parser.add_argument("cidr", help="range to sweep, e.g. 192.168.0.0/24 (directly connected subnets only)")
+    discover_parser.add_argument("--interface", help="only sweep the subnet of this interface (name or address)")
+    # discovery.MODES와 방식별 기본값 (discovery를 불러오지 않도록 직접 적는다)
+    discover_parser.add_argument("--mode", choices=("auto", "arp", "udp"), default="auto",
+                                 help="arp: raw ARP requests (Linux, needs root or CAP_NET_RAW, fastest), "
+                                      "udp: kernel neighbour table (no privileges), "
+                                      "auto: arp if possible (default: %(default)s)")
+    discover_parser.add_argument("--concurrency", type=int,
+                                 help="addresses waiting for a reply at once (default: 4096 for arp, 768 for udp)")
+    discover_parser.add_argument("--timeout", type=float,
+                                 help="seconds to wait for each reply (default: 0.5 for arp, 3 for udp)")
+    discover_parser.add_argument("--retries", type=int, default=0,
+                                 help="probe addresses that did not reply again (default: %(default)s)")
+    discover_parser.add_argument("--reverse-dns", action="store_true", help="name devices by reverse DNS")
+    discover_parser.add_argument("--add", action="store_true", help="add new devices to the PC list")
+    discover_parser.add_argument("--update", action="store_true",
+                                 help="add new devices and update IPs of PCs whose MAC address already exists")
+    discover_parser.add_argument("--dry-run", action="store_true", help="with --add/--update, validate only")
+    discover_parser.add_argument("--json", action="store_true", help="print the devices as JSON")
+    discover_parser.set_defaults(func=cmd_discover)
+
+    listen_parser = subparsers.add_parser("listen", help="receive magic packets and count them per MAC address")
+    listen_parser.add_argument("--host", default="0.0.0.0", help="address to listen on (default: %(default)s)")
+    listen_parser.add_argument("--ports", type=parse_ports, default=[9],
+                               help="comma separated UDP ports to listen on (default: 9)")
+    listen_parser.add_argument("--interface",
+                               help="also receive raw EtherType 0x0842 frames on this interface "
+                                    "(Linux, needs root or CAP_NET_RAW)")
+    listen_parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    listen_parser.add_argument("--count", type=int, help="stop after this many magic packets")
+    listen_parser.add_argument("--verbose", action="store_true", help="print every magic packet")
+    listen_parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    listen_parser.set_defaults(func=cmd_listen)
+
+    history_parser = subparsers.add_parser("history", help="show recent wake results (newest first)")
+    history_parser.add_argument("--host", metavar="NAME", help="only this PC (name or MAC address)")
+    history_parser.add_argument("--failed", action="store_true", help="only failed sends and PCs that did not respond")
+    history_parser.add_argument("--since", type=parse_duration, metavar="DURATION",
+                                help="only the last DURATION, e.g. 90s, 15m, 1h, 2d")
+    history_parser.add_argument("--limit", type=int, default=50, help="maximum records (default: %(default)s)")
+    history_parser.add_argument("--json", action="store_true", help="print the records as JSON")
+    history_parser.set_defaults(func=cmd_history)
+
+    return parser
+
+def main(argv: list[str] | None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "wake" and not args.all and not args.names and not args.group:
+        parser.error("wake: specify PC names, --all or --group")
+    if args.command == "wake" and args.group and (args.all or args.names):
+        parser.error("wake: --group cannot be combined with PC names or --all")
+
+    log_file = None
+    metrics_server = None
+    try:
+        if args.log_json:
+            log_file = sys.stderr if args.log_json == "-" else open(args.log_json, "a", encoding="utf-8")
+            metrics.add_hook(metrics.JsonLogHook(log_file))
+        if args.metrics_port is not None:
+            metrics_server = metrics.serve("127.0.0.1", args.metrics_port)
+    except OSError as e:
+        print(f"Cannot start metrics: {e}", file=sys.stderr)
+        return 2
+
+    args.storage = open_storage(args.file)
+    # 전송 기록 (PC 목록 파일 옆의 WakeHistory 폴더)
+    args.history = WakeHistory(history_path(args.file))
+    try:
+        try:
+            inventory = args.storage.load()
+        except StorageError as e:
+            print(f"Invalid PC list file '{args.file}': {e}", file=sys.stderr)
+            return 2
+        return args.func(args, inventory)
+    finally:
+        args.history.close()
+        args.storage.close()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        if log_file is not None and log_file is not sys.stderr:
+            log_file.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
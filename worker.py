@@ -0,0 +1,83 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+import queue
+
+# 작업 결과를 확인하는 주기 (ms)
+POLL_INTERVAL = 50
+
+
+class BackgroundWorker:
+    """
+    네트워크 작업을 스레드 풀에서 실행하고 결과를 tkinter 메인 스레드로 전달
+    - 작업 스레드는 위젯을 건드리지 않고 큐에만 결과를 넣는다
+    - 메인 스레드는 처리할 작업이 있을 때만 after()로 큐를 확인한다
+    """
+
+    def __init__(self, widget, max_workers: int = 8):
+        self.widget = widget
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="wol-worker")
+        self._results: queue.Queue = queue.Queue()
+        self._pending = 0
+        self._polling = False
+
+    def submit(self, fn: Callable, *args, callback: Callable[[Any, BaseException | None], None] | None = None,
+               **kwargs) -> Future:
+        """
+        fn을 백그라운드에서 실행
+        - callback(result, error)은 메인 스레드에서 호출된다. 성공하면 error는 None
+        """
+        # 메인 스레드에서만 호출해야 한다
+        self._pending += 1
+        future = self._executor.submit(fn, *args, **kwargs)
+        future.add_done_callback(lambda f: self._results.put((callback, f)))
+        self._schedule_poll()
+        return future
+
+    def call_soon(self, callback: Callable, *args):
+        """
+        작업 스레드에서 메인 스레드의 callback(*args) 호출을 예약
+        - submit한 작업이나 hold() 중에만 전달된다 (그 외에는 다음 poll까지 큐에 남는다)
+        """
+        self._results.put((callback, args))
+
+    def hold(self):
+        """
+        worker 밖의 스레드(예: 스케줄러)가 call_soon을 쓰는 동안 큐 확인을 유지
+        - 메인 스레드에서 호출하고, 끝나면 release()
+        """
+        self._pending += 1
+        self._schedule_poll()
+
+    def release(self):
+        self._pending -= 1
+
+    def shutdown(self):
+        # 응답하지 않는 DNS 조회 등을 기다리지 않고 종료
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.widget.after(POLL_INTERVAL, self._poll)
+
+    def _poll(self):
+        self._polling = False
+        try:
+            while True:
+                try:
+                    callback, payload = self._results.get_nowait()
+                except queue.Empty:
+                    break
+
+                if isinstance(payload, Future):
+                    self._pending -= 1
+                    if payload.cancelled() or callback is None:
+                        continue
+                    error = payload.exception()
+                    callback(None if error else payload.result(), error)
+                else:
+                    callback(*payload)
+        finally:
+            # callback에서 예외가 나도 (tkinter가 보고한다) 남은 결과는 다음 확인에서 전달한다
+            if self._pending > 0 or not self._results.empty():
+                self._schedule_poll()